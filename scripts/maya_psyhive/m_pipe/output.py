@@ -31,7 +31,8 @@ class OutputRef(ref.FileRef):
             _latest_out = _cur_out.find_latest()
             if _latest_out == _cur_out:
                 return self.path
-            return get_single(_latest_out.find(type_='f'))
+            return get_single(list(_latest_out.ifind(
+                type_='f', sort=False, limit=2)))
         return _cur_asset.find_latest().path
 
     def update_to_latest(self):
@@ -490,7 +490,8 @@ def build_aistandin_output(output):
     assert _standin.extn == 'ma'
     _ver = tk2.TTOutputVersion(output)
     print ' - VER', _ver
-    _rest_cache = get_single(_ver.find(extn='abc', filter_='restCache'))
+    _rest_cache = get_single(list(_ver.ifind(
+        extn='abc', filter_='restCache', sort=False, limit=2)))
     print ' - REST CACHE', _rest_cache
     _shade = _ver.find_file(extn='mb', format_='maya')
     print ' - SHADE', _shade
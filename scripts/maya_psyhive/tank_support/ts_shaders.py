@@ -514,8 +514,8 @@ def build_shader_outputs(output, force=True, verbose=1):
     _standin = _out.map_to(
         tk2.TTOutputFile, format='aistandin', extension='ma')
     _ver = tk2.TTOutputVersion(output)
-    _rest_cache = get_single(_ver.find(
-        extn='abc', filter_='restCache'), catch=True)
+    _rest_cache = get_single(list(_ver.ifind(
+        extn='abc', filter_='restCache', sort=False, limit=2)), catch=True)
     _shade = _ver.find_file(extn='mb', format_='maya')
     lprint(' - VER       ', _ver.path, verbose=verbose)
     lprint(' - SHADE     ', _shade.path, verbose=verbose)
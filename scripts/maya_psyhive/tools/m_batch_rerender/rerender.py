@@ -139,7 +139,8 @@ def _get_latest_abc(abc):
     except ValueError:
         pass
     else:
-        return get_single(_output.find_latest().find(extn=File(abc).extn))
+        return get_single(list(_output.find_latest().ifind(
+            extn=File(abc).extn, sort=False, limit=2)))
 
 
 def _map_size_to_pxy(size):
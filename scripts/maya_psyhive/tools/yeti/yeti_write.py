@@ -1,14 +1,14 @@
 """Tools for managing yeti caching."""
 
 import os
-import shutil
 import tempfile
 
 from maya import cmds
 
 from psyhive import tk2, host, qt, icons, pipe
 from psyhive.utils import (
-    abs_path, Seq, safe_zip, lprint, Dir, dprint, get_plural)
+    abs_path, Seq, safe_zip, lprint, Dir, dprint, get_plural,
+    transfer_files)
 
 from maya_psyhive import ref
 from maya_psyhive import open_maya as hom
@@ -63,6 +63,7 @@ def _cache_yetis(yetis, apply_on_complete=False, samples=3, verbose=0):
     # Move tmp caches to outputs
     if len(_yetis) > 1:
         dprint('MOVING CACHES FROM TMP')
+        _pairs = []
         for _yeti, _out in safe_zip(_yetis, _outs):
             print ' - MOVING', _out.path
             _name = str(_yeti).replace(":", "_")
@@ -70,7 +71,8 @@ def _cache_yetis(yetis, apply_on_complete=False, samples=3, verbose=0):
             for _frame, _tmp_path in safe_zip(
                     _tmp_seq.get_frames(), _tmp_seq.get_paths()):
                 lprint('   -', _frame, _tmp_path, verbose=verbose)
-                shutil.move(_tmp_path, _out[_frame])
+                _pairs.append((_tmp_path, _out[_frame]))
+        transfer_files(_pairs, mode='move')
 
     # Apply cache to yeti nodes
     if apply_on_complete:
@@ -34,6 +34,10 @@ class MayaPyTask(object):
                 '',
             ]
         _lines += [
+            '# Disable dir listing cache for batch processing',
+            'import os',
+            'os.environ["PSYHIVE_DISABLE_LISTING_CACHE"] = "1"',
+            '',
             '# Print header',
             'from psyhive.utils import dprint',
             'dprint("Starting task {label}")',
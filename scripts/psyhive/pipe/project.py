@@ -64,11 +64,13 @@ class Project(Dir, Cacheable):
         _shots = self.find_shots()
         return get_single([_shot for _shot in _shots if _shot.name == name])
 
-    def find_shots(self, filter_=None, verbose=0):
+    def find_shots(self, filter_=None, workers=None, verbose=0):
         """Find shots within this project.
 
         Args:
             filter_ (str): filter shot names
+            workers (int): list sequence dirs in parallel using this
+                number of threads
             verbose (int): print process data
 
         Returns:
@@ -77,7 +79,8 @@ class Project(Dir, Cacheable):
         from psyhive import pipe
         _shots = []
         lprint('SEARCHING', self.seqs_path, verbose=verbose)
-        for _path in find(self.seqs_path, depth=2, type_='d'):
+        for _path in find(
+                self.seqs_path, depth=2, type_='d', workers=workers):
             try:
                 _shot = pipe.Shot(_path)
             except ValueError:
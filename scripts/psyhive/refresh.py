@@ -15,11 +15,20 @@ CODE_ROOT = abs_path(os.environ.get(
 
 _RELOAD_ORDER = [
     'psyhive.utils.misc',
+    'psyhive.utils.cache.c_file',
+    'psyhive.utils.cache.c_chunked',
+    'psyhive.utils.cache.c_stats',
+    'psyhive.utils.cache.c_db',
+    'psyhive.utils.cache.c_cacheable',
+    'psyhive.utils.cache.c_storer',
+    'psyhive.utils.cache.c_gc',
     'psyhive.utils.cache',
     'psyhive.utils.path.p_utils',
     'psyhive.utils.path.p_path',
     'psyhive.utils.path.p_dir',
     'psyhive.utils.path.p_file',
+    'psyhive.utils.path.p_find',
+    'psyhive.utils.path.p_transfer',
     'psyhive.utils.path',
     'psyhive.utils.py_file.docs',
     'psyhive.utils.py_file.base',
@@ -28,6 +37,7 @@ _RELOAD_ORDER = [
     'psyhive.utils.py_file.class_',
     'psyhive.utils.py_file',
     'psyhive.utils.ma_file',
+    'psyhive.utils.mb_file',
     'psyhive.utils',
     'psyhive.icons.set_',
     'psyhive.icons',
@@ -1,8 +1,12 @@
+import cPickle
+import errno
 import operator
 import os
 import random
 import shutil
+import struct
 import tempfile
+import threading
 import time
 import unittest
 
@@ -10,9 +14,13 @@ from psyhive import pipe
 from psyhive.utils import (
     passes_filter, apply_filter, abs_path, obj_write, obj_read, PyFile,
     store_result, restore_cwd, MissingDocs, rel_path, to_nice, wrap_fn,
-    text_to_py_file, touch, get_single, find, Dir, File, get_time_t,
+    text_to_py_file, touch, get_single, find, ifind, Dir, File, get_time_t,
     get_owner, Cacheable, get_result_storer, Seq, store_result_on_obj,
-    get_result_to_file_storer, to_pascal)
+    get_result_to_file_storer, to_pascal, ReadError, build_cache_fmt,
+    clear_listing_cache, compile_filter, filter_many, find_seqs,
+    group_frames, FrameSet, ints_to_str, str_to_ints, transfer_files,
+    TransferError, MaFile, FileError, scan_many, MbFile)
+from psyhive.utils import cache, ma_file
 
 _TEST_DIR = '{}/psyhive/testing'.format(tempfile.gettempdir())
 
@@ -56,6 +64,372 @@ class TestCache(unittest.TestCase):
         time.sleep(2)
         assert _val != _test.blah()
 
+    def test_cache_db(self):
+
+        _root = '{}/db_test'.format(_TEST_DIR)
+        if os.path.exists(_root):
+            shutil.rmtree(_root)
+
+        # Test cacheable
+        class _Test(Cacheable):
+            cache_fmt = build_cache_fmt(
+                '/a/b/test.txt', root=_root, backend='db')
+
+            @get_result_to_file_storer()
+            def blah(self, force=False):
+                return random.random()
+
+        _test = _Test()
+        assert _test.cache_fmt.startswith('sqlite:')
+        _test.cache_write('tag', {'a': 1})
+        assert _test.cache_read('tag') == {'a': 1}
+        assert _test.cache_read('missing') is None
+        _val = _test.blah()
+        assert _Test().blah() == _val
+        assert os.path.exists('{}/psyhive/cache.db'.format(_root))
+        assert not os.path.exists('{}/psyhive/cache'.format(_root))
+
+        # Test migrate
+        _fmt = build_cache_fmt('/a/b/test2.txt', root=_root, backend='file')
+        obj_write(obj='test', file_=_fmt.format('tag'))
+        obj_write(obj='old', file_='{}/_bkp_test2_tag_200101_120000.{}'.format(
+            os.path.dirname(_fmt), _fmt.rsplit('.', 1)[-1]))
+        assert cache.migrate_to_db(root=_root, delete=True, verbose=0) == 2
+        _fmt = build_cache_fmt('/a/b/test2.txt', root=_root, backend='db')
+        assert obj_read(_fmt.format('tag')) == 'test'
+        assert obj_read('{}/_bkp_test2_tag_200101_120000'.format(
+            _fmt.rsplit('/', 1)[0])) == 'old'
+
+        # Test migrate keeps depend digests
+        _depend = '{}/depend.txt'.format(_TEST_DIR)
+        File(_depend).write_text('test', force=True)
+
+        class _Depend(Cacheable):
+            path = _depend
+
+            def __init__(self, backend):
+                self.cache_fmt = build_cache_fmt(
+                    _depend, root=_root, backend=backend)
+
+            @get_result_to_file_storer(
+                get_depend_path=operator.attrgetter('path'),
+                depend_mode='hash')
+            def read(self, force=False):
+                return random.random()
+
+        _Depend('file').read(force=True)
+        _mtime = time.time()+30
+        os.utime(_depend, (_mtime, _mtime))
+        _val = _Depend('file').read()  # Outdated cache stores digest
+        assert cache.migrate_to_db(root=_root, delete=True, verbose=0) == 1
+        _db = cache.get_db('{}/psyhive/cache.db'.format(_root))
+        assert [_digest for _key, _, _, _digest in _db.read_entries()
+                if _key.endswith('depend_read')][0].startswith('hash:')
+        _mtime = time.time()+60
+        os.utime(_depend, (_mtime, _mtime))
+        assert _Depend('db').read() == _val
+
+    def test_cache_gc(self):
+
+        _root = '{}/gc_test'.format(_TEST_DIR)
+        _src_dir = '{}/gc_src'.format(_TEST_DIR)
+        for _dir in [_root, _src_dir]:
+            if os.path.exists(_dir):
+                shutil.rmtree(_dir)
+
+        # Build caches
+        class _Test(Cacheable):
+            def __init__(self, path):
+                self.cache_fmt = build_cache_fmt(
+                    path, root=_root, backend='file')
+        _keep = _Test('{}/keep.txt'.format(_src_dir))
+        _missing = _Test('{}/missing.txt'.format(_src_dir))
+        _seq = _Test('{}/render.%04d.exr'.format(_src_dir))
+        _missing_seq = _Test('{}/blah.%04d.exr'.format(_src_dir))
+        touch('{}/keep.txt'.format(_src_dir))
+        touch('{}/render.1001.exr'.format(_src_dir))
+        touch('{}/blah.001.exr'.format(_src_dir))
+        _keep.cache_write('tag', 3)
+        _seq.cache_write('tag', 4)
+        _missing_seq.cache_write('tag', 5)
+        for _idx in range(3):
+            _bkp = '{}/_bkp_keep_tag_20101{:d}_120000.cache'.format(
+                os.path.dirname(_keep.cache_fmt), _idx)
+            obj_write(_idx, file_=_bkp)
+        _missing.cache_write('tag', 'blah')
+        _bkps = find(_root, filter_='_bkp_', type_='f')
+        assert len(_bkps) == 3
+
+        # Test unreadable source dir isn't treated as missing
+        _listdir = os.listdir
+
+        def _failing_listdir(path):
+            if path.rstrip('/') == _src_dir:
+                raise OSError(errno.EIO, 'Input/output error')
+            return _listdir(path)
+
+        os.listdir = _failing_listdir
+        try:
+            _report = cache.gc(root=_root, dry_run=True, verbose=0)
+        finally:
+            os.listdir = _listdir
+        assert not _report.removed
+
+        # Test dry run
+        _report = cache.gc(root=_root, max_bkps=1, dry_run=True, verbose=0)
+        assert sorted(_report.removed.values()) == [
+            'bkp', 'bkp', 'missing', 'missing']
+        assert len(find(_root, type_='f')) == 7
+
+        # Test gc
+        cache.gc(root=_root, max_bkps=1, verbose=0)
+        assert not os.path.exists(_missing.cache_fmt.format('tag'))
+        assert find(_root, filter_='_bkp_', type_='f') == _bkps[-1:]
+        assert _keep.cache_read('tag') == 3
+        assert _seq.cache_read('tag') == 4
+        assert not os.path.exists(_missing_seq.cache_fmt.format('tag'))
+
+        # Test quota
+        _report = cache.gc(root=_root, quota=1, verbose=0)
+        assert len(_report.removed) == 3
+        assert not find(_root, type_='f')
+
+    def test_depend_mode_hash(self):
+
+        _depend = '{}/depend_test/depend.txt'.format(_TEST_DIR)
+        touch(_depend)
+        with open(_depend, 'w') as _file:
+            _file.write('test')
+
+        class _Test(object):
+
+            path = _depend
+            cache_fmt = '{}/depend_test/{{}}.cache'.format(_TEST_DIR)
+
+            @get_result_to_file_storer(
+                get_depend_path=operator.attrgetter('path'),
+                depend_mode='hash')
+            def blah(self, force=False):
+                return random.random()
+
+        # Test digest is only read to check an existing cache
+        _digests = []
+        _get_file_digest = cache.c_storer._get_file_digest
+        cache.c_storer._get_file_digest = lambda *args, **kwargs: (
+            _digests.append(args) or _get_file_digest(*args, **kwargs))
+        try:
+            _val = _Test().blah(force=True)
+            assert not _digests
+
+            # First mtime update regenerates cache to store digest
+            _mtime = time.time() + 10
+            os.utime(_depend, (_mtime, _mtime))
+            _new_val = _Test().blah()
+            assert _new_val != _val
+            assert len(_digests) == 1
+            _val = _new_val
+        finally:
+            cache.c_storer._get_file_digest = _get_file_digest
+
+        # Test update mtime without changing contents
+        os.utime(_depend, (_mtime + 10, _mtime + 10))
+        assert _Test().blah() == _val
+
+        # Test update contents
+        with open(_depend, 'w') as _file:
+            _file.write('blah')
+        os.utime(_depend, (_mtime + 20, _mtime + 20))
+        assert _Test().blah() != _val
+
+    def test_get_result_storer_eviction(self):
+
+        # Test lru
+        @get_result_storer(max_entries=2)
+        def _test(a):
+            return random.random()
+        _val_1 = _test(1)
+        _test(2)
+        assert _test(1) == _val_1
+        _test(3)
+        assert _test.info()['entries'] == 2
+        assert _test.info()['evictions'] == 1
+        assert _test(1) == _val_1
+        _test.clear()
+        assert not _test.info()['entries']
+        assert _test(1) != _val_1
+
+        # Test lfu
+        @get_result_storer(max_entries=2, policy='lfu')
+        def _test(a):
+            return random.random()
+        _val_1 = _test(1)
+        _test(1)
+        _test(2)
+        _test(3)
+        assert _test(1) == _val_1
+
+        # Test max bytes
+        @get_result_storer(max_bytes=2000)
+        def _test(a):
+            return 'a'*1000
+        for _idx in range(5):
+            _test(_idx)
+        assert _test.info()['entries'] == 1
+
+    def test_get_stats(self):
+
+        from psyhive.utils import cache, ma_file
+
+        @get_result_storer(name='test_get_stats')
+        def _test(a):
+            return random.random()
+        _test(1)
+        _test(1)
+        _test(2)
+        assert _test.stats.hits == 1
+        assert _test.stats.misses == 2
+        assert _test.stats.entries == 2
+        assert cache.get_stats('test_get_stats') == [_test.stats]
+        assert 'test_get_stats' in cache.get_stats(fmt='table')
+        assert 'test_get_stats' in cache.get_stats(fmt='yaml')
+
+        # Check methods of the same name in different classes
+        class _TestA(object):
+            @store_result_on_obj
+            def get_data(self):
+                return 1
+
+        class _TestB(object):
+            @store_result_on_obj
+            def get_data(self):
+                return 2
+
+        _TestA().get_data()
+        _stats = cache.get_stats('_TestA.get_data')
+        assert [_stat.name for _stat in _stats] == [
+            'psyhive.tests.unit.test_utils._TestA.get_data']
+        assert _stats[0].misses == 1
+        assert len(cache.get_stats('_TestB.get_data')) == 1
+
+    def test_get_result_storer_threads(self):
+
+        _calls = []
+
+        @get_result_storer()
+        def _test(a):
+            _calls.append(a)
+            time.sleep(0.2)
+            return random.random()
+
+        _results = []
+        _threads = [
+            threading.Thread(target=lambda: _results.append(_test(1)))
+            for _ in range(5)]
+        for _thread in _threads:
+            _thread.start()
+        for _thread in _threads:
+            _thread.join()
+        assert _calls == [1]
+        assert len(set(_results)) == 1
+        assert _test.stats.hits == 4
+
+    def test_get_result_to_file_storer_lazy(self):
+
+        class _Test(object):
+            cache_fmt = '{}/lazy_test/{{}}.cache'.format(_TEST_DIR)
+
+            @get_result_to_file_storer(lazy=True)
+            def blah(self, force=False):
+                return [random.random() for _ in range(10)]
+
+        _val = _Test().blah(force=True)
+        assert isinstance(_val, list)
+        _lazy = _Test().blah()
+        assert isinstance(_lazy, cache.LazyList)
+        assert list(_lazy) == _val
+
+    def test_get_result_storer_refresh(self):
+
+        class _Clock(object):
+            now = 1000.0
+
+            def time(self):
+                return self.now
+
+        _clock = _Clock()
+        _calls = []
+        _started = threading.Event()
+        _release = threading.Event()
+
+        @get_result_storer(timeout=10, refresh='background', max_stale=60)
+        def _test(a, force=False):
+            _calls.append(a)
+            _started.set()
+            assert _release.wait(5)
+            return len(_calls)
+
+        _time = cache.c_storer.time
+        cache.c_storer.time = _clock
+        try:
+            _release.set()
+            assert _test(1) == 1
+            _release.clear()
+            _started.clear()
+
+            # Test fresh result is reused
+            _clock.now += 5
+            assert _test(1) == 1
+            assert not _test.stats.stale_hits
+
+            # Test stale result is returned while refresh is in progress
+            _clock.now += 10
+            assert _test(1) == 1
+            assert _started.wait(5)
+            assert _test(1) == 1
+            assert _test.stats.stale_hits == 1
+            assert _calls == [1, 1]
+
+            # Test refreshed result is used once calculated
+            _release.set()
+            assert _test(1, force=True) == 2
+            assert _test(1) == 2
+            assert _calls == [1, 1]
+            assert _test.stats.stale_hits == 1
+
+            # Test max stale blocks
+            _clock.now += 61
+            assert _test(1) == 3
+            assert _test.stats.stale_hits == 1
+        finally:
+            cache.c_storer.time = _time
+            _release.set()
+
+    def test_store_result_on_obj_release(self):
+
+        class _Test(object):
+            @store_result_on_obj
+            def test(self):
+                return random.random()
+        _inst = _Test()
+        _inst.test()
+        assert _Test.test.info()['entries'] == 1
+        del _inst
+        assert not _Test.test.info()['entries']
+
+        # Test file storer releases objects from memory
+        class _Test(object):
+            cache_fmt = '{}/release_test/{{}}.cache'.format(_TEST_DIR)
+
+            @get_result_to_file_storer()
+            def test(self):
+                return random.random()
+        _inst = _Test()
+        _val = _inst.test()
+        assert _Test.test.stats.entries == 1
+        del _inst
+        assert not _Test.test.stats.entries
+        assert _Test().test() == _val
+
     def test_store_result(self):
 
         @store_result
@@ -142,6 +516,293 @@ class TestPyFile(unittest.TestCase):
         assert _def.find_arg('c').default == {'a': 1}
 
 
+class _TmpMaFile(MaFile):
+    """Ma file which caches to tmp rather than the current project."""
+
+    @property
+    def cache_fmt(self):
+        """Get cache format path.
+
+        Returns:
+            (str): cache format
+        """
+        return build_cache_fmt(self.path, level='tmp')
+
+
+class _TmpMbFile(MbFile):
+    """Mb file which caches to tmp rather than the current project."""
+
+    @property
+    def cache_fmt(self):
+        """Get cache format path.
+
+        Returns:
+            (str): cache format
+        """
+        return build_cache_fmt(self.path, level='tmp')
+
+
+class TestMaFile(unittest.TestCase):
+
+    def test_find_exprs(self):
+
+        _ma = _TmpMaFile('{}/ma_file/test.ma'.format(_TEST_DIR))
+        _ref = '{}/ma_file/ref.ma'.format(_TEST_DIR)
+        _ma.write_text('\n'.join([
+            '//Maya ASCII 2018 scene',
+            '//Name: test.ma',
+            'file -rdi 1 -ns "ref" -rfn "refRN"',
+            '\t -typ "mayaAscii" "{}";'.format(_ref),
+            'requires maya "2018";',
+            'currentUnit -l centimeter -a degree -t film;',
+            'createNode transform -n "persp";',
+            '\trename -uid "ABC";',
+            '\tsetAttr ".v" no;',
+            '',
+            'createNode camera -n "perspShape" -p "persp";',
+            '\tsetAttr -k off ".v" no;',
+            '// End of test.ma',
+            '']), force=True)
+
+        assert [_expr.type_ for _expr in _ma.find_exprs()] == [
+            'file', 'requires', 'currentUnit', 'createNode', 'createNode']
+        assert _ma.find_fps() == 24.0
+        assert [_node.name for _node in _ma.find_create_nodes(
+            force=True)] == ['persp', 'persp|perspShape']
+        assert [_node.name for _node in _ma.find_create_nodes(
+            type_='camera')] == ['persp|perspShape']
+        _shape = _ma.find_create_nodes(force=True)[-1]
+        assert _shape.body == (
+            'createNode camera -n "perspShape" -p "persp";\n'
+            '\tsetAttr -k off ".v" no;')
+        _file = get_single(_ma.find_files(force=True))
+        assert _file.path == _ref
+        assert _file.node == 'refRN'
+        assert _file.namespace == 'ref'
+
+    def test_scan_header(self):
+
+        _ma = _TmpMaFile('{}/ma_file/header.ma'.format(_TEST_DIR))
+        _ma.write_text('\n'.join([
+            '//Maya ASCII 2018 scene',
+            'file -rdi 1 -ns "a" -rfn "aRN" "/tmp/a_v001.ma";',
+            'file -r -ns "a" -dr 1 -rfn "aRN" "/tmp/a_v002.ma";',
+            'file -r -ns "b" -dr 1 -rfn "bRN" "/tmp/b v001.ma";',
+            'requires maya "2018";',
+            'requires -nodeType "xgmDescription" "xgenToolkit" "1.0";',
+            'currentUnit -l centimeter -a degree -t pal;',
+            'fileInfo "application" "maya";',
+            'fileInfo "license" "say \\"hi\\"";',
+            'createNode transform -n "persp";',
+            'notAnMaDeclaration;',
+            '']), force=True)
+
+        _header = _ma.scan_header(force=True)
+        assert _header['refs'] == [
+            ('/tmp/a_v002.ma', 'a', 'aRN'),
+            ('/tmp/b v001.ma', 'b', 'bRN')]
+        assert _header['requires'] == {'maya': '2018', 'xgenToolkit': '1.0'}
+        assert _header['units'] == {
+            'linear': 'centimeter', 'angle': 'degree', 'time': 'pal'}
+        assert _header['file_info'] == {
+            'application': 'maya', 'license': 'say "hi"'}
+        assert _ma.find_fps(force=True) == 25.0
+        assert len(_ma.find_refs(force=True)) == 2
+        with self.assertRaises(FileError):
+            _ma.find_create_nodes(force=True)
+
+    def test_scan_header_partial_read(self):
+
+        _ma = _TmpMaFile('{}/ma_file/big.ma'.format(_TEST_DIR))
+        _ma.write_text('\n'.join([
+            '//Maya ASCII 2018 scene',
+            'file -rdi 1 -ns "a" -rfn "aRN" "/tmp/a_v001.ma";',
+            'requires maya "2018";',
+            'currentUnit -l centimeter -a degree -t film;'] + [
+                'createNode transform -n "node{:d}";'.format(_idx)
+                for _idx in range(100000)] + ['']), force=True)
+        _size = os.path.getsize(_ma.path)
+
+        # Track how far into the file it's read and how it's digested
+        _positions = []
+        _digests = []
+
+        class _File(file):
+            def __exit__(self, *args):
+                _positions.append(self.tell())
+                return super(_File, self).__exit__(*args)
+
+        _get_file_digest = cache.c_storer._get_file_digest
+        cache.c_storer._get_file_digest = lambda path, mode, **kwargs: (
+            _digests.append(mode) or _get_file_digest(path, mode, **kwargs))
+        ma_file.open = _File
+        try:
+            assert _ma.scan_header(force=True)['units']['time'] == 'film'
+            _mtime = time.time() + 10
+            os.utime(_ma.path, (_mtime, _mtime))
+            assert _TmpMaFile(_ma.path).find_fps() == 24.0
+        finally:
+            cache.c_storer._get_file_digest = _get_file_digest
+            del ma_file.open
+        assert _positions
+        assert max(_positions) < _size/10
+        assert _digests == ['sample']
+
+    def test_save_as(self):
+
+        _dir = '{}/ma_file'.format(_TEST_DIR)
+        for _name in ['a', 'b', 'c']:
+            touch('{}/{}.ma'.format(_dir, _name))
+        _lines = [
+            '//Maya ASCII 2018 scene',
+            'file -rdi 1 -ns "a" -rfn "aRN" "{}/a.ma";'.format(_dir),
+            'file -r -ns "b" -dr 1 -rfn "bRN"',
+            '\t "{}/b.ma";'.format(_dir),
+            'createNode transform -n "persp";',
+            '\tsetAttr ".v" no;',
+            '']
+        _ma = _TmpMaFile('{}/save_as.ma'.format(_dir))
+        _ma.write_text('\n'.join(_lines), force=True)
+        _out = File('{}/save_as_out.ma'.format(_dir))
+
+        _ref_a, _ref_b = _ma.find_files(force=True)
+        _ref_b.set_path('{}/a.ma'.format(_dir))
+        _ref_b.set_path('{}/c.ma'.format(_dir))
+        _ref_a.set_path('{}/b.ma'.format(_dir))
+        assert _ma.has_edits()
+        _ma.save_as(_out.path, force=True)
+        assert not _ma.has_edits()
+        _lines[1] = _lines[1].replace('a.ma', 'b.ma')
+        _lines[3] = _lines[3].replace('b.ma', 'c.ma')
+        assert _out.read() == '\n'.join(_lines)
+
+        # Check edits fail if file changes on disk
+        _ref_a.set_path('{}/c.ma'.format(_dir))
+        _ma.write_text(_ma.read().replace('aRN', 'xRN'), force=True)
+        with self.assertRaises(FileError):
+            _ma.save_as(_out.path, force=True)
+        assert not os.path.exists(_out.path+'.tmp')
+
+    def test_save_as_in_place(self):
+
+        _dir = '{}/ma_file'.format(_TEST_DIR)
+        _long = '{}/{}.ma'.format(_dir, 'x'*50)
+        touch(_long)
+        _ma = _TmpMaFile('{}/in_place.ma'.format(_dir))
+        _ma.write_text('\n'.join([
+            'file -r -ns "a" -rfn "aRN" "/tmp/a.ma";',
+            'createNode transform -n "persp";',
+            'createNode camera -n "perspShape" -p "persp";',
+            '']), force=True)
+        assert len(_ma.find_exprs('createNode')) == 2
+
+        # Save twice in place to check offsets are reread
+        get_single(_ma.find_files(force=True)).set_path(_long)
+        _ma.save_as(_ma.path, force=True)
+        assert [_node.name for _node in _ma.find_exprs('createNode')] == [
+            'persp', 'persp|perspShape']
+        get_single(_ma.find_files()).set_path('/tmp')
+        _ma.save_as(_ma.path, force=True)
+        assert _ma.read().splitlines()[0] == (
+            'file -r -ns "a" -rfn "aRN" "/tmp";')
+        assert len(_ma.find_exprs('createNode')) == 2
+
+    def test_scan_many(self):
+
+        _dir = '{}/ma_file/scan_many'.format(_TEST_DIR)
+        _paths = []
+        for _idx in range(3):
+            _ma = File('{}/test_{:d}.ma'.format(_dir, _idx))
+            _ma.write_text('\n'.join([
+                'file -r -ns "a" -rfn "aRN"',
+                '\t"/tmp/a.ma";',
+                'requires maya "2018";',
+                'currentUnit -l centimeter -a degree -t ntsc;',
+                'createNode transform -n "persp";',
+                'createNode camera -n "perspShape" -p "persp";',
+                'createNode transform -n "top";',
+                '']), force=True)
+            _paths.append(_ma.path)
+        _paths.append('{}/missing.ma'.format(_dir))
+
+        for _workers in [1, 2]:
+            _summaries = scan_many(
+                _paths, workers=_workers, class_=_TmpMaFile, force=True)
+            assert [_summary['path'] for _summary in _summaries] == _paths
+            _summary = _summaries[0]
+            assert not _summary['error']
+            assert _summary['refs'] == [['/tmp/a.ma', 'a', 'aRN']]
+            assert _summary['fps'] == 30.0
+            assert _summary['n_nodes'] == 3
+            assert _summary['node_types'] == {'transform': 2, 'camera': 1}
+            assert _summaries[-1]['error']
+
+        # Test each file is only read once
+        _opened = []
+
+        class _File(file):
+            def __init__(self, path, *args):
+                _opened.append(path)
+                super(_File, self).__init__(path, *args)
+
+        ma_file.open = _File
+        try:
+            scan_many(_paths[:2], workers=1, class_=_TmpMaFile, force=True)
+        finally:
+            del ma_file.open
+        assert _opened == _paths[:2]
+
+
+class TestMbFile(unittest.TestCase):
+
+    def test_scan_header(self):
+
+        for _fmt, _header, _align in [
+                ('4', '>4sL', 4),
+                ('8', '>4s4xQ', 8)]:
+
+            def _chunk(tag, data, type_=None):
+                if type_:
+                    data = type_+'\0'*(_align-4)+data
+                _pad = '\0'*(-len(data) % _align)
+                return struct.pack(_header, tag, len(data))+data+_pad
+
+            _head = ''.join([
+                _chunk('VERS', '2018\0'),
+                _chunk('PLUG', 'mtoa\x003.1.2\0'),
+                _chunk('FINF', 'application\0maya\0'),
+                _chunk('LUNI', 'cm\0'),
+                _chunk('AUNI', 'deg\0'),
+                _chunk('TUNI', 'pal\0')])
+            _body = ''.join([
+                _chunk('FOR'+_fmt, _head, type_='HEAD'),
+                _chunk('FREF', '/tmp/a.mb\0'),
+                _chunk('FOR'+_fmt, _chunk('FREF', '/tmp/b.mb\0'),
+                       type_='FREF'),
+                _chunk('FOR'+_fmt, _chunk('DBLE', 'x'*13), type_='XFRM'),
+                _chunk('FREF', '/tmp/a.mb\0')])
+
+            _mb = _TmpMbFile('{}/mb_file/test_{}.mb'.format(_TEST_DIR, _fmt))
+            _mb.test_dir()
+            with open(_mb.path, 'wb') as _file:
+                _file.write(_chunk('FOR'+_fmt, _body, type_='Maya'))
+
+            _data = _mb.scan_header(force=True)
+            assert _data['refs'] == [
+                ('/tmp/b.mb', None, None), ('/tmp/a.mb', None, None)]
+            assert _data['requires'] == {'mtoa': '3.1.2'}
+            assert _data['units'] == {
+                'linear': 'cm', 'angle': 'deg', 'time': 'pal'}
+            assert _data['file_info'] == {'application': 'maya'}
+            assert _mb.find_fps() == 25.0
+
+            # Check truncated file
+            with open(_mb.path, 'wb') as _file:
+                _file.write(_chunk('FOR'+_fmt, _body, type_='Maya')[:-20])
+            with self.assertRaises(FileError):
+                _mb.scan_header(force=True)
+
+
 class TestPath(unittest.TestCase):
 
     def test(self):
@@ -185,6 +846,56 @@ class TestPath(unittest.TestCase):
                 r"\\la1nas006\homedir\hvanderbeek\Downloads\SK_Tier1_Male.ma")
             assert abs_path(_path) == 'Z:/Downloads/SK_Tier1_Male.ma'
 
+    @restore_cwd
+    def test_abs_path_memo(self):
+
+        from psyhive.utils.path import p_tools
+
+        # Test memoised/fast path results match unmemoised results
+        for _path, _clean in [
+                ('P:/projects/blah/test.txt', True),
+                ('/tmp/blah/test.txt', True),
+                ('p:\\projects\\blah\\.\\test.txt', False),
+                ('/c/projects/blah/test.txt', False),
+                ('/tmp//blah/../test.txt', False)]:
+            assert p_tools._is_clean_abs_path(_path) == _clean
+            for _ in range(2):
+                assert abs_path(_path) == p_tools._read_abs_path(_path)[0]
+        assert abs_path('P:/blah/test.txt', win=True) == r'P:\blah\test.txt'
+
+        # Test cwd dependent paths are not memoised
+        os.chdir(pipe.TMP)
+        assert abs_path('test.txt') == pipe.TMP + '/test.txt'
+        _dir = os.path.dirname(pipe.TMP)
+        os.chdir(_dir)
+        assert abs_path('test.txt') == _dir + '/test.txt'
+        assert 'test.txt' not in p_tools._ABS_PATHS
+
+        # Test memo hits don't reread path
+        _reads = []
+        _read_abs_path = p_tools._read_abs_path
+        p_tools._read_abs_path = lambda *args, **kwargs: (
+            _reads.append(args) or _read_abs_path(*args, **kwargs))
+        _size = p_tools._ABS_PATHS_SIZE
+        try:
+            p_tools._ABS_PATHS.clear()
+            for _ in range(3):
+                assert abs_path('p:\\blah\\test.txt') == 'P:/blah/test.txt'
+            assert len(_reads) == 1
+
+            # Test memo is cleared at capacity
+            p_tools._ABS_PATHS.clear()
+            p_tools._ABS_PATHS_SIZE = 3
+            for _idx in range(3):
+                abs_path('P:/blah/test_{:d}.txt'.format(_idx))
+            assert len(p_tools._ABS_PATHS) == 3
+            abs_path('P:/blah/test_3.txt')
+            assert p_tools._ABS_PATHS == {
+                'P:/blah/test_3.txt': 'P:/blah/test_3.txt'}
+        finally:
+            p_tools._read_abs_path = _read_abs_path
+            p_tools._ABS_PATHS_SIZE = _size
+
     def test_find(self):
 
         _test_dir = '{}/psyhive/testing/blah'.format(tempfile.gettempdir())
@@ -195,6 +906,81 @@ class TestPath(unittest.TestCase):
         assert get_single(find(_test_dir)) == _test_file
         assert get_single(find(_test_dir, full_path=False)) == 'test.txt'
 
+        # Test filters
+        touch('{}/a/b/test.py'.format(_test_dir))
+        touch('{}/a/.hidden'.format(_test_dir))
+        assert find(_test_dir, type_='d', full_path=False) == ['a', 'a/b']
+        assert find(_test_dir, depth=1, full_path=False) == [
+            'a', 'test.txt']
+        assert find(_test_dir, extn='py', full_path=False) == ['a/b/test.py']
+        assert find(_test_dir, extn='hidden', full_path=False) == [
+            'a/.hidden']
+        assert find(_test_dir, base='tes', type_='f', depth=2) == [
+            _test_file]
+        assert find(_test_dir, name='b', class_=Dir) == [
+            Dir(_test_dir+'/a/b')]
+        assert not find(_test_dir, type_='l')
+
+        assert find(_test_dir, workers=4) == find(_test_dir)
+        assert find(_test_dir, depth=1, workers=2) == find(_test_dir, depth=1)
+
+        # Test ifind
+        assert list(ifind(_test_dir)) == find(_test_dir)
+        assert sorted(ifind(_test_dir, sort=False)) == find(_test_dir)
+        assert list(ifind(_test_dir, limit=2, full_path=False)) == [
+            'a', 'a/.hidden']
+        assert list(Dir(_test_dir).ifind(name='b', class_=Dir)) == [
+            Dir(_test_dir+'/a/b')]
+        with self.assertRaises(ValueError):
+            ifind(_test_dir, extn='.py')
+
+    def test_find_listing_cache(self):
+
+        from psyhive.utils.path import p_find
+
+        _test_dir = '{}/listing_test'.format(_TEST_DIR)
+        if os.path.exists(_test_dir):
+            shutil.rmtree(_test_dir)
+        touch('{}/a.txt'.format(_test_dir))
+        _mtime = time.time() - 10
+        os.utime(_test_dir, (_mtime, _mtime))
+
+        # Test listing is reused while mtime unchanged
+        assert find(_test_dir, full_path=False) == ['a.txt']
+        assert _test_dir in p_find._LISTING_CACHE
+        _cached = p_find._read_dir(_test_dir)
+        assert p_find._read_dir(_test_dir) is _cached
+
+        # Test mtime change invalidates listing
+        touch('{}/b.txt'.format(_test_dir))
+        assert find(_test_dir, full_path=False) == ['a.txt', 'b.txt']
+
+        # Test clear by prefix
+        os.utime(_test_dir, (_mtime, _mtime))
+        find(_test_dir)
+        clear_listing_cache(prefix=_TEST_DIR+'/listing')
+        assert _test_dir in p_find._LISTING_CACHE
+        clear_listing_cache(prefix=_test_dir)
+        assert _test_dir not in p_find._LISTING_CACHE
+
+        # Test entry types are only read when a type filter needs them
+        os.utime(_test_dir, (_mtime, _mtime))
+        assert len(find(_test_dir, depth=1)) == 2
+        _entries = p_find._LISTING_CACHE[_test_dir][1]
+        assert not any(_entry._types for _entry in _entries)
+        assert len(find(_test_dir, depth=1, type_='f')) == 2
+        assert [_entry._types for _entry in _entries] == [
+            {'is_file': True}, {'is_file': True}]
+        clear_listing_cache(prefix=_test_dir)
+
+        # Test disable
+        os.environ['PSYHIVE_DISABLE_LISTING_CACHE'] = '1'
+        try:
+            find(_test_dir)
+        finally:
+            del os.environ['PSYHIVE_DISABLE_LISTING_CACHE']
+        assert _test_dir not in p_find._LISTING_CACHE
+
     def test_delete(self):
 
         _tmp = File('{}/test.file'.format(tempfile.gettempdir()))
@@ -221,9 +1007,69 @@ class TestPath(unittest.TestCase):
         _test.set_writable(True)
         _test.delete(force=True)
 
+    def test_transfer_files(self):
+
+        _dir = '{}/transfer'.format(_TEST_DIR)
+        if os.path.exists(_dir):
+            shutil.rmtree(_dir)
+        _srcs = ['{}/src/file.{:d}.txt'.format(_dir, _idx)
+                 for _idx in range(20)]
+        for _src in _srcs:
+            File(_src).write_text(_src)
+        _pairs = [(_src, _src.replace('/src/', '/copy/')) for _src in _srcs]
+
+        # Test resume from manifest
+        _manifest = '{}/manifest'.format(_dir)
+        with open(_manifest, 'w') as _file:
+            _file.write('["{}", "{}"]\n'.format(*_pairs[0]))
+        _done = []
+        _result = transfer_files(
+            _pairs, verify='checksum', workers=4, manifest=_manifest,
+            callback=lambda _src, _trg, _err: _done.append(_src))
+        assert sorted(_done) == sorted(_srcs[1:])
+        assert sorted(_result) == sorted(_pairs[1:])
+        assert not os.path.exists(_pairs[0][1])
+        assert File(_pairs[1][1]).read() == _srcs[1]
+        assert not os.path.exists(_manifest)
+
+        # Test move
+        _moves = [(_src, _src.replace('/src/', '/move/')) for _src in _srcs]
+        transfer_files(_moves, mode='move')
+        assert not os.path.exists(_srcs[0])
+        assert File(_moves[0][1]).read() == _srcs[0]
+
+        # Test failure
+        with self.assertRaises(TransferError) as _context:
+            transfer_files(_pairs[:2], retries=0)
+        assert len(_context.exception.failed) == 2
+
 
 class TestDir(unittest.TestCase):
 
+    def test_copy_to(self):
+
+        _dir = Dir('{}/dir_copy'.format(_TEST_DIR))
+        _dir.delete(force=True)
+        touch('{}/src/a/b/test.txt'.format(_dir.path))
+        os.makedirs('{}/src/empty'.format(_dir.path))
+        _mtime = time.time() - 1000
+        os.utime('{}/src/a/b/test.txt'.format(_dir.path), (_mtime, _mtime))
+        os.symlink('{}/src'.format(_dir.path),
+                   '{}/src/a/loop'.format(_dir.path))
+        os.symlink('{}/src/empty'.format(_dir.path),
+                   '{}/src/a/linked'.format(_dir.path))
+        os.utime('{}/src/a'.format(_dir.path), (_mtime, _mtime))
+        Dir('{}/src'.format(_dir.path)).copy_to(
+            '{}/trg'.format(_dir.path), force=True, verify='size')
+        assert os.path.exists('{}/trg/a/b/test.txt'.format(_dir.path))
+        assert os.path.isdir('{}/trg/empty'.format(_dir.path))
+        assert os.path.isdir('{}/trg/a/linked'.format(_dir.path))
+        assert not os.path.exists('{}/trg/a/loop'.format(_dir.path))
+        assert int(os.path.getmtime(
+            '{}/trg/a/b/test.txt'.format(_dir.path))) == int(_mtime)
+        assert int(os.path.getmtime(
+            '{}/trg/a'.format(_dir.path))) == int(_mtime)
+
     def test_move_to(self):
 
         _file_a = File(abs_path(
@@ -247,12 +1093,80 @@ class TestSeq(unittest.TestCase):
         _file = 'P:/dev0000_animation_persp_v004.1019.jpg'
         assert _seq.contains(_file)
 
+    def test_find_seqs(self):
+
+        _dir = '{}/find_seqs'.format(_TEST_DIR)
+        if os.path.exists(_dir):
+            shutil.rmtree(_dir)
+        for _frame in [1, 2, 3, 10000]:
+            touch('{}/a/blah.{:04d}.jpg'.format(_dir, _frame))
+        touch('{}/a/b/test.0010.exr'.format(_dir))
+        touch('{}/a/b/test.00010.exr'.format(_dir))
+        touch('{}/a/b/test.txt'.format(_dir))
+
+        _seqs = find_seqs(_dir)
+        assert [_seq.path for _seq in _seqs] == [
+            '{}/a/b/test.%04d.exr'.format(_dir),
+            '{}/a/blah.%04d.jpg'.format(_dir)]
+        assert _seqs[0].get_frames() == [10]
+        assert _seqs[1].get_frames() == [1, 2, 3, 10000]
+        assert [_seq.path for _seq in find_seqs(
+            _dir, filter_='blah', workers=2)] == [_seqs[1].path]
+
+        _seqs, _others = group_frames(
+            ['/tmp/a.0001.jpg', '/tmp/a.0002.jpg', '/tmp/a.jpg'])
+        assert [_seq.path for _seq in _seqs] == ['/tmp/a.%04d.jpg']
+        assert _others == ['/tmp/a.jpg']
+
 
 class TestUtils(unittest.TestCase):
 
     def test_apply_filter(self):
 
         assert apply_filter(['a', 'b'], None) == ['a', 'b']
+        assert apply_filter(['a', 'b'], 'a', negate=True) == ['b']
+
+    def test_compile_filter(self):
+
+        _filter = compile_filter('"Test maya" +maya -blah')
+        assert _filter is compile_filter('"Test maya" +maya -blah')
+        assert _filter.match('TEST MAYA')
+        assert not _filter.match('test maya blah blah')
+        assert not _filter.match('test')
+        assert not _filter.match('maya test')
+        assert not compile_filter('Test', case_sensitive=True).match('test')
+        assert passes_filter('test maya', _filter)
+
+        _items = ['Apple', 'banana', 'apple pie']
+        assert filter_many(_items, ['apple', '-pie', 'Apple']) == [
+            ['Apple', 'apple pie'], ['Apple', 'banana'],
+            ['Apple', 'apple pie']]
+        assert filter_many(_items, ['Apple'], case_sensitive=True) == [
+            ['Apple']]
+
+    def test_frame_set(self):
+
+        _frames = FrameSet([5, 1, 2, 3, 7, 8, 3])
+        assert _frames == [1, 2, 3, 5, 7, 8]
+        assert _frames.runs == [(1, 3), (5, 5), (7, 8)]
+        assert len(_frames) == 6
+        assert _frames[3] == 5
+        assert _frames[-1] == 8
+        assert 7 in _frames
+        assert 4 not in _frames
+        assert 2.0 in _frames
+        assert 1.5 not in FrameSet([1, 2])
+        assert 'a' not in _frames
+        assert float('inf') not in _frames
+        assert (_frames.start, _frames.end) == (1, 8)
+        assert _frames.get_missing() == [4, 6]
+        assert _frames.has_gaps()
+        assert not FrameSet(range(1, 101)).has_gaps()
+        assert _frames | [4, 6] == FrameSet(range(1, 9))
+        assert _frames & range(3, 8) == [3, 5, 7]
+        assert ints_to_str(_frames) == '1-3,5,7-8'
+        assert ints_to_str(FrameSet([1, 3, 5])) == '1-5x2'
+        assert ints_to_str(FrameSet()) == ''
 
     def test_get_time_t(self):
 
@@ -268,6 +1182,42 @@ class TestUtils(unittest.TestCase):
         obj_write(obj=_obj, file_=_path, verbose=1)
         assert obj_read(_path) == 'blah'
 
+        # Test compression
+        _obj = {'a': range(1000)}
+        obj_write(obj=_obj, file_=_path, compress='zlib')
+        assert obj_read(_path) == _obj
+        assert os.listdir(os.path.dirname(_path)) == ['test.txt']
+
+        # Test truncated file
+        with open(_path, 'rb') as _file:
+            _data = _file.read()
+        with open(_path, 'wb') as _file:
+            _file.write(_data[:-10])
+        with self.assertRaises(ReadError):
+            obj_read(_path)
+
+        # Test legacy format
+        with open(_path, 'w') as _file:
+            cPickle.dump(_obj, _file)
+        assert obj_read(_path) == _obj
+
+        # Test chunked
+        _obj = [{'a': _idx} for _idx in range(100)]
+        obj_write(obj=_obj, file_=_path, chunked=True, compress='zlib')
+        assert obj_read(_path) == _obj
+        _lazy = obj_read(_path, lazy=True)
+        assert isinstance(_lazy, cache.LazyList)
+        assert len(_lazy) == 100
+        assert _lazy[-1] == {'a': 99}
+        assert _lazy[1:3] == _obj[1:3]
+        assert cPickle.loads(cPickle.dumps(_lazy)) == _obj
+        _obj = {'a': range(10), 'b': 'test'}
+        obj_write(obj=_obj, file_=_path, chunked=True)
+        _lazy = obj_read(_path, lazy=True)
+        assert sorted(_lazy.keys()) == ['a', 'b']
+        assert _lazy['b'] == 'test'
+        assert _lazy.load() == _obj
+
     def test_passes_filter(self):
 
         assert passes_filter('blah', '-ag', verbose=1)
@@ -294,6 +1244,20 @@ class TestUtils(unittest.TestCase):
         # Test quotes
         assert passes_filter('this is text', '"This is"')
 
+    def test_str_to_ints(self):
+
+        assert str_to_ints('1-3,5') == [1, 2, 3, 5]
+        _rng = str_to_ints('1-100000,200000-200010x5', lazy=True)
+        assert len(_rng) == 100003
+        assert 200005 in _rng
+        assert 100001 not in _rng
+        assert (_rng.min, _rng.max) == (1, 200010)
+        assert _rng[-3:] == [200000, 200005, 200010]
+        _chunks = _rng.chunks(50000)
+        assert [len(_chunk) for _chunk in _chunks] == [50000, 50000, 3]
+        assert _chunks[1][0] == 50001
+        assert list(str_to_ints('1-5x2', lazy=True)) == [1, 3, 5]
+
     def test_to_nice(self):
 
         assert to_nice('_get_flex_opts') == 'Get flex opts'
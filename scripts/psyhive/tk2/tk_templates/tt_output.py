@@ -8,8 +8,8 @@ from transgen import helper
 
 from psyhive import pipe
 from psyhive.utils import (
-    File, abs_path, lprint, apply_filter, Seq, seq_from_frame,
-    get_single, Movie)
+    File, abs_path, lprint, apply_filter, Seq, group_frames, get_single,
+    Movie)
 
 
 from .tt_base import TTDirBase, TTBase
@@ -335,60 +335,23 @@ class TTOutput(TTDirBase):
         _files = self.find(type_='f', depth=3)
         lprint(' - FOUND {:d} FILES'.format(len(_files)), verbose=verbose)
 
-        # Map files to outputs
-        _outputs = []
-        _seqs = {}
-        for _file in _files:
-
-            # Ignore files already matched in seq
-            _already_matched = False
-            for _seq in _seqs:
-                if _seq.contains(_file):
-                    _already_matched = True
-                    _frame = _seq.get_frame(_file)
-                    _seqs[_seq].add(_frame)
-                    lprint(' - EXISTING SEQ', _file, verbose=verbose > 2)
-                    break
-            if _already_matched:
-                continue
+        # Group frames into seqs - the template is only applied once
+        # for each seq path
+        _outputs, _files = group_frames(
+            _files, class_=TTOutputFileSeq, verbose=verbose)
 
-            _output = None
+        # Match remaining files
+        for _file in _files:
             lprint(' - TESTING', _file, verbose=verbose > 1)
-
-            # Match seq
-            _seq = seq_from_frame(_file, catch=True)
-            if _seq:
-                try:
-                    _output = TTOutputFileSeq(_seq.path)
-                except ValueError:
-                    lprint('   - NOT TTOutputFileSeq', _file,
-                           verbose=verbose > 1)
-                else:
-                    _frame = _output.get_frame(_file)
-                    _seqs[_output] = set([_frame])
-            else:
-                lprint('   - NOT OUTPUT FILE SEQ', _file,
-                       verbose=verbose > 1)
-
-            # Match file
-            if not _output:
-                try:
-                    _output = TTOutputFile(_file)
-                except ValueError:
-                    lprint('   - NOT OUTPUT FILE', _file,
-                           verbose=verbose > 1)
-
-            if not _output:
+            try:
+                _output = TTOutputFile(_file)
+            except ValueError:
+                lprint('   - NOT OUTPUT FILE', _file, verbose=verbose > 1)
                 continue
-
             lprint(' - ADDED OUTPUT', _output, verbose=verbose)
             _outputs.append(_output)
 
-        # Apply frames cache
-        for _seq, _frames in _seqs.items():
-            _seq.set_frames(sorted(_frames))
-
-        return _outputs
+        return sorted(_outputs, key=operator.attrgetter('path'))
 
 
 class _TTOutputFileBase(TTBase):
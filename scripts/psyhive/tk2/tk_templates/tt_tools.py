@@ -1,5 +1,9 @@
 """Tools for managing tank template representations."""
 
+import functools
+
+from multiprocessing.pool import ThreadPool
+
 from psyhive import pipe, host
 from psyhive.utils import find, get_single, passes_filter, lprint
 
@@ -57,12 +61,14 @@ def find_asset(filter_=None, asset=None, catch=False, mode='sg'):
     return get_single(_assets, catch=catch, verbose=1)
 
 
-def find_assets(filter_=None, mode='disk', verbose=0):
+def find_assets(filter_=None, mode='disk', workers=None, verbose=0):
     """Read asset roots.
 
     Args:
         filter_ (str): filter by file path
         mode (str): where to search (disk/sg)
+        workers (int): list asset dirs in parallel using this number of
+            threads (disk mode only)
         verbose (int): print process data
 
     Returns:
@@ -71,7 +77,8 @@ def find_assets(filter_=None, mode='disk', verbose=0):
     if mode == 'disk':
         _root = pipe.cur_project().path+'/assets'
         _assets = []
-        for _dir in find(_root, depth=3, type_='d', filter_=filter_):
+        for _dir in find(_root, depth=3, type_='d', filter_=filter_,
+                         workers=workers):
             try:
                 _asset = TTAsset(_dir)
             except ValueError:
@@ -135,7 +142,7 @@ def find_shot(name, catch=False, mode='disk'):
 
 
 def find_shots(class_=None, filter_=None, sequence=None, mode='disk',
-               verbose=0):
+               workers=None, verbose=0):
     """Find shots in the current job.
 
     Args:
@@ -143,6 +150,8 @@ def find_shots(class_=None, filter_=None, sequence=None, mode='disk',
         filter_ (str): filter by shot name
         sequence (str): filter by sequence name
         mode (str): where to search for shot (disk/sg)
+        workers (int): list sequence dirs in parallel using this number
+            of threads (disk mode only)
         verbose (int): print process data
 
     Returns:
@@ -152,6 +161,10 @@ def find_shots(class_=None, filter_=None, sequence=None, mode='disk',
         _seqs = find_sequences()
         if sequence:
             _seqs = [_seq for _seq in _seqs if _seq.name == sequence]
+        if workers:
+            return _find_shots_parallel(
+                seqs=_seqs, class_=class_, filter_=filter_,
+                workers=workers)
         return sum([
             _seq.find_shots(class_=class_, filter_=filter_)
             for _seq in _seqs], [])
@@ -184,6 +197,33 @@ def find_shots(class_=None, filter_=None, sequence=None, mode='disk',
         raise ValueError(mode)
 
 
+def _find_shots_parallel(seqs, class_, filter_, workers):
+    """Find shots in the given sequences, listing them in parallel.
+
+    Args:
+        seqs (TTSequenceRoot list): sequences to search
+        class_ (class): override shot root class
+        filter_ (str): filter by shot name
+        workers (int): number of threads to list sequences with
+
+    Returns:
+        (TTRoot): list of shots
+    """
+    if not seqs:
+        return []
+    _find_seq_shots = functools.partial(
+        find, depth=1, type_='d', class_=class_ or TTShot)
+    _pool = ThreadPool(min(workers, len(seqs)))
+    try:
+        _seqs_shots = _pool.map(
+            _find_seq_shots, [_seq.path for _seq in seqs])
+    finally:
+        _pool.close()
+        _pool.join()
+    return [_shot for _shots in _seqs_shots for _shot in _shots
+            if not filter_ or passes_filter(_shot.name, filter_)]
+
+
 def get_asset(path):
     """Get an asset object from the given path.
 
@@ -1,5 +1,6 @@
 """Tools for managing ingestion of vendor image sequences."""
 
+import os
 import time
 
 import OpenImageIO as oiio
@@ -30,6 +31,20 @@ class VendorSeq(Seq, Ingestible):
         self.cache_fmt = build_cache_fmt(
             self.path.replace('%04d.', ''), level='project')
 
+    def get_copy_manifest(self, out):
+        """Get path to manifest used to copy frames to the given output.
+
+        This only exists while a copy is in progress (or if a copy
+        was interrupted).
+
+        Args:
+            out (TTOutputFileSeq): output file sequence
+
+        Returns:
+            (str): path to manifest
+        """
+        return '{}/.{}.manifest'.format(out.dir, out.basename)
+
     def has_sg_version(self):
         """Test if there is a shotgun version for this seq.
 
@@ -88,7 +103,7 @@ class VendorSeq(Seq, Ingestible):
         if _out.cache_read(INGESTED_TOKEN):
             return 'Already ingested', False
 
-        if not _out.exists():
+        if not _out.exists() or os.path.exists(self.get_copy_manifest(_out)):
             return 'Ready to ingest', True
 
         # Check current source matches
@@ -125,7 +140,8 @@ class VendorSeq(Seq, Ingestible):
         print ' - OUT', _out.path
 
         # Create images on psy side
-        if not _out.exists():
+        _manifest = self.get_copy_manifest(_out)
+        if not _out.exists() or os.path.exists(_manifest):
 
             # Check asset/shot + step exists
             _root = tk2.TTRoot(_out.path)
@@ -136,7 +152,7 @@ class VendorSeq(Seq, Ingestible):
             print ' - STEP EXISTS', _step.path
 
             # Copy images
-            self.copy_to(_out)
+            self.copy_to(_out, verify='size', manifest=_manifest)
             _out.cache_write('vendor_source', self.path)
             print ' - COPIED IMAGES'
 
@@ -8,21 +8,25 @@ from .cfg import get_cfg, set_cfg
 from .dev_ import dev_mode, set_dev_mode, revert_dev_mode
 from .email_ import send_email
 from .heart import check_heart, HEART
-from .filter_ import passes_filter, apply_filter
-from .ma_file import MaFile
+from .filter_ import (
+    passes_filter, apply_filter, compile_filter, filter_many, Filter)
+from .ma_file import MaFile, scan_many
+from .mb_file import MbFile
 from .misc import (
     lprint, system, dprint, wrap_fn, chain_fns, to_nice, get_single,
     get_plural, last, str_to_seed, get_ord, copy_text, bytes_to_str,
     to_camel, val_map, get_time_t, clamp, read_url, safe_zip, is_pascal,
     nice_age, get_time_f, to_pascal, strftime)
 from .path import (
-    File, Path, Dir, abs_path, read_file, find, write_file, replace_file,
-    search_files_for_text, test_path, touch, restore_cwd, rel_path, FileError,
-    diff, write_yaml, read_yaml, nice_size, get_copy_path_fn, get_owner,
-    launch_browser, get_path)
+    File, Path, Dir, abs_path, read_file, find, ifind, write_file,
+    replace_file, search_files_for_text, test_path, touch, restore_cwd,
+    rel_path, FileError, diff, write_yaml, read_yaml, nice_size,
+    get_copy_path_fn, get_owner, launch_browser, get_path,
+    clear_listing_cache, transfer_files, TransferError)
 from .py_file import (
     PyFile, MissingDocs, text_to_py_file, PyBase, PyDef, PyClass)
 from .range_ import (
     ints_to_str, str_to_ints, ValueRange, fr_range, fr_enumerate,
-    str_to_frames, str_to_range, first_last, first)
-from .seq import Seq, Collection, seq_from_frame, Movie, find_seqs
+    str_to_frames, str_to_range, first_last, first, FrameSet, MultiRange)
+from .seq import (
+    Seq, Collection, seq_from_frame, Movie, find_seqs, group_frames)
@@ -0,0 +1,12 @@
+"""Tools for managing the caching of data."""
+
+from .c_cacheable import Cacheable, build_cache_fmt, get_cache_backend
+from .c_chunked import LazyDict, LazyList
+from .c_db import CacheDb, get_db, migrate_to_db
+from .c_file import obj_read, obj_write, CacheMissing, ReadError, WriteError
+from .c_gc import gc, GcReport
+from .c_stats import CacheStats, get_stats, reset_stats
+from .c_storer import (
+    get_result_storer, get_result_to_file_storer, store_result,
+    store_result_on_obj, store_result_content_dependent,
+    store_result_to_file)
@@ -0,0 +1,199 @@
+"""Tools for managing cacheable objects."""
+
+import shutil
+import tempfile
+import time
+
+from ..misc import lprint
+
+from .c_file import obj_read, obj_write, cache_exists
+
+_BACKENDS = None
+
+
+class Cacheable(object):
+    """Base class for any cacheable object."""
+    cache_fmt = None
+
+    def cache_read(self, tag, verbose=0):
+        """Read cached data from the given tag.
+
+        Args:
+            tag (str): data tag to read
+            verbose (int): print process data
+
+        Returns:
+            (any): cached data
+        """
+        from psyhive.utils import read_yaml, File
+        from .c_db import is_db_path
+
+        _path = self.cache_fmt.format(tag)
+        lprint('READ CACHE FILE', _path, verbose=verbose)
+        if is_db_path(_path):
+            try:
+                return obj_read(file_=_path)
+            except OSError:
+                return None
+
+        _file = File(_path)
+        if _file.extn == 'yml':
+            try:
+                return read_yaml(_file.path)
+            except OSError:
+                return None
+        else:
+            try:
+                return obj_read(file_=_file.path)
+            except OSError:
+                return None
+
+    def cache_write(self, tag, data, bkp=False, verbose=0):
+        """Write data to the given cache.
+
+        Args:
+            tag (str): tag to store data to
+            data (any): data to store
+            bkp (bool): save timestamped backup file on save (if data changed)
+            verbose (int): print process data
+
+        Returns:
+            (str): path to cache file
+        """
+        from psyhive.utils import File, write_yaml
+        from .c_db import is_db_path
+
+        _path = self.cache_fmt.format(tag)
+        lprint('WRITE CACHE FILE', _path, verbose=verbose)
+        if is_db_path(_path):
+            if bkp and cache_exists(_path):
+                _data = self.cache_read(tag)
+                if _data != data:
+                    _dir, _base = _path.rsplit('/', 1)
+                    _bkp = '{}/_bkp_{}_{}'.format(
+                        _dir, _base, time.strftime('%y%m%d_%H%M%S'))
+                    lprint(' - BKP', _bkp, verbose=verbose)
+                    obj_write(file_=_bkp, obj=_data)
+            obj_write(file_=_path, obj=data)
+            return _path
+
+        _file = File(_path)
+        if bkp and _file.exists():
+            _data = self.cache_read(tag)
+            if _data == data:
+                lprint(' - DATA UNCHANGED, NO BKP REQUIRED')
+            else:
+                lprint(' - STORE BKP', _data)
+
+                _bkp = '{}/_bkp_{}_{}.{}'.format(
+                    _file.dir, _file.basename,
+                    time.strftime('%y%m%d_%H%M%S'), _file.extn)
+                lprint(' - BKP', _bkp)
+                shutil.copy(_file.path, _bkp)
+
+        if _file.extn == 'yml':
+            write_yaml(file_=_file, data=data)
+        else:
+            obj_write(file_=_file.path, obj=data)
+
+        return _file.path
+
+
+def build_cache_fmt(
+        path, namespace='psyhive', root=None, level='tmp', extn='cache',
+        backend=None):
+    """Build cache format string for the given namespace.
+
+    This maps the path to a location in tmp dir.
+
+    Args:
+        path (str): path of cacheable
+        namespace (str): namespace for cache
+        root (str): force dir for cache (overrides level)
+        level (str): cache level
+            tmp - use temp drive
+            project - cache to project
+        extn (str): cache extension
+        backend (str): force cache backend (file/db) - by default this
+            is read from the namespace's config
+
+    Returns:
+        (str): cache format path
+    """
+    from ..path import Path, abs_path
+    from .c_db import DB_PREFIX
+
+    _path = Path(path)
+    _root = get_cache_root(level=level, root=root)
+    if not root and level == 'project':
+        from psyhive import pipe
+        _proj = pipe.cur_project()
+        if _proj.contains(_path):
+            _path = Path(_proj.rel_path(_path))
+
+    _cache_dir = abs_path('{}/{}/cache'.format(_root, namespace))
+    _fmt = abs_path('{cache_dir}/{dir}/{base}_{{}}.{extn}'.format(
+        cache_dir=_cache_dir, dir=_path.dir.replace(':', ''),
+        base=_path.basename, extn=extn))
+
+    # Yaml caches are always files so they remain human readable
+    _backend = backend or get_cache_backend(namespace)
+    if _backend == 'file' or extn == 'yml':
+        return _fmt
+    elif _backend == 'db':
+        _key_fmt = _fmt[len(_cache_dir)+1:-len(extn)-1]
+        return '{}{}/{}/cache.db|{}'.format(
+            DB_PREFIX, abs_path(_root), namespace, _key_fmt)
+    raise ValueError(_backend)
+
+
+def get_cache_backend(namespace):
+    """Get the cache backend for the given namespace.
+
+    This is read from the backends section of the cache config, eg:
+
+        backends:
+            psyhive: db
+
+    Namespaces not listed use the file backend.
+
+    Args:
+        namespace (str): cache namespace
+
+    Returns:
+        (str): backend name (file/db)
+    """
+    return _read_backends().get(namespace, 'file')
+
+
+def get_cache_root(level='tmp', root=None):
+    """Get root dir for caches at the given level.
+
+    Args:
+        level (str): cache level (tmp/project)
+        root (str): force root dir (overrides level)
+
+    Returns:
+        (str): cache root dir
+    """
+    if root:
+        return root
+    elif level == 'tmp':
+        return tempfile.gettempdir()
+    elif level == 'project':
+        from psyhive import pipe
+        return '{}/production'.format(pipe.cur_project().path)
+    raise ValueError(level)
+
+
+def _read_backends():
+    """Read cache backends config.
+
+    Returns:
+        (dict): namespace/backend data
+    """
+    global _BACKENDS
+    if _BACKENDS is None:
+        from ..cfg import get_cfg
+        _BACKENDS = (get_cfg('cache') or {}).get('backends') or {}
+    return _BACKENDS
@@ -0,0 +1,253 @@
+"""Tools for reading/writing chunked cache containers.
+
+A chunked container stores each item of a list or each value of a dict
+as a separately pickled chunk, after an index of chunk offsets. This
+allows a large cached result to be memory mapped and decoded one item
+at a time, so that a caller which only needs its length or a single
+item doesn't pay for unpickling the whole object.
+
+Layout (after the standard cache header, whose checksum covers the
+index):
+
+    >BI     container type (list/dict), index size
+    index   pickled (keys, chunks) where chunks is a list of
+            (offset, size, checksum) - offsets are from the end of the
+            index
+    chunks  pickled (and optionally compressed) items
+"""
+
+import collections
+import cPickle
+import mmap
+import os
+import struct
+import zlib
+
+from .c_file import (
+    ReadError, _HEADER_FMT, _HEADER_SIZE, _MAGIC, _COMPRESSORS,
+    _compress, _decompress)
+
+CHUNKED_VERSION = 2
+
+_INDEX_FMT = '>BI'
+_INDEX_SIZE = struct.calcsize(_INDEX_FMT)
+_TYPES = [list, dict]
+
+
+class _LazyContainer(object):
+    """Base class for a container which decodes chunks on access."""
+
+    def __init__(self, data, path, keys, chunks, compress, start):
+        """Constructor.
+
+        Args:
+            data (str|mmap): container data
+            path (str): path data was read from (for error messages)
+            keys (list): dict keys (None for list)
+            chunks (tuple list): offset/size/checksum of each chunk
+            compress (str): compression applied to chunks
+            start (int): offset of first chunk in data
+        """
+        self.path = path
+        self._data = data
+        self._keys = keys
+        self._chunks = chunks
+        self._compress = compress
+        self._start = start
+        self._items = {}
+
+    def _read_item(self, idx):
+        """Read the item at the given chunk index.
+
+        Decoded items are stored so each chunk is only decoded once.
+
+        Args:
+            idx (int): chunk index
+
+        Returns:
+            (any): item
+        """
+        if idx not in self._items:
+            _offset, _size, _checksum = self._chunks[idx]
+            _offset += self._start
+            _chunk = self._data[_offset: _offset+_size]
+            if zlib.crc32(_chunk) & 0xffffffff != _checksum:
+                raise ReadError(self.path)
+            try:
+                self._items[idx] = cPickle.loads(
+                    _decompress(_chunk, self._compress))
+            except Exception:
+                raise ReadError(self.path)
+        return self._items[idx]
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def __repr__(self):
+        return '<{}|{:d} items>'.format(type(self).__name__, len(self))
+
+
+class LazyList(_LazyContainer, collections.Sequence):
+    """Read-only list proxy which decodes items on access."""
+
+    def load(self):
+        """Decode all items.
+
+        Returns:
+            (list): items
+        """
+        return [self._read_item(_idx) for _idx in range(len(self))]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._read_item(_idx)
+                    for _idx in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return self._read_item(idx)
+
+    def __reduce__(self):
+        return list, (self.load(), )
+
+
+class LazyDict(_LazyContainer, collections.Mapping):
+    """Read-only dict proxy which decodes values on access."""
+
+    def __init__(self, *args, **kwargs):
+        """Constructor."""
+        super(LazyDict, self).__init__(*args, **kwargs)
+        self._idxs = dict([(_key, _idx)
+                           for _idx, _key in enumerate(self._keys)])
+
+    def load(self):
+        """Decode all values.
+
+        Returns:
+            (dict): data
+        """
+        return dict([(_key, self[_key]) for _key in self._keys])
+
+    def keys(self):
+        """Get keys of this dict (without decoding any values).
+
+        Returns:
+            (list): keys
+        """
+        return list(self._keys)
+
+    def __contains__(self, key):
+        return key in self._idxs
+
+    def __getitem__(self, key):
+        return self._read_item(self._idxs[key])
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __reduce__(self):
+        return dict, (self.load(), )
+
+
+def is_chunkable(obj):
+    """Test whether the given object can be stored in a chunked container.
+
+    Args:
+        obj (any): object to test
+
+    Returns:
+        (bool): whether list or dict
+    """
+    return type(obj) in _TYPES
+
+
+def map_file(path):
+    """Memory map the given file for reading.
+
+    On windows a mapped file can't be replaced, which would block the
+    cache from being rewritten, so the data is read into memory instead.
+
+    Args:
+        path (str): path to map
+
+    Returns:
+        (str|mmap): file data
+    """
+    with open(path, 'rb') as _file:
+        if os.name == 'nt' or not os.fstat(_file.fileno()).st_size:
+            return _file.read()
+        return mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_chunked(data, path, lazy=False):
+    """Read a chunked container.
+
+    Args:
+        data (str|mmap): container data (including header)
+        path (str): path data was read from (for error messages)
+        lazy (bool): return a lazy proxy rather than decoding all items
+
+    Returns:
+        (list|dict|LazyList|LazyDict): container contents
+    """
+    try:
+        _, _, _compress, _checksum = struct.unpack(
+            _HEADER_FMT, data[:_HEADER_SIZE])
+        _type, _index_size = struct.unpack(
+            _INDEX_FMT, data[_HEADER_SIZE: _HEADER_SIZE+_INDEX_SIZE])
+    except struct.error:
+        raise ReadError(path)
+    _start = _HEADER_SIZE + _INDEX_SIZE + _index_size
+    _index = data[_HEADER_SIZE: _start]
+    if zlib.crc32(_index) & 0xffffffff != _checksum:
+        raise ReadError(path)
+    try:
+        _keys, _chunks = cPickle.loads(_index[_INDEX_SIZE:])
+    except Exception:
+        raise ReadError(path)
+
+    _class = {list: LazyList, dict: LazyDict}[_TYPES[_type]]
+    _container = _class(
+        data=data, path=path, keys=_keys, chunks=_chunks,
+        compress=_COMPRESSORS[_compress], start=_start)
+    if lazy:
+        return _container
+    return _container.load()
+
+
+def write_chunked(obj, compress=None):
+    """Serialise a list or dict as a chunked container.
+
+    Args:
+        obj (list|dict): object to serialise
+        compress (str): compress chunks (zlib/lz4)
+
+    Returns:
+        (str): container data
+    """
+    assert is_chunkable(obj)
+    if isinstance(obj, dict):
+        _keys = obj.keys()
+        _items = obj.values()
+    else:
+        _keys = None
+        _items = obj
+
+    _chunks = []
+    _index = []
+    _offset = 0
+    for _item in _items:
+        _chunk = _compress(
+            cPickle.dumps(_item, cPickle.HIGHEST_PROTOCOL), compress)
+        _index.append((_offset, len(_chunk), zlib.crc32(_chunk) & 0xffffffff))
+        _chunks.append(_chunk)
+        _offset += len(_chunk)
+
+    _index = cPickle.dumps((_keys, _index), cPickle.HIGHEST_PROTOCOL)
+    _index = struct.pack(
+        _INDEX_FMT, _TYPES.index(type(obj)), len(_index)) + _index
+    _header = struct.pack(
+        _HEADER_FMT, _MAGIC, CHUNKED_VERSION, _COMPRESSORS.index(compress),
+        zlib.crc32(_index) & 0xffffffff)
+    return ''.join([_header, _index] + _chunks)
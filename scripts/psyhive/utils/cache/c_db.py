@@ -0,0 +1,297 @@
+"""Tools for storing cached data in an sqlite database.
+
+Rather than writing each cached tag of each path to its own file, a
+namespace can store all of its entries in a single database. Database
+entries are referenced using a cache path in the format:
+
+    sqlite:<path to db file>|<key>
+
+These paths are generated by build_cache_fmt for namespaces using the db
+backend and are understood by obj_read/obj_write, so they can be used
+anywhere a cache file path is used.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from ..misc import lprint
+
+from .c_file import CacheMissing
+
+DB_PREFIX = 'sqlite:'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    digest TEXT
+)'''
+
+_DBS = {}
+_DBS_LOCK = threading.Lock()
+
+
+class CacheDb(object):
+    """Represents an sqlite database of cache entries.
+
+    Each entry is keyed by a normalised path + tag string, and stores the
+    serialised data along with its size, mtime and (optionally) a digest
+    of the contents of the path the data depends on. Connections are
+    held per thread, and the database uses WAL journaling so that reads
+    are not blocked by writes.
+    """
+
+    def __init__(self, file_):
+        """Constructor.
+
+        Args:
+            file_ (str): path to database file
+        """
+        self.file_ = file_
+        self._local = threading.local()
+
+    def delete(self, key):
+        """Delete the given entry.
+
+        Args:
+            key (str): entry key
+        """
+        _conn = self._get_conn()
+        with _conn:
+            _conn.execute('DELETE FROM entries WHERE key = ?', (key, ))
+
+    def find_keys(self, filter_=None):
+        """Find entry keys in this database.
+
+        Args:
+            filter_ (str): filter keys
+
+        Returns:
+            (str list): keys
+        """
+        from ..filter_ import passes_filter
+        _keys = [_row[0] for _row in self._get_conn().execute(
+            'SELECT key FROM entries ORDER BY key')]
+        if filter_:
+            _keys = [_key for _key in _keys if passes_filter(_key, filter_)]
+        return _keys
+
+    def get_mtime(self, key):
+        """Get mtime of the given entry.
+
+        Args:
+            key (str): entry key
+
+        Returns:
+            (float|None): mtime (or None if the entry is missing)
+        """
+        _row = self._get_conn().execute(
+            'SELECT mtime FROM entries WHERE key = ?', (key, )).fetchone()
+        return _row[0] if _row else None
+
+    def read(self, key):
+        """Read data of the given entry.
+
+        Args:
+            key (str): entry key
+
+        Returns:
+            (str): serialised data
+
+        Raises:
+            (CacheMissing): if the entry is missing
+        """
+        _row = self._get_conn().execute(
+            'SELECT data FROM entries WHERE key = ?', (key, )).fetchone()
+        if not _row:
+            raise CacheMissing('Missing entry {} in {}'.format(
+                key, self.file_))
+        return str(_row[0])
+
+    def read_entries(self):
+        """Read information about all entries in this database.
+
+        Returns:
+            (tuple list): key/size/mtime/digest of each entry
+        """
+        return self._get_conn().execute(
+            'SELECT key, size, mtime, digest FROM entries '
+            'ORDER BY key').fetchall()
+
+    def touch(self, key):
+        """Update mtime of the given entry.
+
+        Args:
+            key (str): entry key
+        """
+        _conn = self._get_conn()
+        with _conn:
+            _conn.execute('UPDATE entries SET mtime = ? WHERE key = ?',
+                          (time.time(), key))
+
+    def write(self, key, data, mtime=None, digest=None):
+        """Write an entry to this database.
+
+        Args:
+            key (str): entry key
+            data (str): serialised data
+            mtime (float): override entry mtime
+            digest (str): digest of depend path contents
+        """
+        _conn = self._get_conn()
+        with _conn:
+            _conn.execute(
+                'INSERT OR REPLACE INTO entries '
+                '(key, data, size, mtime, digest) VALUES (?, ?, ?, ?, ?)',
+                (key, sqlite3.Binary(data), len(data),
+                 mtime or time.time(), digest))
+
+    def _get_conn(self):
+        """Get connection to this database for the current thread.
+
+        Returns:
+            (Connection): database connection
+        """
+        _conn = getattr(self._local, 'conn', None)
+        if not _conn:
+            from ..path import test_path
+            test_path(os.path.dirname(self.file_))
+            _conn = sqlite3.connect(self.file_, timeout=30)
+            _conn.execute('PRAGMA journal_mode=WAL')
+            _conn.execute('PRAGMA synchronous=NORMAL')
+            with _conn:
+                _conn.execute(_SCHEMA)
+            self._local.conn = _conn
+        return _conn
+
+    def __repr__(self):
+        return '<{}|{}>'.format(type(self).__name__, self.file_)
+
+
+def get_db(file_):
+    """Get the database object for the given database file.
+
+    Database objects are shared within the process.
+
+    Args:
+        file_ (str): path to database file
+
+    Returns:
+        (CacheDb): database
+    """
+    from ..path import abs_path
+    _file = abs_path(file_)
+    with _DBS_LOCK:
+        if _file not in _DBS:
+            _DBS[_file] = CacheDb(_file)
+        return _DBS[_file]
+
+
+def is_db_path(path):
+    """Test if the given cache path references a database entry.
+
+    Args:
+        path (str): cache path
+
+    Returns:
+        (bool): whether database path
+    """
+    return path.startswith(DB_PREFIX)
+
+
+def read_db_path(path):
+    """Read the database and entry key referenced by a cache path.
+
+    Args:
+        path (str): cache path (eg. sqlite:/tmp/cache.db|a/b/c_tag)
+
+    Returns:
+        (tuple): database/key
+    """
+    assert is_db_path(path)
+    _file, _key = path[len(DB_PREFIX):].split('|', 1)
+    return get_db(_file), _key
+
+
+def migrate_to_db(
+        namespace='psyhive', level='project', root=None, delete=False,
+        verbose=1):
+    """Migrate a namespace's cache files to its database.
+
+    Each cache file is added to the database using its path relative to
+    the cache dir (without extension) as its key - this matches the keys
+    which build_cache_fmt generates for the db backend. Yaml caches are
+    ignored as they are always stored as files.
+
+    Backup files are added using the key that Cacheable.cache_write uses
+    for db backups, and any depend digest stored with a cache (ie. by a
+    hash/sample depend mode storer) is added to its database entry.
+
+    Args:
+        namespace (str): cache namespace
+        level (str): cache level (tmp/project)
+        root (str): force root dir for cache (overrides level)
+        delete (bool): delete cache files once they have been migrated
+        verbose (int): print process data
+
+    Returns:
+        (int): number of migrated files
+    """
+    from ..path import find, abs_path
+    from .c_cacheable import get_cache_root
+    from .c_file import (
+        obj_read, _serialise, _deserialise, _MAGIC, _DIGEST_MARKER)
+    from .c_gc import _BKP_RX
+
+    _root = get_cache_root(level=level, root=root)
+    _cache_dir = abs_path('{}/{}/cache'.format(_root, namespace))
+    _db = get_db('{}/{}/cache.db'.format(_root, namespace))
+    lprint('MIGRATING', _cache_dir, 'TO', _db.file_, verbose=verbose)
+
+    _count = 0
+    for _file in find(_cache_dir, type_='f'):
+
+        _rel_path = _file[len(_cache_dir)+1:]
+        _key, _extn = os.path.splitext(_rel_path)
+        if _extn == '.yml' or _extn == '.tmp':
+            continue
+
+        # Map backups to db backup keys
+        _dir, _base = os.path.split(_key)
+        _bkp = _BKP_RX.match(_base)
+        if _bkp:
+            _key = '{}/_bkp_{}_{}'.format(
+                _dir, _bkp.group('base'), _bkp.group('time'))
+
+        # Read data, converting legacy files to current format
+        with open(_file, 'rb') as _hook:
+            _data = _hook.read()
+        try:
+            if _data.startswith(_MAGIC):
+                _obj = _deserialise(_data, path=_file)
+            else:
+                _obj = obj_read(_file)
+                _data = _serialise(_obj)
+        except Exception as _exc:  # pylint: disable=broad-except
+            lprint(' - FAILED TO READ', _file, _exc, verbose=verbose)
+            continue
+
+        # Carry depend digest across
+        _digest = None
+        if (
+                isinstance(_obj, tuple) and len(_obj) == 3 and
+                _obj[0] == _DIGEST_MARKER):
+            _digest = _obj[1]
+
+        _db.write(_key, _data, mtime=os.path.getmtime(_file), digest=_digest)
+        lprint(' - MIGRATED', _key, verbose=verbose > 1)
+        _count += 1
+        if delete:
+            os.remove(_file)
+
+    lprint('MIGRATED {:d} FILES'.format(_count), verbose=verbose)
+    return _count
@@ -0,0 +1,306 @@
+"""Tools for reading/writing cached objects to disk."""
+
+import cPickle
+import os
+import random
+import struct
+import zlib
+
+import six
+
+from ..misc import lprint
+
+# Cache file header: magic, format version, compression, payload checksum
+_HEADER_FMT = '>4sBBI'
+_HEADER_SIZE = struct.calcsize(_HEADER_FMT)
+_MAGIC = 'PSYC'
+_FORMAT_VERSION = 1
+_COMPRESSORS = [None, 'zlib', 'lz4']
+
+_DIGEST_MARKER = '__psyhive_depend_digest__'
+
+
+class CacheMissing(OSError):
+    """Raise when a cache doesn't exist."""
+
+
+class ReadError(RuntimeError):
+    """Raised on failed to read cached object."""
+
+
+class WriteError(RuntimeError):
+    """Raised on fail to write cached object."""
+
+
+def cache_exists(path):
+    """Test if the given cache file/database entry exists.
+
+    Args:
+        path (str): cache path
+
+    Returns:
+        (bool): whether cache exists
+    """
+    from .c_db import is_db_path, read_db_path
+    if is_db_path(path):
+        _db, _key = read_db_path(path)
+        return _db.get_mtime(_key) is not None
+    return os.path.exists(path)
+
+
+def get_cache_mtime(path):
+    """Get mtime of the given cache file/database entry.
+
+    Args:
+        path (str): cache path
+
+    Returns:
+        (float): mtime
+    """
+    from .c_db import is_db_path, read_db_path
+    if is_db_path(path):
+        _db, _key = read_db_path(path)
+        _mtime = _db.get_mtime(_key)
+        if _mtime is None:
+            raise CacheMissing(path)
+        return _mtime
+    return os.path.getmtime(path)
+
+
+def touch_cache(path):
+    """Update mtime of the given cache file/database entry.
+
+    Args:
+        path (str): cache path
+    """
+    from .c_db import is_db_path, read_db_path
+    if is_db_path(path):
+        _db, _key = read_db_path(path)
+        _db.touch(_key)
+    else:
+        os.utime(path, None)
+
+
+def obj_read(file_, lazy=False, verbose=0):
+    """Read a python object from file.
+
+    Files written with a format header are checked against their checksum
+    and decompressed. Headerless files are read as legacy text pickles.
+
+    If a database path is passed (see c_db module) the object is read
+    from the database entry.
+
+    Args:
+        file_ (str): path to read
+        lazy (bool): if the file is a chunked container (see c_chunked
+            module), memory map it and return a proxy which decodes its
+            items on access
+        verbose (int): print process data
+    """
+    from ..path import abs_path
+    from .c_chunked import map_file
+    from .c_db import is_db_path, read_db_path
+
+    assert isinstance(file_, six.string_types)
+
+    # Read from database
+    if is_db_path(file_):
+        _db, _key = read_db_path(file_)
+        return _deserialise(
+            _db.read(_key), path=file_, lazy=lazy, verbose=verbose)
+
+    _path = abs_path(file_)
+    if not os.path.exists(_path):
+        raise OSError("Path is missing {}".format(_path))
+
+    if lazy:
+        _data = map_file(_path)
+    else:
+        with open(_path, 'rb') as _file:
+            _data = _file.read()
+
+    # Read legacy format
+    if _data[:len(_MAGIC)] != _MAGIC:
+        lprint('READING LEGACY FORMAT', _path, verbose=verbose)
+        _file = open(_path, "r")
+        try:
+            _obj = cPickle.load(_file)
+        except Exception as _exc:
+            lprint(_exc, verbose=verbose)
+            raise ReadError(_path)
+        finally:
+            _file.close()
+        return _obj
+
+    return _deserialise(_data, path=_path, lazy=lazy, verbose=verbose)
+
+
+def obj_write(
+        obj, file_, create_dir=True, compress=None, chunked=False,
+        verbose=0):
+    """Write a python object to file.
+
+    The object is pickled with the highest protocol and written with a
+    small header containing the format version and a checksum. The data
+    is written to a tmp file which is then renamed into place, so
+    readers never see a partially written file.
+
+    If a database path is passed (see c_db module) the object is written
+    to the database entry.
+
+    Args:
+        obj (any): object to write
+        file_ (str): path to write object to
+        create_dir (bool): create the parent dir if it doesn't exist
+        compress (str): compress data (zlib/lz4)
+        chunked (bool): write lists/dicts as chunked containers so that
+            they can be read lazily (see c_chunked module)
+        verbose (int): print process data
+    """
+    from ..path import abs_path, test_path
+    from .c_chunked import is_chunkable, write_chunked
+    from .c_db import is_db_path, read_db_path
+
+    if chunked and is_chunkable(obj):
+        _data = write_chunked(obj, compress=compress)
+    else:
+        _data = _serialise(obj, compress=compress)
+
+    # Write to database
+    if is_db_path(file_):
+        lprint('WRITING TO', file_, verbose=verbose)
+        _db, _key = read_db_path(file_)
+        _digest = None
+        if (
+                isinstance(obj, tuple) and len(obj) == 3 and
+                obj[0] == _DIGEST_MARKER):
+            _digest = obj[1]
+        _db.write(_key, _data, digest=_digest)
+        return file_
+
+    _path = abs_path(file_)
+    lprint('WRITING TO', _path, verbose=verbose)
+
+    if create_dir:
+        test_path(os.path.dirname(_path))
+
+    # Write to tmp file and rename into place
+    _tmp = '{}/.{}.{:d}.{:08x}.tmp'.format(
+        os.path.dirname(_path), os.path.basename(_path), os.getpid(),
+        random.getrandbits(32))
+    try:
+        with open(_tmp, 'wb') as _file:
+            _file.write(_data)
+        if os.name == 'nt' and os.path.exists(_path):
+            os.remove(_path)
+        os.rename(_tmp, _path)
+    except Exception:
+        if os.path.exists(_tmp):
+            os.remove(_tmp)
+        raise
+
+    return _path
+
+
+def _serialise(obj, compress=None):
+    """Serialise an object in the cache format.
+
+    Args:
+        obj (any): object to serialise
+        compress (str): compress data (zlib/lz4)
+
+    Returns:
+        (str): header and payload data
+    """
+    _payload = _compress(
+        cPickle.dumps(obj, cPickle.HIGHEST_PROTOCOL), compress)
+    _header = struct.pack(
+        _HEADER_FMT, _MAGIC, _FORMAT_VERSION, _COMPRESSORS.index(compress),
+        zlib.crc32(_payload) & 0xffffffff)
+    return _header + _payload
+
+
+def _deserialise(data, path, lazy=False, verbose=0):
+    """Read an object from data in the cache format.
+
+    Args:
+        data (str|mmap): header and payload data
+        path (str): path data was read from (for error messages)
+        lazy (bool): return lazy proxy for chunked containers
+        verbose (int): print process data
+
+    Returns:
+        (any): object
+
+    Raises:
+        (ReadError): if the data is invalid
+    """
+    from .c_chunked import CHUNKED_VERSION, read_chunked
+
+    # Read header
+    try:
+        _magic, _version, _compress, _checksum = struct.unpack(
+            _HEADER_FMT, data[:_HEADER_SIZE])
+    except struct.error:
+        raise ReadError(path)
+    if _magic != _MAGIC:
+        raise ReadError(path)
+    if _version == CHUNKED_VERSION and _compress < len(_COMPRESSORS):
+        return read_chunked(data, path=path, lazy=lazy)
+    if _version > _FORMAT_VERSION or _compress >= len(_COMPRESSORS):
+        lprint('UNSUPPORTED FORMAT', _version, _compress, verbose=verbose)
+        raise ReadError(path)
+    _payload = data[_HEADER_SIZE:]
+    if zlib.crc32(_payload) & 0xffffffff != _checksum:
+        lprint('BAD CHECKSUM', path, verbose=verbose)
+        raise ReadError(path)
+
+    # Read payload
+    try:
+        _payload = _decompress(_payload, _COMPRESSORS[_compress])
+        _obj = cPickle.loads(_payload)
+    except Exception as _exc:
+        lprint(_exc, verbose=verbose)
+        raise ReadError(path)
+
+    return _obj
+
+
+def _compress(data, compress):
+    """Compress the given data.
+
+    Args:
+        data (str): data to compress
+        compress (str): compression to apply (zlib/lz4)
+
+    Returns:
+        (str): compressed data
+    """
+    if compress is None:
+        return data
+    elif compress == 'zlib':
+        return zlib.compress(data, 1)
+    elif compress == 'lz4':
+        import lz4.frame
+        return lz4.frame.compress(data)
+    raise ValueError(compress)
+
+
+def _decompress(data, compress):
+    """Decompress the given data.
+
+    Args:
+        data (str): data to decompress
+        compress (str): compression which was applied (zlib/lz4)
+
+    Returns:
+        (str): decompressed data
+    """
+    if compress is None:
+        return data
+    elif compress == 'zlib':
+        return zlib.decompress(data)
+    elif compress == 'lz4':
+        import lz4.frame
+        return lz4.frame.decompress(data)
+    raise ValueError(compress)
@@ -0,0 +1,391 @@
+"""Tools for garbage collecting cache trees.
+
+Caches built using build_cache_fmt are never removed, so this walks a
+namespace's cache dir (and its database, if it has one) and removes
+entries which are no longer needed:
+
+ - missing: the path the cache was built from no longer exists
+ - age: the entry hasn't been written since the max age
+ - bkp: timestamped backups beyond the max number kept for each entry
+ - tmp: tmp files left by interrupted writes
+ - quota: least recently accessed entries beyond the byte quota
+"""
+
+import collections
+import errno
+import os
+import re
+import time
+
+from ..misc import lprint, bytes_to_str
+
+_BKP_RX = re.compile(r'^_bkp_(?P<base>.+)_(?P<time>\d{6}_\d{6})$')
+_FRAME_RX = re.compile(r'^(?P<prefix>.+[._])(?P<frame>\d+)$')
+_TMP_MAX_AGE = 60*60
+
+
+class GcEntry(object):
+    """Represents a cache file or database entry."""
+
+    def __init__(self, key, size, atime, mtime, path=None, db=None):
+        """Constructor.
+
+        Args:
+            key (str): path relative to cache dir (without extension)
+            size (int): size in bytes
+            atime (float): access time
+            mtime (float): modified time
+            path (str): path to cache file (if file entry)
+            db (CacheDb): database containing entry (if db entry)
+        """
+        self.key = key
+        self.size = size
+        self.atime = atime
+        self.mtime = mtime
+        self.path = path
+        self.db = db
+
+        _dir, _base = os.path.split(key)
+        self.dir = _dir
+        _bkp = _BKP_RX.match(_base)
+        self.bkp_of = (
+            '{}/{}'.format(_dir, _bkp.group('base')) if _bkp else None)
+        self.base = _bkp.group('base') if _bkp else _base
+
+    def delete(self):
+        """Delete this entry."""
+        if self.db:
+            self.db.delete(self.key)
+        else:
+            os.remove(self.path)
+
+    def __repr__(self):
+        return '<{}|{}>'.format(type(self).__name__, self.path or self.key)
+
+
+class GcReport(object):
+    """Stores the results of garbage collecting a cache tree."""
+
+    def __init__(self, cache_dir, dry_run):
+        """Constructor.
+
+        Args:
+            cache_dir (str): cache dir which was collected
+            dry_run (bool): whether entries were actually removed
+        """
+        self.cache_dir = cache_dir
+        self.dry_run = dry_run
+        self.entries = []
+        self.removed = collections.OrderedDict()
+
+    def get_freed_bytes(self):
+        """Get number of bytes freed by removed entries.
+
+        Returns:
+            (int): byte count
+        """
+        return sum([_entry.size for _entry in self.removed])
+
+    def get_size(self):
+        """Get size of the cache tree after collection.
+
+        Returns:
+            (int): byte count
+        """
+        return sum([_entry.size for _entry in self.entries
+                    if _entry not in self.removed])
+
+    def summary(self):
+        """Get summary of this report.
+
+        Returns:
+            (str): summary text
+        """
+        _reasons = collections.defaultdict(list)
+        for _entry, _reason in self.removed.items():
+            _reasons[_reason].append(_entry)
+        _lines = ['{} {} ({:d} entries, {})'.format(
+            'GC DRY RUN' if self.dry_run else 'GC', self.cache_dir,
+            len(self.entries),
+            bytes_to_str(sum([_entry.size for _entry in self.entries])))]
+        for _reason in sorted(_reasons):
+            _entries = _reasons[_reason]
+            _lines.append(' - {:<8} {:6d} entries {:>10}'.format(
+                _reason, len(_entries),
+                bytes_to_str(sum([_entry.size for _entry in _entries]))))
+        _lines.append('{} {:d} entries, FREED {}, SIZE {}'.format(
+            'WOULD REMOVE' if self.dry_run else 'REMOVED',
+            len(self.removed), bytes_to_str(self.get_freed_bytes()),
+            bytes_to_str(self.get_size())))
+        return '\n'.join(_lines)
+
+
+def gc(namespace='psyhive', level='project', root=None, max_age=None,
+       max_bkps=None, quota=None, check_sources=True, dry_run=False,
+       verbose=1):
+    """Garbage collect a namespace's cache tree.
+
+    Args:
+        namespace (str): cache namespace
+        level (str): cache level (tmp/project)
+        root (str): force root dir for cache (overrides level)
+        max_age (float): remove entries older than this age (in secs)
+        max_bkps (int): max number of backups to keep for each entry
+        quota (int): max size of cache in bytes - the least recently
+            accessed entries are removed until the cache fits
+        check_sources (bool): remove entries whose source path is missing
+        dry_run (bool): report entries to remove without removing them
+        verbose (int): print process data
+
+    Returns:
+        (GcReport): report
+    """
+    from ..path import abs_path
+    from .c_cacheable import get_cache_root
+
+    _root = get_cache_root(level=level, root=root)
+    _cache_dir = abs_path('{}/{}/cache'.format(_root, namespace))
+    _report = GcReport(cache_dir=_cache_dir, dry_run=dry_run)
+    _report.entries = _read_entries(
+        cache_dir=_cache_dir,
+        db_file='{}/{}/cache.db'.format(_root, namespace))
+    lprint('READ {:d} ENTRIES IN {}'.format(
+        len(_report.entries), _cache_dir), verbose=verbose)
+
+    _proj_path = None
+    if not root and level == 'project':
+        from psyhive import pipe
+        _proj_path = pipe.cur_project().path
+
+    # Flag entries to remove
+    _now = time.time()
+    _removed = _report.removed
+    _sources = _SourceChecker(proj_path=_proj_path)
+    for _entry in _report.entries:
+        if _entry.key.endswith('.tmp'):
+            if _now - _entry.mtime > _TMP_MAX_AGE:
+                _removed[_entry] = 'tmp'
+        elif check_sources and not _sources.exists(_entry):
+            _removed[_entry] = 'missing'
+        elif max_age and _now - _entry.mtime > max_age:
+            _removed[_entry] = 'age'
+    if max_bkps is not None:
+        _flag_bkps(_report, max_bkps=max_bkps)
+    if quota is not None:
+        _flag_quota(_report, quota=quota)
+
+    # Remove entries
+    for _entry, _reason in _removed.items():
+        lprint(' - REMOVE', _reason, _entry.path or _entry.key,
+               verbose=verbose > 1)
+        if not dry_run:
+            try:
+                _entry.delete()
+            except OSError as _exc:
+                lprint(' - FAILED TO REMOVE', _entry.path, _exc,
+                       verbose=verbose)
+    if not dry_run:
+        _remove_empty_dirs(_cache_dir)
+
+    lprint(_report.summary(), verbose=verbose)
+    return _report
+
+
+class _SourceChecker(object):
+    """Checks whether the paths that cache entries were built from exist.
+
+    The source extension is not stored in the cache path so an entry is
+    matched to any file/dir in its source dir with the same basename.
+    Image sequence caches are built from the sequence's frame pattern
+    (eg. render.%04d.exr) so numbered files also match the patterns
+    which their frame could be expanded from. Source dirs are only
+    listed once. If a source dir exists but can't be listed (eg. the
+    filer is unavailable) then its entries are assumed to have sources.
+    """
+
+    def __init__(self, proj_path=None):
+        """Constructor.
+
+        Args:
+            proj_path (str): project path (for project level caches)
+        """
+        self.proj_path = proj_path
+        self._listings = {}
+
+    def exists(self, entry):
+        """Test whether the given entry's source exists.
+
+        Args:
+            entry (GcEntry): entry to check
+
+        Returns:
+            (bool): whether source exists
+        """
+        for _dir in self._get_source_dirs(entry.dir):
+            _bases = self._read_basenames(_dir)
+            if _bases is None:
+                return True
+            for _base in _bases:
+                if entry.base.startswith(_base+'_'):
+                    return True
+        return False
+
+    def _get_source_dirs(self, dir_):
+        """Get possible source dirs for the given cache dir.
+
+        Args:
+            dir_ (str): dir relative to cache dir
+
+        Returns:
+            (str list): source dirs
+        """
+        _dirs = []
+        if self.proj_path:
+            _dirs.append('{}/{}'.format(self.proj_path, dir_))
+        _tokens = dir_.split('/', 1)
+        if len(_tokens[0]) == 1 and os.name == 'nt':
+            _dirs.append('{}:/{}'.format(
+                _tokens[0], _tokens[1] if len(_tokens) > 1 else ''))
+        else:
+            _dirs.append('/'+dir_)
+        return _dirs
+
+    def _read_basenames(self, dir_):
+        """Read basenames of the files/dirs in the given dir.
+
+        Args:
+            dir_ (str): dir to read
+
+        Returns:
+            (set|None): basenames (None if the dir couldn't be read)
+        """
+        if dir_ not in self._listings:
+            try:
+                _names = os.listdir(dir_)
+            except OSError as _exc:
+                if _exc.errno not in (errno.ENOENT, errno.ENOTDIR):
+                    self._listings[dir_] = None
+                    return None
+                _names = []
+            _bases = set()
+            for _name in _names:
+                _base = _name.rsplit('.', 1)[0] if '.' in _name[1:] else _name
+                _bases.add(_base)
+                _bases.update(_get_frame_patterns(_base))
+            self._listings[dir_] = _bases
+        return self._listings[dir_]
+
+
+def _flag_bkps(report, max_bkps):
+    """Flag backups beyond the max number to keep for each entry.
+
+    Args:
+        report (GcReport): report to update
+        max_bkps (int): max number of backups to keep
+    """
+    _bkps = collections.defaultdict(list)
+    for _entry in report.entries:
+        if _entry.bkp_of and _entry not in report.removed:
+            _bkps[_entry.bkp_of].append(_entry)
+    for _entries in _bkps.values():
+        _entries.sort(key=lambda _entry: _entry.key, reverse=True)
+        for _entry in _entries[max_bkps:]:
+            report.removed[_entry] = 'bkp'
+
+
+def _flag_quota(report, quota):
+    """Flag least recently accessed entries to bring cache under quota.
+
+    Args:
+        report (GcReport): report to update
+        quota (int): max cache size in bytes
+    """
+    _size = report.get_size()
+    if _size <= quota:
+        return
+    _entries = sorted(
+        [_entry for _entry in report.entries
+         if _entry not in report.removed],
+        key=lambda _entry: _entry.atime)
+    for _entry in _entries:
+        if _size <= quota:
+            break
+        report.removed[_entry] = 'quota'
+        _size -= _entry.size
+
+
+def _read_entries(cache_dir, db_file):
+    """Read all entries in the given cache dir and database.
+
+    Args:
+        cache_dir (str): cache dir to walk
+        db_file (str): path to namespace's cache database
+
+    Returns:
+        (GcEntry list): entries
+    """
+    from .c_db import get_db
+
+    _entries = []
+    for _dir, _, _files in os.walk(cache_dir):
+        for _file in _files:
+            _path = '{}/{}'.format(_dir, _file).replace('\\', '/')
+            try:
+                _stat = os.stat(_path)
+            except OSError:
+                continue
+            _key = _path[len(cache_dir)+1:]
+            if not _key.endswith('.tmp'):
+                _key = os.path.splitext(_key)[0]
+            _entries.append(GcEntry(
+                key=_key, path=_path, size=_stat.st_size,
+                atime=_stat.st_atime, mtime=_stat.st_mtime))
+
+    # Database entries don't record access time so mtime is used
+    if os.path.exists(db_file):
+        _db = get_db(db_file)
+        for _key, _size, _mtime, _ in _db.read_entries():
+            _entries.append(GcEntry(
+                key=_key, size=_size, atime=_mtime, mtime=_mtime, db=_db))
+
+    return _entries
+
+
+def _remove_empty_dirs(dir_):
+    """Remove empty dirs inside the given dir.
+
+    Args:
+        dir_ (str): dir to clean
+    """
+    for _dir, _subdirs, _files in os.walk(dir_, topdown=False):
+        if _dir == dir_ or _files:
+            continue
+        try:
+            os.rmdir(_dir)
+        except OSError:
+            pass
+
+
+def _get_frame_patterns(base):
+    """Get frame patterns which the given basename could belong to.
+
+    eg. render.1001 -> render.%04d/render.%03d/render.%02d/render.%d
+
+    Args:
+        base (str): file basename (without extension)
+
+    Returns:
+        (str list): frame patterns
+    """
+    _match = _FRAME_RX.match(base)
+    if not _match:
+        return []
+    _prefix, _frame = _match.group('prefix'), _match.group('frame')
+    if _frame.startswith('0') and len(_frame) > 1:
+        _pads = [len(_frame)]
+    else:
+        _pads = range(1, len(_frame)+1)
+    _patterns = ['{}%0{:d}d'.format(_prefix, _pad) for _pad in _pads]
+    if not _frame.startswith('0') or _frame == '0':
+        _patterns.append(_prefix+'%d')
+    return _patterns
@@ -0,0 +1,167 @@
+"""Tools for recording cache hit/miss/timing stats."""
+
+from ..filter_ import passes_filter
+
+
+class CacheStats(object):
+    """Records hit/miss/timing data for a cache decorated function."""
+
+    def __init__(self, name, get_entries=None):
+        """Constructor.
+
+        Args:
+            name (str): cache name
+            get_entries (fn): function to read number of cached entries
+        """
+        self.name = name
+        self._get_entries = get_entries
+        self.reset()
+
+    @property
+    def entries(self):
+        """Get number of entries currently held by this cache.
+
+        Returns:
+            (int|None): entry count (if available)
+        """
+        if not self._get_entries:
+            return None
+        return self._get_entries()
+
+    def get_hit_rate(self):
+        """Get fraction of calls which were served from the cache.
+
+        Returns:
+            (float|None): hit rate (if there have been any calls)
+        """
+        _calls = self.hits + self.misses
+        if not _calls:
+            return None
+        return 1.0*self.hits/_calls
+
+    def get_saved_time(self):
+        """Estimate time saved by this cache.
+
+        This is the mean recompute time multiplied by the number of hits,
+        less the time spent reading cached results from disk.
+
+        Returns:
+            (float): time saved in seconds
+        """
+        if not self.misses:
+            return 0.0
+        return self.hits*self.calc_time/self.misses - self.read_time
+
+    def reset(self):
+        """Reset all counters."""
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.calc_time = 0.0
+        self.reads = 0
+        self.read_time = 0.0
+        self.writes = 0
+        self.write_time = 0.0
+
+    def to_dict(self):
+        """Get this cache's stats as a dict.
+
+        Returns:
+            (dict): stats data
+        """
+        return {
+            'name': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'calc_time': self.calc_time,
+            'reads': self.reads,
+            'read_time': self.read_time,
+            'writes': self.writes,
+            'write_time': self.write_time,
+            'entries': self.entries,
+            'saved_time': self.get_saved_time()}
+
+    def __repr__(self):
+        return '<{}:{}>'.format(type(self).__name__, self.name)
+
+
+_STATS = {}
+_SITES = {}
+
+
+def _register_stats(name, get_entries=None, site=None):
+    """Create a stats object and add it to the registry.
+
+    If a cache of the same name is already registered from the same site
+    (ie. its module has been reloaded) it is replaced. If it was
+    registered from a different site, a number is added to the name so
+    that both caches keep their stats.
+
+    Args:
+        name (str): cache name
+        get_entries (fn): function to read number of cached entries
+        site (tuple): file/line number where the cached function is
+            defined
+
+    Returns:
+        (CacheStats): stats object
+    """
+    _name = name
+    _idx = 1
+    while _name in _STATS and _SITES.get(_name) != site:
+        _idx += 1
+        _name = '{} [{:d}]'.format(name, _idx)
+    _stats = CacheStats(_name, get_entries=get_entries)
+    _STATS[_name] = _stats
+    _SITES[_name] = site
+    return _stats
+
+
+def get_stats(filter_=None, fmt=None, sort='saved_time'):
+    """Read stats for the registered caches.
+
+    Args:
+        filter_ (str): filter by cache name
+        fmt (str): format to return data in
+            None - list of CacheStats objects
+            table - readable table str
+            yaml - yaml str
+        sort (str): stats key to sort by (descending)
+
+    Returns:
+        (CacheStats list|str): stats
+    """
+    _stats = [_stat for _name, _stat in sorted(_STATS.items())
+              if passes_filter(_name, filter_)]
+    _stats.sort(key=lambda _stat: _stat.to_dict()[sort], reverse=True)
+
+    if not fmt:
+        return _stats
+    elif fmt == 'yaml':
+        import yaml
+        return yaml.safe_dump([_stat.to_dict() for _stat in _stats],
+                              default_flow_style=False)
+    elif fmt == 'table':
+        _lines = ['{:<50} {:>7} {:>7} {:>6} {:>8} {:>8} {:>8} '
+                  '{:>7} {:>8}'.format(
+                      'NAME', 'HITS', 'MISSES', 'HIT%', 'CALC', 'READ',
+                      'WRITE', 'ENTRIES', 'SAVED')]
+        for _stat in _stats:
+            _rate = _stat.get_hit_rate()
+            _lines.append(
+                '{:<50} {:>7d} {:>7d} {:>6} {:>7.02f}s {:>7.02f}s '
+                '{:>7.02f}s {:>7} {:>7.02f}s'.format(
+                    _stat.name[-50:], _stat.hits, _stat.misses,
+                    '-' if _rate is None else '{:.0f}%'.format(_rate*100),
+                    _stat.calc_time, _stat.read_time, _stat.write_time,
+                    '-' if _stat.entries is None else _stat.entries,
+                    _stat.get_saved_time()))
+        return '\n'.join(_lines)
+    raise ValueError(fmt)
+
+
+def reset_stats():
+    """Reset the stats of all registered caches."""
+    for _stat in _STATS.values():
+        _stat.reset()
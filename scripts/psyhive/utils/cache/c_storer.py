@@ -0,0 +1,955 @@
+"""Tools for storing the results of functions."""
+
+import collections
+import functools
+import hashlib
+import inspect
+import operator
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+import six
+
+from ..filter_ import passes_filter
+from ..misc import lprint, dprint
+
+from .c_file import (
+    obj_read, obj_write, cache_exists, get_cache_mtime, touch_cache,
+    ReadError, _DIGEST_MARKER)
+from .c_stats import _register_stats
+
+_OUTDATED = object()
+
+# Max number of objects whose results are held in memory by each file
+# result storer (on top of objects being released when collected)
+_MEM_CACHE_SIZE = 1000
+
+
+class _ResultCache(object):
+    """Bounded store for the results held by a get_result_storer cache.
+
+    Entries are kept in access order so that the least recently used
+    entry can be evicted when the entry count or byte size limits are
+    exceeded. If lfu policy is used, the entry with the fewest hits is
+    evicted instead (ties go to the least recently used).
+
+    Results tied to an owner object are queued for release when the
+    owner is garbage collected, and the queue is purged on the next
+    access - this means the weakref callback (which can be called from
+    any thread at any time) never modifies the cache directly.
+
+    Methods which are used outside the owning storer's lock (eg. to
+    read stats) take the lock themselves, since the purge modifies the
+    cache.
+    """
+
+    def __init__(
+            self, max_entries=None, max_bytes=None, policy='lru',
+            lock=None):
+        """Constructor.
+
+        Args:
+            max_entries (int): maximum number of results to store
+            max_bytes (int): maximum (approximate) size of stored results
+            policy (str): eviction policy (lru/lfu)
+            lock (RLock): lock which guards this cache
+        """
+        if policy not in ('lru', 'lfu'):
+            raise ValueError(policy)
+        self.lock = lock or threading.RLock()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+
+        self.n_bytes = 0
+        self.evictions = 0
+
+        self._results = collections.OrderedDict()
+        self._sizes = {}
+        self._counts = {}
+        self._times = {}
+        self._refs = {}
+        self._released = []
+
+    def clear(self):
+        """Clear all stored results."""
+        del self._released[:]
+        self._results.clear()
+        self._sizes.clear()
+        self._counts.clear()
+        self._times.clear()
+        self._refs.clear()
+        self.n_bytes = 0
+
+    def get(self, key):
+        """Get a stored result, marking it as used.
+
+        Args:
+            key (any): result key
+
+        Returns:
+            (any): stored result
+        """
+        self._purge_released()
+        _result = self._results.pop(key)
+        self._results[key] = _result
+        self._counts[key] += 1
+        return _result
+
+    def get_age(self, key):
+        """Get time since the given result was stored.
+
+        Args:
+            key (any): result key
+
+        Returns:
+            (float): age in seconds
+        """
+        return time.time() - self._times[key]
+
+    def info(self):
+        """Get information about the contents of this cache.
+
+        Returns:
+            (dict): cache info
+        """
+        with self.lock:
+            self._purge_released()
+            return {
+                'entries': len(self._results),
+                'bytes': self.n_bytes if self.max_bytes else None,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'policy': self.policy,
+                'evictions': self.evictions}
+
+    def keys(self):
+        """Get list of stored result keys.
+
+        Returns:
+            (list): keys
+        """
+        with self.lock:
+            self._purge_released()
+            return self._results.keys()
+
+    def pop(self, key):
+        """Remove the given result from the cache (if it is stored).
+
+        Args:
+            key (any): result key
+        """
+        if key not in self._results:
+            return
+        del self._results[key]
+        del self._counts[key]
+        del self._times[key]
+        self.n_bytes -= self._sizes.pop(key, 0)
+        self._refs.pop(key, None)
+
+    def set(self, key, result, owner=None):
+        """Store a result.
+
+        Args:
+            key (any): result key
+            result (any): result to store
+            owner (any): object whose lifetime this result is tied
+                to - when it is garbage collected the result is released
+        """
+        self._purge_released()
+        self.pop(key)
+        self._results[key] = result
+        self._counts[key] = 0
+        self._times[key] = time.time()
+        if self.max_bytes:
+            self._sizes[key] = _get_size(result)
+            self.n_bytes += self._sizes[key]
+        if owner is not None:
+            self._refs[key] = weakref.ref(owner, self._get_release_fn(key))
+        self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        """Evict results until this cache is within its limits.
+
+        Args:
+            keep (any): key of result to not evict
+        """
+        while len(self._results) > 1 and (
+                (self.max_entries and
+                 len(self._results) > self.max_entries) or
+                (self.max_bytes and self.n_bytes > self.max_bytes)):
+            _keys = (_key for _key in self._results if _key != keep)
+            if self.policy == 'lfu':
+                _key = min(_keys, key=self._counts.get)
+            else:
+                _key = next(_keys)
+            self.pop(_key)
+            self.evictions += 1
+
+    def _get_release_fn(self, key):
+        """Get weakref callback to release the result for the given key.
+
+        Args:
+            key (any): key to release
+
+        Returns:
+            (fn): weakref callback
+        """
+
+        def _release_fn(ref):
+            self._released.append((key, ref))
+
+        return _release_fn
+
+    def _purge_released(self):
+        """Remove results whose owners have been garbage collected."""
+        while self._released:
+            _key, _ref = self._released.pop()
+            if self._refs.get(_key) is _ref:
+                self.pop(_key)
+
+    def __contains__(self, key):
+        self._purge_released()
+        return key in self._results
+
+    def __len__(self):
+        with self.lock:
+            self._purge_released()
+            return len(self._results)
+
+
+class _Flight(object):
+    """Represents a result calculation which is in progress.
+
+    This allows threads which need the same result to wait for a single
+    calculation rather than each running it.
+    """
+
+    def __init__(self, thread=None):
+        """Constructor.
+
+        Args:
+            thread (Thread): thread running the calculation
+        """
+        self.thread = thread
+        self.event = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+    def wait(self):
+        """Wait for the calculation to complete.
+
+        Returns:
+            (any): calculated result
+        """
+        self.event.wait()
+        if self.exc_info:
+            six.reraise(*self.exc_info)
+        return self.result
+
+
+class _RefreshPool(object):
+    """Pool of worker threads used to refresh stale cached results."""
+
+    def __init__(self, workers=4):
+        """Constructor.
+
+        Args:
+            workers (int): number of worker threads
+        """
+        self._queue = six.moves.queue.Queue()
+        self._threads = []
+        for _idx in range(workers):
+            _thread = threading.Thread(
+                target=self._work, name='CacheRefresh{:d}'.format(_idx))
+            _thread.daemon = True
+            _thread.start()
+            self._threads.append(_thread)
+
+    def submit(self, func):
+        """Add a function to the queue to be executed.
+
+        Args:
+            func (fn): function to execute
+        """
+        self._queue.put(func)
+
+    def _work(self):
+        """Execute functions from the queue."""
+        while True:
+            _func = self._queue.get()
+            try:
+                _func()
+            except Exception:  # pylint: disable=broad-except
+                traceback.print_exc()
+
+
+_REFRESH_POOL = None
+_REFRESH_POOL_LOCK = threading.Lock()
+
+
+def _get_refresh_pool():
+    """Get the shared background refresh thread pool.
+
+    Returns:
+        (_RefreshPool): thread pool
+    """
+    global _REFRESH_POOL
+    with _REFRESH_POOL_LOCK:
+        if not _REFRESH_POOL:
+            _REFRESH_POOL = _RefreshPool()
+    return _REFRESH_POOL
+
+
+def _get_qualname(func):
+    """Get qualified name of the given function for the stats registry.
+
+    Functions don't have a qualified name in py2, so the owner is read
+    from the frame which the decorator is being applied in - for a
+    method this is the class body.
+
+    Args:
+        func (fn): function being decorated
+
+    Returns:
+        (str): qualified name (eg. psyhive.tk.cache.MyClass.get_metadata)
+    """
+    _this_file = os.path.splitext(__file__)[0]
+    _frame = sys._getframe(1)  # pylint: disable=protected-access
+    while (_frame and
+           os.path.splitext(_frame.f_code.co_filename)[0] == _this_file):
+        _frame = _frame.f_back
+    _tokens = [func.__module__, func.__name__]
+    if _frame and _frame.f_code.co_name != '<module>':
+        _tokens.insert(1, _frame.f_code.co_name)
+    return '.'.join(_tokens)
+
+
+def _get_site(func):
+    """Get the site where the given function is defined.
+
+    Args:
+        func (fn): function to read
+
+    Returns:
+        (tuple): file/line number
+    """
+    _code = getattr(func, '__code__', None)
+    if not _code:
+        return None
+    return _code.co_filename, _code.co_firstlineno
+
+
+def _get_size(obj):
+    """Get approximate size of the given object in memory.
+
+    This includes the items of containers, but only to one level.
+
+    Args:
+        obj (any): object to measure
+
+    Returns:
+        (int): size in bytes
+    """
+    _size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        _size += sum(sys.getsizeof(_key) + sys.getsizeof(_val)
+                     for _key, _val in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        _size += sum(sys.getsizeof(_item) for _item in obj)
+    return _size
+
+
+def _depend_path_makes_cache_outdated(
+        cache_file, depend_path, cache_file_exists=None, verbose=0):
+    """Check of a depend path makes a cache outdated.
+
+    Args:
+        cache_file (str): path to cache file
+        depend_path (str): path to depend path
+        cache_file_exists (bool): whether cache file exists
+        verbose (int): print process data
+    """
+    if not depend_path:
+        return False
+
+    # Check if cache file exists
+    if cache_file_exists is None:
+        _cache_file_exists = cache_exists(cache_file)
+    else:
+        _cache_file_exists = cache_file_exists
+    if not _cache_file_exists:
+        return False
+
+    if verbose:
+        print ' - DEPEND PATH', os.path.exists(depend_path), depend_path
+
+    return (
+        os.path.exists(depend_path) and
+        os.path.getmtime(depend_path) > get_cache_mtime(cache_file))
+
+
+def get_result_storer(
+        key=None, timeout=None, ignore_args=False, id_as_key=False,
+        get_depend_var=None, args_filter=None, get_depend_path=None,
+        max_entries=None, max_bytes=None, policy='lru', name=None,
+        refresh=None, max_stale=None, verbose=0):
+    """Build a decorator to store the result of a function.
+
+    By default, the result is regenerated for each combination of args. If
+    any combination of args is applied to the function more than once,
+    the result from the initial execution of the function is used.
+
+    The cache is thread safe. If threads request a result which is already
+    being calculated, they wait for that calculation and share its result
+    rather than running the function again.
+
+    The decorated function is given clear/info/stats attributes which can
+    be used to clear the stored results and to read the cache state.
+
+    Args:
+        key (str): arg to use as a key (ie. ignore other arg values)
+        timeout (float): cause the cached result to expire after this
+            many seconds
+        ignore_args (bool): ignore all args (always return the same result)
+        id_as_key (bool): use only the id of the first arg as the
+            results key - where possible the arg is weak referenced, so
+            its result is released when it is garbage collected
+        get_depend_var (fn): function to read a depend variable - if this
+            variable changes value then the cached data is discarded
+        args_filter (str): string filter to apply to args list
+        get_depend_path (fn): function to get a path - if the mtime of
+            this path is greater than the time at which the cache was
+            generated then the cache is regenerated
+        max_entries (int): maximum number of results to store - once
+            this is exceeded results are evicted
+        max_bytes (int): maximum approximate size in bytes of stored
+            results - once this is exceeded results are evicted
+        policy (str): eviction policy
+            lru - evict least recently used result
+            lfu - evict least frequently used result
+        name (str): override name of this cache in the stats registry
+        refresh (str): how results are refreshed on timeout
+            None - block the caller while the result is regenerated
+            background - return the stale result immediately and
+                regenerate it in a background thread
+        max_stale (float): in background refresh mode, results older than
+            this many seconds are regenerated with the caller blocking
+        verbose (int): print process data
+    """
+    if refresh not in (None, 'background'):
+        raise ValueError(refresh)
+    if refresh and timeout is None:
+        raise ValueError('Background refresh requires timeout')
+
+    def _store_result(func):
+
+        # Dicts are used for _depend_var/_read_time to avoid global errors
+        _depend_var = {None: get_depend_var()} if get_depend_var else None
+        _read_time = {}
+        _lock = threading.RLock()
+        _result_cache = _ResultCache(
+            max_entries=max_entries, max_bytes=max_bytes, policy=policy,
+            lock=_lock)
+        _flights = {}
+        _stats = _register_stats(
+            name or _get_qualname(func), get_entries=_result_cache.__len__,
+            site=_get_site(func))
+        _arg_spec = inspect.getargspec(func)
+        dprint('Reset results cache', func.__name__, verbose=verbose)
+
+        def _depend_path_forces_recache(args, read_time):
+
+            if not get_depend_path:
+                return False
+            if not read_time:
+                return False
+
+            _obj = args[0]
+            _path = get_depend_path(_obj)
+            _mtime = os.path.getmtime(_path)
+            _force_recache = _mtime > read_time
+
+            return _force_recache
+
+        def _depend_var_forces_recache():
+            if not get_depend_var:
+                return False
+            _current_depend_var = get_depend_var()
+            _result = _current_depend_var != _depend_var[None]
+            _depend_var[None] = _current_depend_var
+            return _result
+
+        def _timeout_forces_recache():
+            return timeout is not None and (
+                not _read_time or time.time() - _read_time[None] > timeout)
+
+        @functools.wraps(func)
+        def _fn_wrapper(*args, **kwargs):
+
+            dprint('Executing', func.__name__, verbose=verbose)
+
+            # Catch bad kwarg provided
+            for _kwarg in kwargs:
+                if _kwarg not in _arg_spec.args:
+                    lprint(' - args spec', _arg_spec.args, verbose=verbose)
+                    raise TypeError(
+                        "{}() got an unexpected keyword argument '{}'".format(
+                            func.__name__, _kwarg))
+
+            # Get a full list of kwargs
+            _args_key = []
+            _args_dict = {}
+            for _idx, _arg_name in enumerate(_arg_spec.args):
+                _arg_idx = _idx-len(_arg_spec.args)
+                if _arg_name in ['force', 'verbose']:
+                    continue
+                elif args_filter and not passes_filter(_arg_name, args_filter):
+                    continue
+                elif _idx < len(args):
+                    _val = args[_idx]
+                elif _arg_name in kwargs:
+                    _val = kwargs[_arg_name]
+                elif abs(_arg_idx) > len(_arg_spec.defaults):
+                    raise TypeError(
+                        'It looks like some of the required args are '
+                        'missing {}'.format(func.__name__))
+                else:
+                    _val = _arg_spec.defaults[_arg_idx]
+                _args_key.append((_arg_name, _val))
+                _args_dict[_arg_name] = _val
+
+            # Get key to reference this result
+            _owner = None
+            if id_as_key:
+                try:
+                    weakref.ref(args[0])
+                except TypeError:
+                    _key = id(args[0]), args[0]
+                else:
+                    _key = id(args[0])
+                    _owner = args[0]
+            elif ignore_args:
+                _key = None
+            elif key:
+                _key = _args_dict[key]
+            else:
+                _key = tuple(_args_key)
+                for _name, _val in _key:
+                    if isinstance(_val, dict):
+                        raise RuntimeError("Cacher applied to dict arg")
+            del _args_key
+            if verbose:
+                lprint(' - args key', _key)
+                lprint(' - results keys', _result_cache.keys())
+
+            # Check for stored result or calculation in progress
+            with _lock:
+                _recache = (
+                    kwargs.get('force') or
+                    _key not in _result_cache or
+                    (not refresh and _timeout_forces_recache()) or
+                    _depend_var_forces_recache() or
+                    _depend_path_forces_recache(args, _read_time.get(None)))
+                if not _recache and refresh:
+                    _age = _result_cache.get_age(_key)
+                    if max_stale is not None and _age > max_stale:
+                        _recache = True
+                    elif _age > timeout:
+                        _refresh_in_background(_key, args, kwargs, _owner)
+                if not _recache:
+                    _stats.hits += 1
+                    return _result_cache.get(_key)
+                _flight = _flights.get(_key)
+                _wait = (
+                    _flight is not None and
+                    _flight.thread is not threading.current_thread())
+                if not _wait:
+                    _flight = _Flight(thread=threading.current_thread())
+                    _flights[_key] = _flight
+            if _wait:
+                lprint(' - WAITING FOR CALCULATION', _key, verbose=verbose)
+                _result = _flight.wait()
+                with _lock:
+                    _stats.hits += 1
+                return _result
+
+            _result = _calc_result(_flight, _key, args, kwargs, _owner)
+            if verbose:
+                lprint(' - results keys (final)', _result_cache.keys())
+            return _result
+
+        def _calc_result(flight, key_, args, kwargs, owner):
+
+            _start = time.time()
+            try:
+                _result = func(*args, **kwargs)
+            except Exception:
+                flight.exc_info = sys.exc_info()
+                raise
+            else:
+                flight.result = _result
+                with _lock:
+                    _result_cache.set(key_, _result, owner=owner)
+                    _read_time[None] = time.time()
+                    _stats.misses += 1
+                    _stats.calc_time += time.time() - _start
+            finally:
+                with _lock:
+                    if _flights.get(key_) is flight:
+                        del _flights[key_]
+                flight.event.set()
+
+            return _result
+
+        def _refresh_in_background(key_, args, kwargs, owner):
+
+            if key_ in _flights:
+                return
+            lprint(' - REFRESHING IN BACKGROUND', key_, verbose=verbose)
+            _flight = _Flight()
+            _flights[key_] = _flight
+            _stats.stale_hits += 1
+
+            def _refresh():
+                _flight.thread = threading.current_thread()
+                _calc_result(_flight, key_, args, kwargs, owner)
+
+            _get_refresh_pool().submit(_refresh)
+
+        def _clear():
+            with _lock:
+                _result_cache.clear()
+                _read_time.clear()
+
+        _fn_wrapper.clear = _clear
+        _fn_wrapper.info = _result_cache.info
+        _fn_wrapper.stats = _stats
+
+        return _fn_wrapper
+
+    return _store_result
+
+
+def get_result_to_file_storer(
+        get_depend_path=None, min_mtime=None, create_dir=True,
+        max_age=None, allow_fail=True, compress=None, depend_mode='mtime',
+        lazy=False, verbose=0):
+    """Build a decorator that stores the result of a function to a file.
+
+    Args:
+        get_depend_path (fn): function to get a path - if the mtime of
+            this path is greater than the time at which the cache was
+            generated then the cache is regenerated
+        min_mtime (float): if the cache was generated before this time
+            then it should be ignored
+        create_dir (bool): create the dir of the cache file if it
+            doesn't exist
+        max_age (float): if the age of the cache (in secs) is more than
+            this value then it should be ignored (ie. regenerated)
+        allow_fail (bool): error if cache fails to write to disk
+        compress (str): compress cache files (zlib/lz4)
+        depend_mode (str): how the depend path outdates the cache
+            mtime - any change in mtime regenerates the cache
+            hash - if the mtime changes, a digest of the depend path's
+                contents is compared with the digest stored with the
+                cache and the cache is only regenerated if it changed
+                (the digest is only calculated when an existing cache
+                is outdated, so a cache is always regenerated the first
+                time it's outdated - this stores the digest)
+            sample - as hash, but the digest is built from the file size
+                and a sample of blocks (faster but less robust)
+        lazy (bool): write list/dict results as chunked containers and
+            return a read-only proxy which decodes items on access when
+            the result is read from the cache (not available with
+            digest depend modes)
+        verbose (int): print process data
+    """
+    if depend_mode not in ('mtime', 'hash', 'sample'):
+        raise ValueError(depend_mode)
+    if lazy and depend_mode != 'mtime':
+        raise ValueError('Lazy results require mtime depend mode')
+    _use_digest = depend_mode != 'mtime'
+
+    def _store_result_to_file(method):
+
+        _name = _get_qualname(method)
+
+        @get_result_storer(
+            id_as_key=True, max_entries=_MEM_CACHE_SIZE, name=_name+' [mem]')
+        def _get_result(
+                obj, cache_file, args, kwargs, force=False,
+                cache_file_exists=None, depend_path=None,
+                depend_digest=None):
+
+            # Try and read from file
+            if (not force or depend_digest) and cache_file:
+                if cache_file_exists is None:
+                    _cache_file_exists = cache_exists(cache_file)
+                else:
+                    _cache_file_exists = cache_file_exists
+                if not _cache_file_exists:
+                    pass
+                else:
+                    _start = time.time()
+                    try:
+                        _result = obj_read(cache_file, lazy=lazy)
+                    except ReadError:
+                        pass
+                    else:
+                        _stats.reads += 1
+                        _stats.read_time += time.time() - _start
+                        if _use_digest:
+                            _result = _read_digest_result(
+                                _result, cache_file=cache_file,
+                                depend_digest=depend_digest,
+                                verbose=verbose)
+                        if _result is not _OUTDATED:
+                            return _result
+
+            # Calculate result
+            lprint(' - CALCULATING RESULT', verbose=verbose)
+            _start = time.time()
+            _result = method(*args, **kwargs)
+            _stats.misses += 1
+            _stats.calc_time += time.time() - _start
+
+            # Write to file
+            _start = time.time()
+            _data = _result
+            if depend_digest:
+                _data = (_DIGEST_MARKER, depend_digest, _result)
+            try:
+                obj_write(
+                    _data, file_=cache_file, create_dir=create_dir,
+                    compress=compress, chunked=lazy,
+                    verbose=max(verbose-1, 0))
+            except (OSError, IOError) as _exc:
+                if not allow_fail:
+                    raise _exc
+            else:
+                _stats.writes += 1
+                _stats.write_time += time.time() - _start
+
+            return _result
+
+        _stats = _register_stats(
+            _name, get_entries=lambda: _get_result.info()['entries'],
+            site=_get_site(method))
+
+        @functools.wraps(method)
+        def _result_writer(*args, **kwargs):
+
+            from ..path import abs_path
+            from .c_db import is_db_path
+
+            dprint('READING RESULT', method.__name__, verbose=verbose)
+
+            # Read object/force
+            _obj = args[0]
+            _force = kwargs.get('force')
+
+            # Get cache file path
+            if _obj.cache_fmt:
+                try:
+                    _cache_file = abs_path(
+                        _obj.cache_fmt.format(method.__name__))
+                except TypeError:
+                    raise TypeError(
+                        'Bad cache file fmt {}'.format(_obj.cache_fmt))
+                if is_db_path(_obj.cache_fmt):
+                    _cache_file = _obj.cache_fmt.format(method.__name__)
+            else:
+                _cache_file = None
+            _cache_file_exists = None
+            lprint(' - READ CACHE FILE', _cache_file, verbose=verbose)
+
+            # Read depend path
+            _depend_path = _depend_digest = None
+            if _cache_file and get_depend_path:
+                _depend_path = get_depend_path(_obj)
+            if not _force and _cache_file and get_depend_path:
+                _cache_file_exists = cache_exists(_cache_file)
+                if _depend_path_makes_cache_outdated(
+                        cache_file=_cache_file, depend_path=_depend_path,
+                        cache_file_exists=_cache_file_exists,
+                        verbose=verbose):
+                    if verbose:
+                        _depend_mtime = os.path.getmtime(_depend_path)
+                        _cache_mtime = get_cache_mtime(_cache_file)
+                        lprint(
+                            ' - DEPEND PATH OUTDATED CACHE BY {:.01f}s'.format(
+                                _depend_mtime - _cache_mtime))
+                    _force = True
+                    if _use_digest:
+                        _depend_digest = _get_file_digest(
+                            _depend_path, mode=depend_mode)
+                else:
+                    lprint(
+                        ' - DEPEND PATH DID NOT OUTDATE CACHE',
+                        verbose=verbose)
+
+            # Apply age/mtime constraints
+            if (
+                    (not _force or _depend_digest) and
+                    _cache_file and (min_mtime or max_age)):
+                if _cache_file_exists is None:
+                    _cache_file_exists = cache_exists(_cache_file)
+                if _cache_file_exists:
+                    _mtime = get_cache_mtime(_cache_file)
+                    _age = time.time() - _mtime
+                    if min_mtime and _mtime < min_mtime:
+                        _force = True
+                        _depend_digest = None
+                    elif max_age and _age > max_age:
+                        _force = True
+                        _depend_digest = None
+
+            _misses = _stats.misses
+            _result = _get_result(
+                _obj, args=args, kwargs=kwargs, force=_force,
+                cache_file=_cache_file, cache_file_exists=_cache_file_exists,
+                depend_path=_depend_path, depend_digest=_depend_digest)
+            if _stats.misses == _misses:
+                _stats.hits += 1
+            return _result
+
+        _result_writer.stats = _stats
+
+        return _result_writer
+
+    return _store_result_to_file
+
+
+def _get_file_digest(path, mode='hash', block_size=2**16, samples=16):
+    """Get a digest of the contents of the given file.
+
+    Args:
+        path (str): path to file
+        mode (str): digest mode
+            hash - digest of the full file contents
+            sample - digest of the file size and a sample of blocks
+        block_size (int): size of blocks to read
+        samples (int): number of blocks to sample (in sample mode)
+
+    Returns:
+        (str): digest
+    """
+    try:
+        import xxhash
+    except ImportError:
+        _hash = hashlib.md5()
+    else:
+        _hash = xxhash.xxh64()
+
+    _size = os.path.getsize(path)
+    _hash.update(str(_size))
+    with open(path, 'rb') as _file:
+        if mode == 'hash' or _size <= block_size*samples:
+            for _block in iter(
+                    functools.partial(_file.read, block_size), ''):
+                _hash.update(_block)
+        elif mode == 'sample':
+            _step = (_size - block_size)//(samples - 1)
+            for _idx in range(samples):
+                _file.seek(_idx*_step)
+                _hash.update(_file.read(block_size))
+        else:
+            raise ValueError(mode)
+
+    return '{}:{}'.format(mode, _hash.hexdigest())
+
+
+def _read_digest_result(data, cache_file, depend_digest, verbose=0):
+    """Read cached data stored with the digest of its depend path.
+
+    If the cache was stored without a digest (ie. using mtime depend
+    mode) then it is only used if no digest check is required.
+
+    Args:
+        data (any): data read from cache file
+        cache_file (str): path to cache file
+        depend_digest (str): digest of depend path contents to check
+            against stored digest (if check is required)
+        verbose (int): print process data
+
+    Returns:
+        (any): cached result or _OUTDATED if the cache is outdated
+    """
+    _has_digest = (
+        isinstance(data, tuple) and len(data) == 3 and
+        data[0] == _DIGEST_MARKER)
+    if not depend_digest:
+        return data[2] if _has_digest else data
+    if not _has_digest or data[1] != depend_digest:
+        lprint(' - DEPEND PATH CONTENTS CHANGED', verbose=verbose)
+        return _OUTDATED
+
+    # Contents unchanged so update mtime to pass next mtime check
+    lprint(' - DEPEND PATH CONTENTS UNCHANGED', verbose=verbose)
+    try:
+        touch_cache(cache_file)
+    except OSError:
+        pass
+    return data[2]
+
+
+def store_result(func):
+    """Decorator to store the result of a function.
+
+    Args:
+        func (fn): function to store result of
+    """
+    return get_result_storer()(func)
+
+
+def store_result_on_obj(method):
+    """Decorator which stores the result of a method on the object.
+
+    This generates a unique result for each instance of the object. This
+    cache acts like a property (except it is still a function).
+
+    Args:
+        method (fn): method to decorate
+
+    Returns:
+        (fn): decorated function
+    """
+    return get_result_storer(id_as_key=True)(method)
+
+
+def store_result_content_dependent(method):
+    """Decorator to save result of a scene file analysis.
+
+    The result expires if the mtime of the scene file is higher than
+    the cache generation time.
+
+    Args:
+        method (fn): method to decorate
+
+    Returns:
+        (fn): decorated function
+    """
+    return get_result_to_file_storer(
+        get_depend_path=operator.attrgetter('path'))(method)
+
+
+def store_result_to_file(method):
+    """Decorator to the result of a method to a file.
+
+    This must be applied to an object which inherits from Cachable. The
+    path to the cache file is reads from the obj.cache_fmt attribute.
+    This str should contain a {} format placeholder which will be
+    replaced with the method name to give the cache file path.
+
+    Args:
+        method (fn): method to decorate
+
+    Returns:
+        (fn): decorated method
+    """
+    return get_result_to_file_storer()(method)
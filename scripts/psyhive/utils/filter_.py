@@ -1,30 +1,219 @@
 """Tools for applying text filters."""
 
+import collections
+import threading
+
 import six
 
 from psyhive.utils.misc import lprint
 
+_FILTERS = {}
+_FILTERS_ORDER = collections.deque()
+_FILTERS_LOCK = threading.Lock()
+_FILTERS_SIZE = 256
+
+
+class Filter(object):
+    """Represents a filter string which has been parsed into tokens.
+
+    Filter strings are split on whitespace (except inside double quotes)
+    into match tokens, of which the text must contain at least one,
+    required tokens (prefixed with +), which the text must all contain,
+    and ignore tokens (prefixed with -), which the text must not contain.
+    """
+
+    def __init__(self, filter_, case_sensitive=False):
+        """Constructor.
+
+        Args:
+            filter_ (str): filter string
+            case_sensitive (bool): ignore case in text/filter
+        """
+        self.filter_ = filter_
+        self.case_sensitive = case_sensitive
+
+        _filter = filter_ or ''
+        if not case_sensitive:
+            _filter = _filter.lower()
+
+        # Sort into filter tokens
+        if '"' in _filter:
+            _ftokens = []
+            for _idx, _section in enumerate(_filter.split('"')):
+                if not _section:
+                    continue
+                if not _idx % 2:
+                    _ftokens += _section.split()
+                else:
+                    _ftokens += [_section]
+        else:
+            _ftokens = _filter.split()
+
+        # Parse filter str
+        _matches = []
+        _ignores = []
+        _required = []
+        for _ftoken in _ftokens:
+            if _ftoken.startswith('+'):
+                _required.append(_ftoken[1:])
+            elif _ftoken.startswith('-'):
+                _ignores.append(_ftoken[1:])
+            else:
+                _matches.append(_ftoken)
+        self.matches = tuple(_matches)
+        self.ignores = tuple(_ignores)
+        self.required = tuple(_required)
+
+    def match(self, text, verbose=0):
+        """Test whether the given text passes this filter.
+
+        Args:
+            text (str): text to test
+            verbose (int): print process data
+
+        Returns:
+            (bool): whether text passes
+        """
+        if not self.case_sensitive:
+            text = text.lower()
+        return self.match_prepared(text, verbose=verbose)
+
+    def match_prepared(self, text, verbose=0):
+        """Test whether the given text passes this filter.
+
+        The text is assumed to already be lower case, if this filter
+        ignores case.
+
+        Args:
+            text (str): text to test
+            verbose (int): print process data
+
+        Returns:
+            (bool): whether text passes
+        """
+        if verbose:
+            lprint('TESTING', text)
+            lprint(' - REQUIRED', self.required)
+            lprint(' - MATCHES', self.matches)
+            lprint(' - IGNORES', self.ignores)
+
+        # Check for required matches
+        for _requirement in self.required:
+            if _requirement not in text:
+                return False
+
+        # Check for matches
+        if self.matches:
+            for _match in self.matches:
+                if _match in text:
+                    break
+            else:
+                lprint(' - NO MATCHES', verbose=verbose)
+                return False
+
+        # Check for ignores
+        for _ignore in self.ignores:
+            if _ignore in text:
+                return False
+
+        return True
+
+    def __repr__(self):
+        return '<{}|{}>'.format(type(self).__name__, self.filter_)
+
 
 def apply_filter(list_, filter_, key=None, negate=False, case_sensitive=False):
     """Apply filter to a list.
 
     Args:
         list_ (list): list of items to filter
-        filter_ (str): filter to apply
+        filter_ (str|Filter): filter to apply
         key (fn): apply function to list items to get str to apply filter to
         negate (bool): invert the filter
         case_sensitive (bool): ignore case
     """
-    _results = []
-    for _item in list_:
+    if not filter_:
+        return [] if negate else list(list_)
+    return filter_many(
+        list_, filters=[filter_], key=key, negate=negate,
+        case_sensitive=case_sensitive)[0]
+
 
-        _passes_filter = passes_filter(
-            _item, filter_, key=key, case_sensitive=case_sensitive)
-        if not negate and _passes_filter:
-            _results.append(_item)
-        elif negate and not _passes_filter:
-            _results.append(_item)
+def compile_filter(filter_, case_sensitive=False):
+    """Get a compiled filter object for the given filter string.
 
+    Compiled filters are stored so that repeated calls with the same
+    filter string only parse it once. Stored filters are read without
+    locking - the lock is only taken to add a filter, when the oldest
+    filter is discarded if the store is full.
+
+    Args:
+        filter_ (str|Filter): filter string (a compiled filter is
+            returned unchanged)
+        case_sensitive (bool): ignore case in text/filter
+
+    Returns:
+        (Filter): compiled filter
+    """
+    if isinstance(filter_, Filter):
+        return filter_
+    _key = filter_, case_sensitive
+    _filter = _FILTERS.get(_key)
+    if _filter is not None:
+        return _filter
+    with _FILTERS_LOCK:
+        _filter = _FILTERS.get(_key)
+        if _filter is None:
+            _filter = Filter(filter_, case_sensitive=case_sensitive)
+            _FILTERS[_key] = _filter
+            _FILTERS_ORDER.append(_key)
+            while len(_FILTERS_ORDER) > _FILTERS_SIZE:
+                del _FILTERS[_FILTERS_ORDER.popleft()]
+    return _filter
+
+
+def filter_many(items, filters, key=None, negate=False, case_sensitive=False):
+    """Apply a list of filters to a list of items.
+
+    The text for each item is read (and lowered) once, and then each
+    filter is applied to it - this is faster than applying each filter
+    separately to a long list.
+
+    Args:
+        items (list): list of items to filter
+        filters (str|Filter list): filters to apply
+        key (fn): apply function to items to get str to apply filter to
+        negate (bool): invert the filters
+        case_sensitive (bool): ignore case
+
+    Returns:
+        (list list): items which pass each filter
+    """
+    _filters = [compile_filter(_filter, case_sensitive=case_sensitive)
+                for _filter in filters]
+    _items = list(items)
+
+    # Read text for each item
+    _texts = []
+    for _item in _items:
+        if key:
+            _text = key(_item)
+        else:
+            if not isinstance(_item, six.string_types):
+                raise ValueError(_item)
+            _text = _item
+        _texts.append(_text)
+    _lowered = None
+    if [_filter for _filter in _filters if not _filter.case_sensitive]:
+        _lowered = [_text.lower() for _text in _texts]
+
+    # Apply filters
+    _results = []
+    for _filter in _filters:
+        _f_texts = _texts if _filter.case_sensitive else _lowered
+        _results.append([
+            _item for _item, _text in zip(_items, _f_texts)
+            if _filter.match_prepared(_text) != negate])
     return _results
 
 
@@ -33,42 +222,14 @@ def passes_filter(text, filter_, key=None, case_sensitive=False, verbose=0):
 
     Args:
         text (str|any): text to check
-        filter_ (str): filter to apply
+        filter_ (str|Filter): filter to apply
         key (bool): function to apply to text to obtain text to apply filter to
         case_sensitive (bool): ignore case in text/filter
         verbose (int): print process data
     """
     if not filter_:
         return True
-
-    _filter = filter_
-    if not case_sensitive:
-        _filter = _filter.lower()
-
-    # Sort into filter tokens
-    if '"' in _filter:
-        _ftokens = []
-        for _idx, _section in enumerate(_filter.split('"')):
-            if not _section:
-                continue
-            if not _idx % 2:
-                _ftokens += _section.split()
-            else:
-                _ftokens += [_section]
-    else:
-        _ftokens = _filter.split()
-
-    # Parse filter str
-    _matches = []
-    _ignores = []
-    _required = []
-    for _ftoken in _ftokens:
-        if _ftoken.startswith('+'):
-            _required.append(_ftoken[1:])
-        elif _ftoken.startswith('-'):
-            _ignores.append(_ftoken[1:])
-        else:
-            _matches.append(_ftoken)
+    _filter = compile_filter(filter_, case_sensitive=case_sensitive)
 
     # Get text to compare with
     if key:
@@ -77,26 +238,5 @@ def passes_filter(text, filter_, key=None, case_sensitive=False, verbose=0):
         if not isinstance(text, six.string_types):
             raise ValueError(text)
         _text = text
-    if not case_sensitive:
-        _text = _text.lower()
-    lprint('TESTING', _text, verbose=verbose)
-
-    # Check for required matches
-    lprint(' - REQUIRED', _required, verbose=verbose)
-    for _requirement in _required:
-        if _requirement not in _text:
-            return False
-
-    # Check for matches
-    lprint(' - MATCHES', _matches, verbose=verbose)
-    if _matches and not [_match for _match in _matches if _match in _text]:
-        lprint(' - NO MATCHES', verbose=verbose)
-        return False
-
-    # Check for ignores
-    lprint(' - IGNORES', _ignores, verbose=verbose)
-    for _ignore in _ignores:
-        if _ignore in _text:
-            return False
-
-    return True
+
+    return _filter.match(_text, verbose=verbose)
@@ -1,12 +1,18 @@
 """Tools for parsing/updating ma files without maya."""
 
+import collections
+import copy
+import multiprocessing
+import operator
 import os
+import shlex
 
 from .cache import (
-    store_result_content_dependent, build_cache_fmt, store_result)
+    store_result_content_dependent, build_cache_fmt,
+    get_result_to_file_storer)
 from .path import File, FileError
 from .heart import check_heart
-from .misc import get_single, lprint, last
+from .misc import get_single, lprint
 
 _EXPR_ORDER = [
     'file',
@@ -20,21 +26,33 @@ _EXPR_ORDER = [
     'relationship',  # connectAttr can be before and after relationship
     'dataStructure',
 ]
+_HEADER_TYPES = ['file', 'currentUnit', 'fileInfo', 'requires']
+_UNIT_FLAGS = {'-l': 'linear', '-a': 'angle', '-t': 'time'}
+_CHUNK_SIZE = 1024*1024
+_FPS = {'pal': 25.0, 'ntsc': 30.0, 'film': 24.0}
+
+# Caches of full file parses are kept if the file is resaved unchanged -
+# a sampled digest is used since a full digest reads the whole file
+_store_result_sample_dependent = get_result_to_file_storer(
+    get_depend_path=operator.attrgetter('path'), depend_mode='sample')
 
 
 class _MaExprBase(object):
     """Base class for any top level ma file declaration."""
 
-    def __init__(self, body, parent):
+    def __init__(self, body, parent, offset=None, length=None):
         """Constructor.
 
         Args:
             body (str): declaration text
             parent (MaFile): parent ma file
+            offset (int): byte offset of declaration in file
+            length (int): length of declaration in file (in bytes)
         """
-        check_heart()
         self.parent = parent
         self.body = body
+        self.offset = offset
+        self.length = length
         self.tokens = body.split()
         self.type_ = self.tokens[0]
         self.name = None
@@ -53,7 +71,7 @@ class _MaExprBase(object):
         """
         assert flag in self.tokens
         _idx = self.tokens.index(flag) + 1
-        return self.tokens[_idx].strip('"').strip(';')
+        return self.tokens[_idx].strip(';').strip('"')
 
     def __repr__(self):
         return '<{}:{}>'.format(
@@ -63,14 +81,17 @@ class _MaExprBase(object):
 class _MaExprCreateNode(_MaExprBase):
     """Represents a createNode declaration in an ma file."""
 
-    def __init__(self, body, parent):
+    def __init__(self, body, parent, offset=None, length=None):
         """Constructor.
 
         Args:
             body (str): declaration text body
             parent (MaFile): parent ma file
+            offset (int): byte offset of declaration in file
+            length (int): length of declaration in file (in bytes)
         """
-        super(_MaExprCreateNode, self).__init__(body=body, parent=parent)
+        super(_MaExprCreateNode, self).__init__(
+            body=body, parent=parent, offset=offset, length=length)
 
         self.node_type = self.tokens[1]
         # assert not self.type_ == 'createNode'
@@ -85,14 +106,17 @@ class _MaExprCreateNode(_MaExprBase):
 class _MaExprFile(_MaExprBase):
     """Represents a file declaration (eg. reference) in an ma file."""
 
-    def __init__(self, body, parent):
+    def __init__(self, body, parent, offset=None, length=None):
         """Constructor.
 
         Args:
             body (str): declaration text body
             parent (MaFile): parent ma file
+            offset (int): byte offset of declaration in file
+            length (int): length of declaration in file (in bytes)
         """
-        super(_MaExprFile, self).__init__(body=body, parent=parent)
+        super(_MaExprFile, self).__init__(
+            body=body, parent=parent, offset=offset, length=length)
         self.path = self.tokens[-1].strip(';"')
         self.node = self.read_flag('-rfn')
         self.namespace = self.read_flag('-ns')
@@ -107,11 +131,20 @@ class _MaExprFile(_MaExprBase):
         assert os.path.exists(file_)
         assert self.body.count(self.path) == 1
         _new_body = self.body.replace(self.path, file_)
-        self.parent.update_expr(self.body, _new_body)
+        self.parent.update_expr(self, _new_body)
 
 
 class MaFile(File):
-    """Represents an ma file."""
+    """Represents an ma file.
+
+    The file is read as a stream, recording the byte offset and length
+    of each top level declaration in an index. Declarations are then
+    only read from disk when they're needed.
+
+    Edits are stored as patches against the offsets of the declarations
+    they replace, and are applied in a single pass as the file is
+    streamed to disk on save.
+    """
 
     def __init__(self, file_):
         """Constructor.
@@ -120,21 +153,60 @@ class MaFile(File):
             file_ (str): path to ma file
         """
         super(MaFile, self).__init__(file_)
-        self.body = self.read()
-        self._new_body = None
+        self._patches = {}
+        self._indexes = {}
         if not self.extn == 'ma':
             raise ValueError('Bad extn '+self.extn)
 
+    @property
+    def body(self):
+        """Get text body of this file.
+
+        Returns:
+            (str): file text
+        """
+        return self.read()
+
+    def __getstate__(self):
+        """Get state for pickling.
+
+        Indexes are not pickled, since expressions are pickled to caches
+        along with their parent file.
+
+        Returns:
+            (dict): state
+        """
+        _state = dict(self.__dict__)
+        _state['_indexes'] = {}
+        return _state
+
+    def clear_edits(self):
+        """Discard any edits which haven't been saved."""
+        self._patches = {}
+
+    def has_edits(self):
+        """Test whether this file has edits which haven't been saved.
+
+        Returns:
+            (bool): whether edits are pending
+        """
+        return bool(self._patches)
+
     def update_expr(self, cur_expr, new_expr):
         """Update the given expression for a new one.
 
+        The edit is stored as a patch at the expression's offset, and is
+        applied when the file is saved. Updating an expression which has
+        already been updated replaces the existing patch.
+
         Args:
             cur_expr (MaExprBase): expression to replace
-            new_expr (MaExprBase): expression to replace with
+            new_expr (str): text to replace expression with
         """
-        self._new_body = self._new_body or self.body
-        assert self._new_body.count(cur_expr) == 1
-        self._new_body = self._new_body.replace(cur_expr, new_expr)
+        assert cur_expr.parent is self
+        assert cur_expr.offset is not None
+        self._patches[cur_expr.offset] = (
+            cur_expr.length, cur_expr.body, new_expr)
 
     @property
     def cache_fmt(self):
@@ -158,70 +230,139 @@ class MaFile(File):
         assert _exprs
         return get_single(_exprs)
 
-    def find_exprs(self, type_=None):
+    def find_exprs(self, type_=None, force=False, header=False):
         """Search expressions in this file.
 
+        Only the text of matching expressions is read from disk. Header
+        expression types (eg. file/requires) only appear before the first
+        createNode, so if one of these is requested then only the header
+        of the file is read.
+
         Args:
             type_ (str): match expression type
+            force (bool): force reread index from disk
+            header (bool): only search expressions before the first
+                createNode
 
         Returns:
             (MaExprBase list): matching expressions
         """
+        if header or type_ in _HEADER_TYPES:
+            _index = self._read_header_index(force=force)
+        else:
+            _index = self._read_index(force=force)
+        if type_:
+            _index = [_item for _item in _index if _item[0] == type_]
+
         _exprs = []
-        for _expr in self._read_exprs():
-            if type_ and _expr.type_ != type_:
-                continue
-            _exprs.append(_expr)
+        with open(self.path, 'rb') as _file:
+            for _type, _offset, _length in _index:
+                _file.seek(_offset)
+                _text = _file.read(_length).replace('\r\n', '\n').strip()
+                assert _text.endswith(';')
+                _class = {
+                    'file': _MaExprFile,
+                    'createNode': _MaExprCreateNode,
+                }.get(_type, _MaExprBase)
+                _exprs.append(_class(
+                    _text, parent=self, offset=_offset, length=_length))
         return _exprs
 
-    @store_result
-    def _read_exprs(self, progress=False, verbose=0):
-        """Read expressions in this ma file.
+    def _read_header_index(self, force=False, verbose=0):
+        """Read index of expressions before the first createNode.
 
         Args:
-            progress (bool): show progress bar
+            force (bool): force reread index from disk
             verbose (int): print process data
 
         Returns:
-            (MaExprBase list): matching expressions
+            (tuple list): type/offset/length of each expression
         """
-        from psyhive import qt
+        return self._read_stored_index(
+            stop='createNode', force=force, verbose=verbose)
 
-        _exprs = []
-        _expr_lines = []
-        for _idx, (_last, _line) in qt.progress_bar(
-                enumerate(last(self.read_lines())),
-                show=progress, stack_key='MaParse'):
+    def _read_index(self, force=False, verbose=0):
+        """Read index of expressions in this ma file.
+
+        Args:
+            force (bool): force reread index from disk
+            verbose (int): print process data
+
+        Returns:
+            (tuple list): type/offset/length of each expression
+        """
+        return self._read_stored_index(force=force, verbose=verbose)
+
+    def _read_stored_index(self, stop=None, force=False, verbose=0):
+        """Read an index of this file, using the stored index if possible.
+
+        Indexes are stored with the mtime/size of the file they were
+        read from, so they're reread if the file changes on disk.
 
-            if not _line.strip() or _line.startswith('//'):
-                continue
+        Args:
+            stop (str): stop reading at the first expression of this type
+            force (bool): force reread index from disk
+            verbose (int): print process data
+
+        Returns:
+            (tuple list): type/offset/length of each expression
+        """
+        _stat = os.stat(self.path)
+        _key = _stat.st_mtime, _stat.st_size
+        _stored = self._indexes.get(stop)
+        if force or not _stored or _stored[0] != _key:
+            _index = self._stream_index(stop=stop, verbose=verbose)
+            _stored = self._indexes[stop] = _key, _index
+        return _stored[1]
 
-            if _line[0].isspace() and not _last:
-                _expr_lines.append(_line)
-                continue
+    def _stream_index(self, stop=None, verbose=0):
+        """Stream this file to build an index of its expressions.
 
-            # Add expression to list
-            if _expr_lines:
-                _type = _expr_lines[0].split()[0]
+        The file is streamed line by line - any line which isn't
+        indented, blank or a comment begins a new expression.
+
+        Args:
+            stop (str): stop reading at the first expression of this type
+            verbose (int): print process data
+
+        Returns:
+            (tuple list): type/offset/length of each expression
+        """
+        _index = []
+        _type = _start = _end = None
+        _offset = 0
+        with open(self.path, 'rb') as _file:
+            for _line_n, _line in enumerate(_file):
+
+                _line_offset = _offset
+                _offset += len(_line)
+                if _line[:1] in ' \t':
+                    if _line.strip() and _type:
+                        _end = _offset
+                    continue
+                if not _line.strip() or _line.startswith('//'):
+                    continue
+
+                # Add previous expression to index
+                check_heart()
+                if _type:
+                    _index.append((_type, _start, _end-_start))
+                _type = _line.split(None, 1)[0]
+                if _type == stop:
+                    _type = None
+                    break
                 if _type not in _EXPR_ORDER:
                     raise FileError(
                         'Unhandled ma file declaration '+_type,
-                        line_n=_idx, file_=self.path)
-                _expr_text = '\n'.join(_expr_lines)
-                _expr_text = _expr_text.strip()
-                assert _expr_text.endswith(';')
-                _class = {
-                    'file': _MaExprFile,
-                    'createNode': _MaExprCreateNode,
-                }.get(_type, _MaExprBase)
-                _expr = _class(_expr_text, parent=self)
-                lprint(' - ADD EXPR', _expr, verbose=verbose)
-                _exprs.append(_expr)
+                        line_n=_line_n, file_=self.path)
+                _start = _line_offset
+                _end = _offset
 
-            _expr_lines = [_line]
+        if _type:
+            _index.append((_type, _start, _end-_start))
 
-        lprint('FOUND {:d} EXPRS'.format(len(_exprs)), verbose=verbose)
-        return _exprs
+        lprint('FOUND {:d} EXPRS'.format(len(_index)), verbose=verbose)
+        return _index
 
     def find_create_nodes(self, force=False, type_=None):
         """Find file expressions (references) in this file.
@@ -249,7 +390,11 @@ class MaFile(File):
         Returns:
             (MaExprBase list): matching expressions
         """
-        _files = self._read_files(force=force)
+        _files = []
+        for _file in self._read_files(force=force):
+            _file = copy.copy(_file)  # Cached exprs may have another parent
+            _file.parent = self
+            _files.append(_file)
         if node:
             _files = [_file for _file in _files if _file.node == node]
         if namespace:
@@ -257,18 +402,16 @@ class MaFile(File):
                       if _file.namespace == namespace]
         return _files
 
-    @store_result_content_dependent
-    def find_fps(self):
+    def find_fps(self, force=False):
         """Find fps for this ma file.
 
+        Args:
+            force (bool): force reread header from disk
+
         Returns:
             (float): frame rate
         """
-        _unit = self.find_expr('currentUnit')
-        _time = _unit.read_flag('-t')
-        return {'pal': 25.0,
-                'ntsc': 30.0,
-                'film': 24.0}[_time]
+        return _FPS[self.scan_header(force=force)['units']['time']]
 
     def find_refs(self, force=False):
         """Find references in this ma file.
@@ -287,7 +430,78 @@ class MaFile(File):
             _refs[_file.namespace] = _file
         return sorted(_refs.values())
 
-    @store_result_content_dependent
+    @_store_result_sample_dependent
+    def scan_header(self, force=False):
+        """Scan the header of this file.
+
+        This reads the file/requires/currentUnit/fileInfo declarations,
+        which all appear before the first createNode, so the rest of
+        the file is not read (the cache is checked using a sampled
+        digest rather than a full digest for the same reason).
+
+        If a reference has more than one file declaration then only the
+        last one is used.
+
+        Args:
+            force (bool): force reread header from disk
+
+        Returns:
+            (dict): header data - refs (path/namespace/ref node tuples),
+                requires (plugin versions), units and file_info
+        """
+        return _read_header_data([
+            (_expr.type_, _expr.body)
+            for _expr in self.find_exprs(force=force, header=True)])
+
+    @_store_result_sample_dependent
+    def read_summary(self, force=False):
+        """Read a compact summary of this file.
+
+        This contains the header data, along with a count of the nodes
+        of each type. These are read in a single pass over the file -
+        the header declarations are collected until the first createNode,
+        and then only the createNode lines are read, without parsing
+        their declarations.
+
+        Args:
+            force (bool): force reread summary from disk
+
+        Returns:
+            (dict): summary data - refs (path/namespace/ref node lists),
+                requires, units, fps, n_nodes and node_types (node
+                counts by type)
+        """
+        _exprs = []
+        _node_types = collections.defaultdict(int)
+        with open(self.path, 'rb') as _file:
+            for _line_n, _line in enumerate(_file):
+                if _line.startswith('createNode '):
+                    _node_types[_line.split(None, 2)[1]] += 1
+                elif _node_types:
+                    continue
+                elif _line[:1] in ' \t':
+                    if _exprs and _line.strip():
+                        _exprs[-1][1].append(_line.strip())
+                elif _line.strip() and not _line.startswith('//'):
+                    _type = _line.split(None, 1)[0]
+                    if _type not in _EXPR_ORDER:
+                        raise FileError(
+                            'Unhandled ma file declaration '+_type,
+                            line_n=_line_n, file_=self.path)
+                    _exprs.append((_type, [_line.strip()]))
+        check_heart()
+        _header = _read_header_data([
+            (_type, '\n'.join(_lines)) for _type, _lines in _exprs])
+
+        return {
+            'refs': [list(_ref) for _ref in _header['refs']],
+            'requires': _header['requires'],
+            'units': _header['units'],
+            'fps': _FPS.get(_header['units'].get('time')),
+            'n_nodes': sum(_node_types.values()),
+            'node_types': dict(_node_types)}
+
+    @_store_result_sample_dependent
     def _read_create_nodes(self, force=False):
         """Find file expressions (references) in this file.
 
@@ -297,7 +511,7 @@ class MaFile(File):
         Returns:
             (MaExprCreateNode list): matching expressions
         """
-        return self.find_exprs(type_='createNode')
+        return self.find_exprs(type_='createNode', force=force)
 
     @store_result_content_dependent
     def _read_files(self, force=False):
@@ -309,14 +523,214 @@ class MaFile(File):
         Returns:
             (MaExprFile list): matching expressions
         """
-        return self.find_exprs(type_='file')
+        return self.find_exprs(type_='file', force=force)
 
     def save_as(self, file_, force=False):
         """Save updated version of this file at the given path.
 
+        The file is streamed to the new path with any edits applied. Each
+        patched declaration is checked against the text it was read from,
+        in case this file has changed on disk since it was read.
+
         Args:
             file_ (str): path to save at
             force (bool): overwrite without warning
         """
-        assert self._new_body
-        File(file_).write_text(self._new_body, force=force)
+        _file = File(file_)
+        if not force and _file.exists():
+            from psyhive import qt
+            qt.ok_cancel('Overwrite file?\n\n{}'.format(_file.path))
+        _file.test_dir()
+
+        _tmp = '{}.tmp'.format(_file.path)
+        _pos = 0
+        try:
+            with open(self.path, 'rb') as _src, open(_tmp, 'wb') as _trg:
+                for _offset in sorted(self._patches):
+                    _length, _old, _new = self._patches[_offset]
+                    if _offset < _pos:
+                        raise FileError(
+                            'Overlapping edits at byte {:d}'.format(_offset),
+                            file_=self.path)
+                    _copy_bytes(_src, _trg, _offset-_pos)
+                    _cur = _src.read(_length)
+                    if _cur.replace('\r\n', '\n').strip() != _old:
+                        raise FileError(
+                            'File changed since read (byte {:d})'.format(
+                                _offset),
+                            file_=self.path)
+                    _trg.write(_new+_cur[len(_cur.rstrip()):])
+                    _pos = _offset+_length
+                _copy_bytes(_src, _trg)
+        except (FileError, IOError):
+            if os.path.exists(_tmp):
+                os.remove(_tmp)
+            raise
+
+        if os.name == 'nt' and os.path.exists(_file.path):
+            os.remove(_file.path)
+        os.rename(_tmp, _file.path)
+        self._patches = {}
+        if _file.path == self.path:
+            self._indexes = {}
+
+
+def scan_many(paths, workers=None, class_=None, force=False, verbose=0):
+    """Read summaries of many ma files using a pool of processes.
+
+    Summaries are stored in each file's cache, so only files which have
+    changed since they were last scanned are read. If a file fails to
+    scan, its summary contains an error message instead.
+
+    Args:
+        paths (str list): paths to ma files
+        workers (int): number of processes (by default this is the
+            number of cpus) - 1 scans in the current process
+        class_ (type): MaFile class to scan with (must be picklable)
+        force (bool): force reread summaries from disk
+        verbose (int): print process data
+
+    Returns:
+        (dict list): summary of each file (see MaFile.read_summary),
+            with path and error keys added
+    """
+    _tasks = [(_path, class_ or MaFile, force) for _path in paths]
+    _workers = min(workers or multiprocessing.cpu_count(), len(_tasks))
+    lprint('SCANNING {:d} FILES ({:d} WORKERS)'.format(
+        len(_tasks), _workers), verbose=verbose)
+
+    if _workers <= 1:
+        _results = (_scan_file(_task) for _task in _tasks)
+        _pool = None
+    else:
+        _pool = multiprocessing.Pool(_workers)
+        _results = _pool.imap(_scan_file, _tasks)
+
+    _summaries = []
+    try:
+        for _summary in _results:
+            lprint(' - SCANNED', _summary['path'], _summary['error'] or '',
+                   verbose=verbose)
+            _summaries.append(_summary)
+    except BaseException:
+        if _pool:
+            _pool.terminate()
+        raise
+    if _pool:
+        _pool.close()
+        _pool.join()
+
+    return _summaries
+
+
+def _copy_bytes(src, trg, size=None):
+    """Copy bytes from one open file to another.
+
+    Args:
+        src (file): file to read from
+        trg (file): file to write to
+        size (int): number of bytes to copy (by default the rest of the
+            source file is copied)
+    """
+    while size is None or size > 0:
+        _chunk = src.read(
+            _CHUNK_SIZE if size is None else min(size, _CHUNK_SIZE))
+        if not _chunk:
+            break
+        trg.write(_chunk)
+        if size is not None:
+            size -= len(_chunk)
+
+
+def _read_header_data(exprs):
+    """Read header data from the declarations before the first createNode.
+
+    If a reference has more than one file declaration then only the
+    last one is used.
+
+    Args:
+        exprs (tuple list): type/body of each header declaration
+
+    Returns:
+        (dict): header data - refs (path/namespace/ref node tuples),
+            requires (plugin versions), units and file_info
+    """
+    _refs = collections.OrderedDict()
+    _requires = {}
+    _units = {}
+    _file_info = {}
+    for _type, _body in exprs:
+        _tokens = _split_expr(_body)
+        if _type == 'file':
+            _ref = (_tokens[-1], _read_token_flag(_tokens, '-ns'),
+                    _read_token_flag(_tokens, '-rfn'))
+            _refs.pop(_ref[1], None)
+            _refs[_ref[1]] = _ref
+        elif _type == 'requires':
+            _requires[_tokens[-2]] = _tokens[-1]
+        elif _type == 'currentUnit':
+            for _flag, _name in _UNIT_FLAGS.items():
+                _val = _read_token_flag(_tokens, _flag)
+                if _val:
+                    _units[_name] = _val
+        elif _type == 'fileInfo':
+            _file_info[_tokens[1]] = _tokens[2]
+
+    return {
+        'refs': _refs.values(),
+        'requires': _requires,
+        'units': _units,
+        'file_info': _file_info}
+
+
+def _read_token_flag(tokens, flag):
+    """Read the value of the given flag from a list of tokens.
+
+    Args:
+        tokens (str list): expression tokens
+        flag (str): flag to read (eg. -ns)
+
+    Returns:
+        (str|None): flag value (if flag is present)
+    """
+    if flag not in tokens:
+        return None
+    return tokens[tokens.index(flag)+1]
+
+
+def _scan_file(task):
+    """Read summary of a single ma file.
+
+    This is used by scan_many, so it has to be picklable and catches
+    any errors so that the pool keeps going.
+
+    Args:
+        task (tuple): path to ma file/MaFile class/force flag
+
+    Returns:
+        (dict): summary with path and error keys added
+    """
+    _path, _class, _force = task
+    try:
+        _summary = dict(_class(_path).read_summary(force=_force))
+    except Exception as _exc:  # pylint: disable=broad-except
+        _summary = {'error': '{}: {}'.format(type(_exc).__name__, _exc)}
+    else:
+        _summary['error'] = None
+    _summary['path'] = _path
+    return _summary
+
+
+def _split_expr(body):
+    """Split an expression body into tokens.
+
+    Quotes are removed from quoted tokens, and any escape characters
+    inside them are applied.
+
+    Args:
+        body (str): expression body
+
+    Returns:
+        (str list): tokens
+    """
+    return shlex.split(body.strip().rstrip(';'))
@@ -0,0 +1,204 @@
+"""Tools for reading mb files without maya.
+
+Maya binary files use the IFF format, where the file is made up of
+chunks, each with a four character tag and a size. Group chunks (eg.
+FOR4) also have a four character type and contain other chunks. Files
+saved by 64 bit maya use 8 byte sizes and alignment (eg. FOR8).
+"""
+
+import collections
+import mmap
+import os
+import struct
+
+from .cache import store_result_content_dependent, build_cache_fmt
+from .path import File, FileError
+from .heart import check_heart
+from .misc import lprint
+from .ma_file import _FPS
+
+_FORMATS = {
+    'FOR4': (struct.Struct('>4sL'), 4, ('FOR4', 'LIS4', 'CAT4', 'PRO4')),
+    'FOR8': (struct.Struct('>4s4xQ'), 8, ('FOR8', 'LIS8', 'CAT8', 'PRO8')),
+}
+_UNIT_TAGS = {'LUNI': 'linear', 'AUNI': 'angle', 'TUNI': 'time'}
+
+
+class MbFile(File):
+    """Represents an mb file.
+
+    The file is memory mapped and only the chunk headers are read, apart
+    from the header and reference chunks, so the scene data itself is
+    never loaded.
+    """
+
+    def __init__(self, file_):
+        """Constructor.
+
+        Args:
+            file_ (str): path to mb file
+        """
+        super(MbFile, self).__init__(file_)
+        if not self.extn == 'mb':
+            raise ValueError('Bad extn '+self.extn)
+
+    @property
+    def cache_fmt(self):
+        """Get cache format path.
+
+        Returns:
+            (str): cache format
+        """
+        return build_cache_fmt(self.path, level='project')
+
+    def find_fps(self, force=False):
+        """Find fps for this mb file.
+
+        Args:
+            force (bool): force reread header from disk
+
+        Returns:
+            (float): frame rate
+        """
+        return _FPS[self.scan_header(force=force)['units']['time']]
+
+    @store_result_content_dependent
+    def scan_header(self, force=False, verbose=0):
+        """Scan the header and references of this file.
+
+        This returns the same data as MaFile.scan_header. References are
+        read from FREF chunks - where the namespace/ref node aren't
+        stored with the path, these are None.
+
+        Args:
+            force (bool): force reread header from disk
+            verbose (int): print process data
+
+        Returns:
+            (dict): header data - refs (path/namespace/ref node tuples),
+                requires (plugin versions), units and file_info
+        """
+        _refs = collections.OrderedDict()
+        _requires = {}
+        _units = {}
+        _file_info = {}
+
+        for _tag, _data in self._read_header_chunks(verbose=verbose):
+            _strs = _data.rstrip('\0').split('\0')
+            if _tag == 'FREF':
+                _ref = (_strs[0], _read_str_flag(_strs, '-ns'),
+                        _read_str_flag(_strs, '-rfn'))
+                _refs.pop(_ref[0], None)
+                _refs[_ref[0]] = _ref
+            elif _tag == 'PLUG':
+                _requires[_strs[0]] = _strs[1] if len(_strs) > 1 else None
+            elif _tag in _UNIT_TAGS:
+                _units[_UNIT_TAGS[_tag]] = _strs[0]
+            elif _tag == 'FINF':
+                _file_info[_strs[0]] = _strs[1] if len(_strs) > 1 else ''
+
+        return {
+            'refs': _refs.values(),
+            'requires': _requires,
+            'units': _units,
+            'file_info': _file_info}
+
+    def _read_header_chunks(self, verbose=0):
+        """Read the tag and data of each header/reference chunk.
+
+        The top level chunks of the file are walked by reading their
+        headers, and only the contents of HEAD and FREF chunks are read.
+
+        Args:
+            verbose (int): print process data
+
+        Returns:
+            (tuple list): tag/data of each chunk
+        """
+        _chunks = []
+        if not self.exists() or not os.path.getsize(self.path):
+            raise FileError('Empty or missing file', file_=self.path)
+        with open(self.path, 'rb') as _file:
+            _data = mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if _data[:4] not in _FORMATS:
+                    raise FileError('Not an IFF file', file_=self.path)
+                _fmt = _FORMATS[_data[:4]]
+                _tag, _type, _start, _end = next(_iter_chunks(
+                    _data, 0, len(_data), _fmt, file_=self.path))
+                if _type != 'Maya':
+                    raise FileError(
+                        'Bad IFF form type {}'.format(_type),
+                        file_=self.path)
+
+                for _tag, _type, _start, _end in _iter_chunks(
+                        _data, _start, _end, _fmt, file_=self.path):
+                    check_heart()
+                    if _type in ('HEAD', 'FREF'):
+                        for _child in _iter_chunks(
+                                _data, _start, _end, _fmt, file_=self.path):
+                            if not _child[1]:
+                                _chunks.append(
+                                    (_child[0], _data[_child[2]:_child[3]]))
+                    elif _tag == 'FREF':
+                        _chunks.append((_tag, _data[_start:_end]))
+            finally:
+                _data.close()
+
+        lprint('FOUND {:d} HEADER CHUNKS'.format(len(_chunks)),
+               verbose=verbose)
+        return _chunks
+
+
+def _iter_chunks(data, start, end, fmt, file_):
+    """Iterate over the chunks in the given range of an IFF file.
+
+    For groups, the data range returned is the range of the group's
+    children.
+
+    Args:
+        data (mmap): file data
+        start (int): offset of first chunk
+        end (int): end of range (eg. end of parent group)
+        fmt (tuple): IFF format header struct/alignment/group tags
+        file_ (str): path to file (for errors)
+
+    Returns:
+        (generator): tag/group type/data start/data end of each chunk
+            (group type is None for chunks which aren't groups)
+    """
+    _header, _alignment, _groups = fmt
+    _pos = start
+    while _pos < end:
+        if _pos + _header.size > end:
+            raise FileError(
+                'Truncated chunk header at byte {:d}'.format(_pos),
+                file_=file_)
+        _tag, _size = _header.unpack_from(data, _pos)
+        _start = _pos + _header.size
+        _end = _start + _size
+        if _end > end:
+            raise FileError(
+                'Truncated {} chunk at byte {:d}'.format(_tag, _pos),
+                file_=file_)
+        if _tag in _groups:
+            _children = _start + 4 + (-(_start+4) % _alignment)
+            yield _tag, data[_start:_start+4], _children, _end
+        else:
+            yield _tag, None, _start, _end
+        _pos = _end + (-_end % _alignment)
+
+
+def _read_str_flag(strs, flag):
+    """Read the value of the given flag from a list of strings.
+
+    Args:
+        strs (str list): strings to read from
+        flag (str): flag to read (eg. -ns)
+
+    Returns:
+        (str|None): flag value (if flag is present)
+    """
+    if flag not in strs[:-1]:
+        return None
+    return strs[strs.index(flag)+1]
@@ -4,8 +4,10 @@ from psyhive.utils.path.p_utils import restore_cwd, FileError
 from psyhive.utils.path.p_path import Path
 from psyhive.utils.path.p_file import File
 from psyhive.utils.path.p_dir import Dir
+from psyhive.utils.path.p_find import find, ifind, clear_listing_cache
+from psyhive.utils.path.p_transfer import transfer_files, TransferError
 from psyhive.utils.path.p_tools import (
-    abs_path, read_file, find, write_file, replace_file,
+    abs_path, read_file, write_file, replace_file,
     search_files_for_text, test_path, touch, rel_path,
     diff, write_yaml, read_yaml, nice_size, get_copy_path_fn, get_owner,
     launch_browser, get_path)
@@ -25,19 +25,54 @@ class Dir(Path):
         _path = get_path(path)
         return abs_path(_path).startswith(abs_path(self.path))
 
-    def copy_to(self, trg, force=False):
+    def copy_to(self, trg, force=False, verify=None):
         """Copy this dir to another location.
 
+        Files are copied in parallel using transfer_files, preserving
+        their mtimes/permissions. Links to dirs are followed unless they
+        link back into a dir which is already being copied.
+
         Args:
             trg (str|Dir): target location
             force (bool): replace existing without confirmation
+            verify (str): verify copied files (size/checksum)
         """
         from .p_tools import get_path
+        from .p_transfer import transfer_files
         assert self.exists()
         assert self.is_dir()
         _target = Dir(get_path(trg))
         _target.delete(force=force)
-        shutil.copytree(self.path, _target.path)
+
+        _pairs = []
+        _dirs = []
+        _chains = {self.path: frozenset([os.path.realpath(self.path)])}
+        for _dir, _names, _files in os.walk(self.path, followlinks=True):
+
+            # Ignore links back into the current tree
+            _chain = _chains.pop(_dir)
+            for _name in list(_names):
+                _path = os.path.join(_dir, _name)
+                _real = os.path.realpath(_path)
+                if _real in _chain:
+                    _names.remove(_name)
+                    continue
+                _chains[_path] = _chain | frozenset([_real])
+
+            _trg_dir = _target.path + _dir[len(self.path):]
+            os.makedirs(_trg_dir)
+            _dirs.append((_dir, _trg_dir))
+            _pairs += [
+                (os.path.join(_dir, _file), os.path.join(_trg_dir, _file))
+                for _file in _files]
+        transfer_files(_pairs, verify=verify, preserve=True)
+
+        # Copy dir stats once their contents are in place
+        for _dir, _trg_dir in reversed(_dirs):
+            try:
+                shutil.copystat(_dir, _trg_dir)
+            except OSError:  # Not supported on some filesystems
+                pass
 
     def delete(self, force=False, wording='delete', icon=None):
         """Delete this directory.
@@ -63,9 +98,18 @@ class Dir(Path):
         Returns:
             (str list): list of files
         """
-        from .p_tools import find
+        from .p_find import find
         return find(self.path, **kwargs)
 
+    def ifind(self, **kwargs):
+        """Search for files in this dir, yielding results as they're found.
+
+        Returns:
+            (generator): files
+        """
+        from .p_find import ifind
+        return ifind(self.path, **kwargs)
+
     def find_seqs(self, **kwargs):
         """Find file sequences within this dir.
 
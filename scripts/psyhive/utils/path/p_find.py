@@ -0,0 +1,661 @@
+"""Tools for searching for files/dirs on disk.
+
+Dirs are traversed using scandir so that the type of each entry is read
+from the dir listing itself, rather than requiring a stat for each path.
+The cheap name/extension/filter tests are applied before any type test.
+
+Dir listings are stored in a process-wide cache, along with the type of
+each entry once it has been read. A listing is reused for as long as its
+dir's mtime doesn't change, so reading a dir which has already been
+listed costs a single stat. The cache can be disabled by setting
+$PSYHIVE_DISABLE_LISTING_CACHE (eg. for farm jobs, which only read each
+dir once).
+"""
+
+import collections
+import operator
+import os
+import sys
+import threading
+import time
+
+import six
+
+from ..misc import lprint
+from ..filter_ import compile_filter
+
+try:
+    from os import scandir as _scandir
+except ImportError:
+    try:
+        from scandir import scandir as _scandir
+    except ImportError:
+        _scandir = None
+
+_FIND_QUEUE_SIZE = 4
+
+_LISTING_CACHE = collections.OrderedDict()
+_LISTING_CACHE_LOCK = threading.Lock()
+_LISTING_CACHE_SIZE = 5000
+
+# Dirs modified more recently than this (in secs) are not cached as a
+# further change within the same mtime tick would not be detected
+_LISTING_CACHE_MIN_AGE = 2.0
+
+
+class _CachedEntry(object):
+    """Dir entry stored in the listing cache.
+
+    The types of the entry are only read when they're first needed, and
+    are then stored. A scandir entry reads its type from the listing where
+    the filesystem provides it, but otherwise (and for symlinks) a type
+    test requires a stat, so types are not read when the listing is read.
+    """
+
+    def __init__(self, entry):
+        """Constructor.
+
+        Args:
+            entry (DirEntry): entry to read
+        """
+        self.name = entry.name
+        self.path = entry.path
+        self._entry = entry
+        self._types = {}
+
+    def is_dir(self):
+        """Test if this entry is a dir.
+
+        Returns:
+            (bool): whether dir
+        """
+        return self._read_type('is_dir')
+
+    def is_file(self):
+        """Test if this entry is a file.
+
+        Returns:
+            (bool): whether file
+        """
+        return self._read_type('is_file')
+
+    def is_symlink(self):
+        """Test if this entry is a symlink.
+
+        Returns:
+            (bool): whether symlink
+        """
+        return self._read_type('is_symlink')
+
+    def _read_type(self, test):
+        """Read a type test result, applying the test if it's not stored.
+
+        Args:
+            test (str): name of entry type test method
+
+        Returns:
+            (bool): test result
+        """
+        if test not in self._types:
+            self._types[test] = getattr(self._entry, test)()
+        return self._types[test]
+
+
+class _ListdirEntry(object):
+    """Fallback for a scandir DirEntry if scandir is not available.
+
+    Type tests are stat based, but are only applied if they're needed.
+    """
+
+    def __init__(self, dir_, name):
+        """Constructor.
+
+        Args:
+            dir_ (str): parent dir
+            name (str): entry name
+        """
+        self.name = name
+        self.path = os.path.join(dir_, name)
+
+    def is_dir(self):
+        """Test if this entry is a dir.
+
+        Returns:
+            (bool): whether dir
+        """
+        return os.path.isdir(self.path)
+
+    def is_file(self):
+        """Test if this entry is a file.
+
+        Returns:
+            (bool): whether file
+        """
+        return os.path.isfile(self.path)
+
+    def is_symlink(self):
+        """Test if this entry is a symlink.
+
+        Returns:
+            (bool): whether symlink
+        """
+        return os.path.islink(self.path)
+
+
+def find(
+        dir_=None, type_=None, extn=None, filter_=None, base=None, depth=-1,
+        name=None, full_path=True, class_=None, catch_missing=False,
+        workers=None, verbose=0):
+    """Find files/dirs in a given path.
+
+    Args:
+        dir_ (str): override root path
+        type_ (str): filter by path type (f=files, d=dirs, l=links)
+        extn (str): filter by extension
+        filter_ (str): apply filter to the list
+        base (str): filter by file basename
+        depth (int): max dir depth to traverse (-1 means unlimited)
+        name (str): match exact file/dir name
+        full_path (bool): return full path to file
+        class_ (type): cast results to this type
+        catch_missing (bool): allow the parent dir to be missing
+        workers (int): list dirs in parallel using this number of
+            threads - this is faster where dir listings have high
+            latency (eg. on a network filesystem)
+        verbose (int): print process data
+
+    Returns:
+        (str list): paths found
+    """
+    _dir = _find_read_root(
+        dir_=dir_, type_=type_, extn=extn, catch_missing=catch_missing)
+    _kwargs = dict(
+        dir_=_dir, depth=depth, type_=type_, extn=extn,
+        filter_=compile_filter(filter_) if filter_ else None, base=base,
+        name=name, verbose=verbose)
+    if workers:
+        _results = sorted(_find_walk_parallel(workers=workers, **_kwargs))
+    else:
+        _results = sorted(_find_walk(**_kwargs))
+
+    if not full_path:
+        _results = [
+            _result.replace(_dir+'/', '') for _result in _results]
+
+    # Apply class cast
+    if class_:
+        _results = _find_cast_results_by_class(
+            results=_results, class_=class_)
+
+    return _results
+
+
+def ifind(
+        dir_=None, type_=None, extn=None, filter_=None, base=None, depth=-1,
+        name=None, full_path=True, class_=None, catch_missing=False,
+        sort=True, limit=None, workers=None, verbose=0):
+    """Find files/dirs in a given path, yielding results as they're found.
+
+    This can be used instead of find where the results are only iterated
+    once, or where only the first result(s) are needed, since the walk
+    stops as soon as the caller stops iterating.
+
+    Args:
+        dir_ (str): override root path
+        type_ (str): filter by path type (f=files, d=dirs, l=links)
+        extn (str): filter by extension
+        filter_ (str): apply filter to the list
+        base (str): filter by file basename
+        depth (int): max dir depth to traverse (-1 means unlimited)
+        name (str): match exact file/dir name
+        full_path (bool): return full path to file
+        class_ (type): cast results to this type (results which
+            raise ValueError are ignored)
+        catch_missing (bool): allow the parent dir to be missing
+        sort (bool): yield results in the same order as find (otherwise
+            they are yielded in dir listing order)
+        limit (int): stop after this number of results
+        workers (int): list dirs in parallel using this number of
+            threads (if sort is used, the walk completes before any
+            results are yielded)
+        verbose (int): print process data
+
+    Returns:
+        (generator): paths found
+    """
+    _dir = _find_read_root(
+        dir_=dir_, type_=type_, extn=extn, catch_missing=catch_missing)
+    _kwargs = dict(
+        dir_=_dir, depth=depth, type_=type_, extn=extn,
+        filter_=compile_filter(filter_) if filter_ else None, base=base,
+        name=name, verbose=verbose)
+    if workers:
+        _walk = _find_walk_parallel(workers=workers, **_kwargs)
+        if sort:
+            _walk = iter(sorted(_walk))
+    else:
+        _walk = _find_walk(sort=sort, **_kwargs)
+    return _ifind_results(
+        _walk, dir_=_dir, full_path=full_path, class_=class_, limit=limit)
+
+
+def _ifind_results(walk, dir_, full_path, class_, limit):
+    """Yield results from a find walk.
+
+    Args:
+        walk (generator): find walk
+        dir_ (str): root dir of walk
+        full_path (bool): return full path to file
+        class_ (type): cast results to this type
+        limit (int): stop after this number of results
+
+    Returns:
+        (generator): results
+    """
+    if limit is not None and limit <= 0:
+        return
+    _count = 0
+    for _result in walk:
+
+        if not full_path:
+            _result = _result.replace(dir_+'/', '')
+        if class_:
+            try:
+                _result = class_(_result)
+            except ValueError:
+                continue
+
+        yield _result
+        _count += 1
+        if limit is not None and _count >= limit:
+            return
+
+
+def _find_cast_results_by_class(results, class_):
+    """Cast find results to the given class.
+
+    Any that raise ValueError are ignored.
+
+    Args:
+        results (str list): list of result to cast
+        class_ (type): type to cast to
+
+    Returns:
+        (list): castest results
+    """
+    _class_results = []
+    for _result in results:
+        try:
+            _result = class_(_result)
+        except ValueError:
+            continue
+        _class_results.append(_result)
+    return _class_results
+
+
+def _find_name_passes_filters(filename, path, extn, base, filter_, name):
+    """Test if a path passes the find filters which don't need a stat.
+
+    Args:
+        filename (str): file/dir name
+        path (str): full path
+        extn (str): filter by extension
+        base (str): filter by file basename
+        filter_ (Filter): compiled filter to apply
+        name (str): match exact file/dir name
+
+    Returns:
+        (bool): whether path passes filters
+    """
+    if name and filename != name:
+        return False
+    if extn and (
+            '.' not in filename or
+            filename[filename.rfind('.')+1:] != extn):
+        return False
+    if base and not filename.startswith(base):
+        return False
+    if filter_ and not filter_.match(path):
+        return False
+    return True
+
+
+def _find_entry_passes_filters(
+        entry, path, is_dir, type_, extn, filter_, base, name, verbose=0):
+    """Test if a dir entry passes the find filters.
+
+    Args:
+        entry (DirEntry): entry to test
+        path (str): full path to entry
+        is_dir (bool|None): whether entry is a dir (if already known)
+        type_ (str): filter by path type (f=files, d=dirs, l=links)
+        extn (str): filter by extension
+        filter_ (Filter): compiled filter to apply
+        base (str): filter by file basename
+        name (str): match exact file/dir name
+        verbose (int): print process data
+
+    Returns:
+        (bool): whether entry passes filters
+    """
+    lprint('TESTING', path, entry.name, verbose=verbose)
+    if not _find_name_passes_filters(
+            filename=entry.name, path=path, extn=extn, base=base,
+            filter_=filter_, name=name):
+        lprint(' - FILTERED', verbose=verbose)
+        return False
+    if not _find_entry_passes_type(entry, is_dir=is_dir, type_=type_):
+        lprint(' - BAD TYPE', verbose=verbose)
+        return False
+    return True
+
+
+def _find_entry_passes_type(entry, is_dir, type_):
+    """Test if a dir entry passes the find type filter.
+
+    Args:
+        entry (DirEntry): entry to test
+        is_dir (bool|None): whether entry is a dir (if already known)
+        type_ (str): filter by path type (f=files, d=dirs, l=links)
+
+    Returns:
+        (bool): whether entry passes type filter
+    """
+    if type_ is None:
+        return True
+    elif type_ == 'd':
+        return is_dir if is_dir is not None else _entry_is_dir(entry)
+    elif type_ == 'f':
+        return _entry_is_file(entry)
+    elif type_ == 'l':
+        return entry.is_symlink()
+    raise ValueError(type_)
+
+
+def _entry_is_dir(entry):
+    """Test if the given dir entry is a dir (following links).
+
+    Args:
+        entry (DirEntry): entry to test
+
+    Returns:
+        (bool): whether dir
+    """
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _entry_is_file(entry):
+    """Test if the given dir entry is a file (following links).
+
+    Args:
+        entry (DirEntry): entry to test
+
+    Returns:
+        (bool): whether file
+    """
+    try:
+        return entry.is_file()
+    except OSError:
+        return False
+
+
+def _find_walk(
+        dir_, depth, type_, extn, filter_, base, name, sort=False,
+        verbose=0):
+    """Walk the given dir yielding paths which pass the find filters.
+
+    If sort is used, entries are yielded in order of their full path. A
+    subdir's contents are sorted using its name with a trailing slash as
+    a key, which places them correctly in relation to any siblings which
+    share the subdir's name as a prefix (eg. "blah.txt" < "blah/a.txt").
+
+    Args:
+        dir_ (str): absolute path to dir to walk
+        depth (int): max dir depth to traverse (-1 means unlimited)
+        type_ (str): filter by path type (f=files, d=dirs, l=links)
+        extn (str): filter by extension
+        filter_ (Filter): compiled filter to apply
+        base (str): filter by file basename
+        name (str): match exact file/dir name
+        sort (bool): yield results in sorted order
+        verbose (int): print process data
+
+    Returns:
+        (generator): paths found
+    """
+    _depth = max(depth - 1, -1)
+
+    # Build list of entries and subdirs to recurse into
+    _items = []
+    for _entry, _is_dir in _find_list_dir(dir_, depth=depth):
+        _items.append((_entry.name, False, _entry, _is_dir))
+        if _is_dir:
+            _items.append((_entry.name+'/', True, _entry, _is_dir))
+    if sort:
+        _items.sort(key=operator.itemgetter(0))
+
+    for _, _is_subdir, _entry, _is_dir in _items:
+
+        _path = '{}/{}'.format(dir_.rstrip('/'), _entry.name)
+
+        # Recurse into subdirs
+        if _is_subdir:
+            for _result in _find_walk(
+                    _path, depth=_depth, type_=type_, extn=extn,
+                    filter_=filter_, base=base, name=name, sort=sort,
+                    verbose=verbose):
+                yield _result
+            continue
+
+        if _find_entry_passes_filters(
+                _entry, path=_path, is_dir=_is_dir, type_=type_, extn=extn,
+                filter_=filter_, base=base, name=name, verbose=verbose):
+            yield _path
+
+
+def _find_walk_parallel(
+        dir_, depth, type_, extn, filter_, base, name, workers, verbose=0):
+    """Walk the given dir listing subdirs in parallel.
+
+    Dirs to list are passed to a pool of worker threads through a bounded
+    queue - the calling thread applies the filters to each listing as it
+    arrives and queues any subdirs. Results are yielded in the order that
+    listings complete.
+
+    Args:
+        dir_ (str): absolute path to dir to walk
+        depth (int): max dir depth to traverse (-1 means unlimited)
+        type_ (str): filter by path type (f=files, d=dirs, l=links)
+        extn (str): filter by extension
+        filter_ (Filter): compiled filter to apply
+        base (str): filter by file basename
+        name (str): match exact file/dir name
+        workers (int): number of worker threads
+        verbose (int): print process data
+
+    Returns:
+        (generator): paths found
+    """
+    _tasks = six.moves.queue.Queue(maxsize=workers*_FIND_QUEUE_SIZE)
+    _listings = six.moves.queue.Queue()
+    _stop = threading.Event()
+    _threads = []
+    for _ in range(workers):
+        _thread = threading.Thread(
+            target=_find_list_dir_worker, args=(_tasks, _listings, _stop))
+        _thread.daemon = True
+        _thread.start()
+        _threads.append(_thread)
+
+    _pending = collections.deque([(dir_, depth)])
+    _queued = 0
+    try:
+        while _pending or _queued:
+
+            # Queue as many dirs as the queue allows
+            while _pending:
+                try:
+                    _tasks.put_nowait(_pending[0])
+                except six.moves.queue.Full:
+                    break
+                _pending.popleft()
+                _queued += 1
+
+            # Process next listing
+            _dir, _depth, _items, _exc_info = _listings.get()
+            _queued -= 1
+            if _exc_info:
+                six.reraise(*_exc_info)
+            for _entry, _is_dir in _items:
+                _path = '{}/{}'.format(_dir.rstrip('/'), _entry.name)
+                if _is_dir:
+                    _pending.append((_path, max(_depth - 1, -1)))
+                if _find_entry_passes_filters(
+                        _entry, path=_path, is_dir=_is_dir, type_=type_,
+                        extn=extn, filter_=filter_, base=base, name=name,
+                        verbose=verbose):
+                    yield _path
+
+    finally:
+        _stop.set()
+        for _ in _threads:
+            _tasks.put(None)
+
+
+def _find_list_dir(dir_, depth):
+    """List the given dir, reading which entries are dirs to recurse into.
+
+    Args:
+        dir_ (str): dir to list
+        depth (int): depth of walk remaining at this dir
+
+    Returns:
+        (tuple list): entry/is dir (None if not needed) pairs
+    """
+    _recurse = max(depth - 1, -1)
+    return [(_entry, _entry_is_dir(_entry) if _recurse else None)
+            for _entry in _read_dir(dir_)]
+
+
+def _find_list_dir_worker(tasks, listings, stop):
+    """Worker which lists dirs for a parallel find walk.
+
+    Args:
+        tasks (Queue): dir/depth pairs to list (None to exit)
+        listings (Queue): queue to put dir/depth/items/exc info to
+        stop (Event): set when the walk has stopped
+    """
+    while True:
+        _task = tasks.get()
+        if _task is None:
+            return
+        if stop.is_set():
+            continue
+        _dir, _depth = _task
+        try:
+            _items = _find_list_dir(_dir, depth=_depth)
+        except Exception:  # pylint: disable=broad-except
+            listings.put((_dir, _depth, None, sys.exc_info()))
+        else:
+            listings.put((_dir, _depth, _items, None))
+
+
+def _find_read_root(dir_, type_, extn, catch_missing):
+    """Read and check the root dir for a find.
+
+    Args:
+        dir_ (str): root dir (None for cwd)
+        type_ (str): type filter to check
+        extn (str): extension filter to check
+        catch_missing (bool): error if the root dir is missing
+
+    Returns:
+        (str): absolute path to root dir
+    """
+    from .p_tools import abs_path
+
+    _dir = abs_path(dir_ or os.getcwd())
+    if extn and extn.startswith('.'):
+        raise ValueError("Extn should not start with period - "+extn)
+    if type_ not in (None, 'd', 'f', 'l'):
+        raise ValueError(type_)
+    if catch_missing and not os.path.exists(_dir):
+        raise OSError("Missing dir "+_dir)
+    return _dir
+
+
+def clear_listing_cache(prefix=None):
+    """Clear the dir listing cache.
+
+    Args:
+        prefix (str): only clear listings of this dir and its subdirs
+    """
+    from .p_tools import abs_path
+
+    with _LISTING_CACHE_LOCK:
+        if not prefix:
+            _LISTING_CACHE.clear()
+            return
+        _prefix = abs_path(prefix).rstrip('/')
+        for _dir in list(_LISTING_CACHE):
+            if _dir == _prefix or _dir.startswith(_prefix+'/'):
+                del _LISTING_CACHE[_dir]
+
+
+def _read_dir(dir_):
+    """Read the entries in the given dir.
+
+    If the dir's listing is cached and its mtime hasn't changed then the
+    cached listing is used.
+
+    Args:
+        dir_ (str): dir to read
+
+    Returns:
+        (DirEntry list): entries (empty if the dir can't be read)
+    """
+    if os.environ.get('PSYHIVE_DISABLE_LISTING_CACHE'):
+        return _list_dir(dir_)
+
+    try:
+        _mtime = os.stat(dir_).st_mtime
+    except OSError:
+        return []
+    with _LISTING_CACHE_LOCK:
+        _cached = _LISTING_CACHE.pop(dir_, None)
+        if _cached and _cached[0] == _mtime:
+            _LISTING_CACHE[dir_] = _cached
+            return _cached[1]
+
+    _entries = [_CachedEntry(_entry) for _entry in _list_dir(dir_)]
+    if time.time() - _mtime > _LISTING_CACHE_MIN_AGE:
+        with _LISTING_CACHE_LOCK:
+            _LISTING_CACHE[dir_] = _mtime, _entries
+            while len(_LISTING_CACHE) > _LISTING_CACHE_SIZE:
+                _LISTING_CACHE.popitem(last=False)
+
+    return _entries
+
+
+def _list_dir(dir_):
+    """List the entries in the given dir.
+
+    Args:
+        dir_ (str): dir to list
+
+    Returns:
+        (DirEntry list): entries (empty if the dir can't be read)
+    """
+    if _scandir:
+        try:
+            return list(_scandir(dir_))
+        except OSError:
+            return []
+    try:
+        _names = os.listdir(dir_)
+    except OSError:
+        return []
+    return [_ListdirEntry(dir_, _name) for _name in _names]
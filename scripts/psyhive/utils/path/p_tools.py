@@ -15,23 +15,100 @@ from ..filter_ import passes_filter
 from .p_file import File
 from .p_dir import Dir
 
+_ABS_PATHS = {}
+_ABS_PATHS_SIZE = 20000
+_ABS_PATH_DIRTY_TOKENS = (
+    '\\', '//', '/./', '../', '~', '/la1nas006/homedir/hvanderbeek')
+
 
 def abs_path(path, win=False, root=None, verbose=0):
     """Get the absolute path for the given path.
 
+    Results are memoised, except for paths which depend on the cwd or
+    home dir. Paths which are already clean absolute paths are returned
+    without being processed.
+
     Args:
         path (str): path to check
         win (bool): format for windows using escape chars
         root (str): override root dir (otherwise cwd is used)
         verbose (int): print process data
     """
-    _path = get_path(path)
-    if not isinstance(_path, six.string_types):
-        raise ValueError(_path)
-    lprint('USING PATH', _path, verbose=verbose)
+    if not (win or verbose):
+        try:
+            return _ABS_PATHS[path]
+        except (KeyError, TypeError):  # Not memoised/unhashable
+            pass
+
+    if isinstance(path, six.string_types):
+        _path = path
+    else:
+        _path = get_path(path)
+        if not isinstance(_path, six.string_types):
+            raise ValueError(_path)
+
+    if verbose:
+        _result, _ = _read_abs_path(_path, root=root, verbose=verbose)
+    else:
+        _result = _ABS_PATHS.get(_path)
+        if _result is None:
+            if _is_clean_abs_path(_path):
+                _result, _cacheable = str(_path), True
+            else:
+                _result, _cacheable = _read_abs_path(_path, root=root)
+            if _cacheable:
+                if len(_ABS_PATHS) >= _ABS_PATHS_SIZE:
+                    _ABS_PATHS.clear()
+                _ABS_PATHS[_path] = _result
+
+    if win:
+        return _result.replace('/', '\\')
+    return _result
+
+
+def _is_clean_abs_path(path):
+    """Test whether the given path is already a clean absolute path.
+
+    These paths would be returned unchanged by abs_path.
+
+    Args:
+        path (str): path to test
+
+    Returns:
+        (bool): whether path is clean
+    """
+    if path.startswith('/'):
+        _slash = path.find('/', 1)
+        _root = path[1:_slash] if _slash != -1 else path[1:]
+        if len(_root) == 1:  # MINGW64 drive
+            return False
+    elif len(path) >= 2 and path[1] == ':':
+        if path[0] != path[0].upper():
+            return False
+    else:
+        return False
+    for _token in _ABS_PATH_DIRTY_TOKENS:
+        if _token in path:
+            return False
+    return True
+
+
+def _read_abs_path(path, root=None, verbose=0):
+    """Read the absolute path for the given path.
+
+    Args:
+        path (str): path to read
+        root (str): override root dir (otherwise cwd is used)
+        verbose (int): print process data
+
+    Returns:
+        (tuple): absolute path, whether the result can be memoised
+    """
+    _cacheable = True
+    lprint('USING PATH', path, verbose=verbose)
 
     # Clean path
-    _path = str(_path)
+    _path = str(path)
     for _find, _replace in [
             ('\\', '/'),
             ('//', '/'),
@@ -52,6 +129,7 @@ def abs_path(path, win=False, root=None, verbose=0):
     ]:
         _path = _path.replace(_find, _replace)
     if _path.startswith('~/'):
+        _cacheable = False
         _home = os.environ.get('HOME') or os.environ.get('HOMEDRIVE')
         if not _home:
             raise RuntimeError('Unable to find home dir')
@@ -62,6 +140,7 @@ def abs_path(path, win=False, root=None, verbose=0):
     if not (
             _path.startswith('/') or
             (len(_path) >= 2 and _path[1] == ':')):
+        _cacheable = False
         _root = abs_path(root or os.getcwd())
         lprint(' - ADDING ROOT', _root, verbose=verbose)
         _path = '{}/{}'.format(_root, _path).replace('/./', '/')
@@ -85,10 +164,8 @@ def abs_path(path, win=False, root=None, verbose=0):
     if len(_path) >= 2 and _path[1] == ':':
         _path = _path[0].upper() + _path[1:]
 
-    if win:
-        return _path.replace('/', '\\')
     lprint(' - RESULT', _path, verbose=verbose)
-    return _path
+    return _path, _cacheable
 
 
 def diff(left, right, tool=None, label=None, check_extn=True):
@@ -115,156 +192,6 @@ def diff(left, right, tool=None, label=None, check_extn=True):
     system(_cmds, verbose=1)
 
 
-def _find_cast_results_by_class(results, class_):
-    """Cast find results to the given class.
-
-    Any that raise ValueError are ignored.
-
-    Args:
-        results (str list): list of result to cast
-        class_ (type): type to cast to
-
-    Returns:
-        (list): castest results
-    """
-    _class_results = []
-    for _result in results:
-        try:
-            _result = class_(_result)
-        except ValueError:
-            continue
-        _class_results.append(_result)
-    return _class_results
-
-
-def find(
-        dir_=None, type_=None, extn=None, filter_=None, base=None, depth=-1,
-        name=None, full_path=True, class_=None, catch_missing=False,
-        verbose=0):
-    """Find files/dirs in a given path.
-
-    Args:
-        dir_ (str): override root path
-        type_ (str): filter by path type (f=files, d=dirs, l=links)
-        extn (str): filter by extension
-        filter_ (str): apply filter to the list
-        base (str): filter by file basename
-        depth (int): max dir depth to traverse (-1 means unlimited)
-        name (str): match exact file/dir name
-        full_path (bool): return full path to file
-        class_ (type): cast results to this type
-        catch_missing (bool): allow the parent dir to be missing
-        verbose (int): print process data
-
-    Returns:
-        (str list): paths found
-    """
-    _kwargs = locals()
-    _kwargs.pop('dir_')
-    _kwargs.pop('depth')
-    _kwargs.pop('full_path')
-    _kwargs.pop('class_')
-
-    _results = []
-    _dir = abs_path(dir_ or os.getcwd())
-
-    if extn and extn.startswith('.'):
-        raise ValueError("Extn should not start with period - "+extn)
-
-    # Get a list of files in dir
-    if catch_missing and not os.path.exists(_dir):
-        raise OSError("Missing dir "+_dir)
-    try:
-        _files = os.listdir(_dir)
-    except OSError:
-        _files = []
-
-    for _file in _files:
-
-        _path = abs_path('{}/{}'.format(_dir, _file))
-        lprint('TESTING', _path, _file, verbose=verbose)
-
-        # Recurse into subdirs
-        _is_dir = os.path.isdir(_path)
-        if _is_dir:
-            _depth = max(depth - 1, -1)
-            if _depth:
-                _results += find(_path, depth=_depth, **_kwargs)
-
-        # Apply filters
-        if not _find_path_passes_filters(
-                path=_path, is_dir=_is_dir, type_=type_, name=name,
-                filter_=filter_, base=base, extn=extn):
-            continue
-
-        _results.append(_path)
-
-    if not full_path:
-        _results = [
-            _result.replace(_dir+'/', '') for _result in _results]
-
-    # Apply class cast
-    if class_:
-        _results = _find_cast_results_by_class(
-            results=_results, class_=class_)
-
-    return sorted(_results)
-
-
-def _find_path_passes_filters(path, is_dir, type_, extn, base, filter_,
-                              name, verbose=0):
-    """Test if a path passes find filters.
-
-    Args:
-        path (str): path to test
-        is_dir (bool): whether path is a dir
-        type_ (str): filter by path type (f=files, d=dirs, l=links)
-        extn (str): filter by extension
-        base (str): filter by file basename
-        filter_ (str): apply filter to the list
-        name (str): match exact file/dir name
-        verbose (int): print process data
-
-    Returns:
-        (bool): whether path passes filters
-    """
-    from .p_path import Path
-
-    # Apply type filter
-    if type_ is None:
-        pass
-    elif type_ == 'd':
-        if not is_dir:
-            return False
-    elif type_ == 'f':
-        if not os.path.isfile(path):
-            lprint(' - NOT FILE', verbose=verbose)
-            return False
-    elif type_ == 'l':
-        if not os.path.islink(path):
-            return False
-    elif type_:
-        raise ValueError(type_)
-
-    # Apply other filters
-    _path = Path(path)
-    if extn and not _path.extn == extn:
-        lprint(' - BAD EXTN', verbose=verbose)
-        _result = False
-    elif base and not _path.filename.startswith(base):
-        _result = False
-    elif filter_ and not passes_filter(path, filter_):
-        lprint(' - FILTERED', verbose=verbose)
-        _result = False
-    elif name and not _path.filename == name:
-        lprint(' - NAME FILTER', verbose=verbose)
-        _result = False
-    else:
-        _result = True
-
-    return _result
-
-
 def get_copy_path_fn(path):
     """Get function to copy the given path.
 
@@ -0,0 +1,264 @@
+"""Tools for copying/moving files in bulk."""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import six
+
+from ..misc import lprint
+
+_CHECKSUM_CHUNK = 1024*1024
+_RETRY_WAIT = 0.5
+_WORKERS = 8
+
+
+class TransferError(RuntimeError):
+    """Raised when files fail to transfer."""
+
+    def __init__(self, failed):
+        """Constructor.
+
+        Args:
+            failed (tuple list): source/target/error of each failed file
+        """
+        super(TransferError, self).__init__(
+            'Failed to transfer {:d} file{}: {}'.format(
+                len(failed), '' if len(failed) == 1 else 's',
+                ', '.join([_src for _src, _, _ in failed[:5]])))
+        self.failed = failed
+
+
+def transfer_files(
+        pairs, mode='copy', workers=_WORKERS, retries=2, verify=None,
+        preserve=False, manifest=None, progress=None, parent=None,
+        callback=None, verbose=0):
+    """Copy or move a list of files using a pool of threads.
+
+    Each file is copied to a tmp file alongside the target and then
+    renamed, so an interrupted transfer never leaves a partial file at
+    the target path. In move mode, files are renamed where possible, and
+    only copied if the rename fails (eg. across filesystems).
+
+    If a manifest is used, each completed file is recorded in it so that
+    if the transfer is interrupted, running it again with the same
+    manifest will skip the files which were already transferred. The
+    manifest is removed once all files have been transferred.
+
+    Args:
+        pairs (tuple list): source/target path of each file
+        mode (str): transfer mode (copy/move)
+        workers (int): number of threads
+        retries (int): number of times to retry a failed file
+        verify (str): verify copied files (size/checksum)
+        preserve (bool): preserve mtimes/permissions of copied files (as
+            shutil.copy2) - these are always preserved in move mode
+        manifest (str): path to manifest file for resuming transfers
+        progress (str): show a progress bar with this title
+        parent (QDialog): parent dialog for progress bar
+        callback (fn): called with source/target/error as each file
+            completes (this is called in the calling thread)
+        verbose (int): print process data
+
+    Returns:
+        (tuple list): source/target of files transferred
+
+    Raises:
+        (TransferError): if any files failed to transfer
+    """
+    assert mode in ['copy', 'move']
+    assert verify in [None, 'size', 'checksum']
+
+    # Skip files already in manifest
+    _pairs = [tuple(_pair) for _pair in pairs]
+    if manifest:
+        _done = _read_manifest(manifest)
+        _pairs = [_pair for _pair in _pairs if _pair not in _done]
+        lprint('SKIPPING {:d} FILES IN MANIFEST {}'.format(
+            len(_done), manifest), verbose=verbose if _done else 0)
+    lprint('TRANSFERRING {:d} FILES ({})'.format(len(_pairs), mode),
+           verbose=verbose)
+
+    # Start workers
+    _tasks = six.moves.queue.Queue()
+    _results = six.moves.queue.Queue()
+    _stop = threading.Event()
+    for _pair in _pairs:
+        _tasks.put(_pair)
+    for _ in range(min(workers, len(_pairs))):
+        _tasks.put(None)
+        _thread = threading.Thread(
+            target=_transfer_worker,
+            args=(_tasks, _results, _stop),
+            kwargs=dict(mode=mode, retries=retries, verify=verify,
+                        preserve=preserve))
+        _thread.daemon = True
+        _thread.start()
+
+    # Read results as files complete
+    _items = _pairs
+    if progress and _pairs:
+        from psyhive import qt
+        _items = qt.progress_bar(_pairs, progress, parent=parent)
+    _transferred = []
+    _failed = []
+    _manifest = open(manifest, 'a') if manifest and _pairs else None
+    try:
+        for _ in _items:
+            _src, _trg, _error = _results.get()
+            if _error:
+                lprint(' - FAILED', _src, _error, verbose=verbose)
+                _failed.append((_src, _trg, _error))
+            else:
+                lprint(' - TRANSFERRED', _trg, verbose=verbose > 1)
+                _transferred.append((_src, _trg))
+                if _manifest:
+                    _manifest.write(json.dumps([_src, _trg])+'\n')
+                    _manifest.flush()
+            if callback:
+                callback(_src, _trg, _error)
+    finally:
+        _stop.set()
+        if _manifest:
+            _manifest.close()
+
+    if _failed:
+        raise TransferError(_failed)
+    if manifest and os.path.exists(manifest):
+        os.remove(manifest)
+
+    return _transferred
+
+
+def _get_checksum(path):
+    """Get checksum of the given file.
+
+    Args:
+        path (str): path to file
+
+    Returns:
+        (str): md5 checksum
+    """
+    _md5 = hashlib.md5()
+    with open(path, 'rb') as _file:
+        while True:
+            _chunk = _file.read(_CHECKSUM_CHUNK)
+            if not _chunk:
+                break
+            _md5.update(_chunk)
+    return _md5.hexdigest()
+
+
+def _read_manifest(path):
+    """Read files recorded in the given transfer manifest.
+
+    Args:
+        path (str): path to manifest
+
+    Returns:
+        (set): source/target of files already transferred
+    """
+    _done = set()
+    if not os.path.exists(path):
+        return _done
+    with open(path) as _file:
+        for _line in _file:
+            try:
+                _src, _trg = json.loads(_line)
+            except ValueError:  # Line interrupted mid write
+                continue
+            _done.add((_src, _trg))
+    return _done
+
+
+def _transfer_file(src, trg, mode, verify, preserve=False):
+    """Transfer a single file.
+
+    Args:
+        src (str): source path
+        trg (str): target path
+        mode (str): transfer mode (copy/move)
+        verify (str): verify copied file (size/checksum)
+        preserve (bool): preserve mtime/permissions of copied file
+    """
+    _dir = os.path.dirname(trg)
+    if not os.path.exists(_dir):
+        try:
+            os.makedirs(_dir)
+        except OSError:  # Created by another thread
+            if not os.path.isdir(_dir):
+                raise
+
+    # Try rename if moving on same filesystem
+    if mode == 'move':
+        if os.name == 'nt' and os.path.exists(trg):
+            os.remove(trg)
+        try:
+            os.rename(src, trg)
+        except OSError:
+            pass
+        else:
+            return
+
+    # Copy via tmp file
+    _tmp = '{}.transfer.tmp'.format(trg)
+    try:
+        if mode == 'move' or preserve:
+            shutil.copy2(src, _tmp)
+        else:
+            shutil.copy(src, _tmp)
+        if verify == 'size' and (
+                os.path.getsize(src) != os.path.getsize(_tmp)):
+            raise IOError('Size mismatch '+trg)
+        elif verify == 'checksum' and (
+                _get_checksum(src) != _get_checksum(_tmp)):
+            raise IOError('Checksum mismatch '+trg)
+        if os.name == 'nt' and os.path.exists(trg):
+            os.remove(trg)
+        os.rename(_tmp, trg)
+    except (IOError, OSError):
+        if os.path.exists(_tmp):
+            os.remove(_tmp)
+        raise
+
+    if mode == 'move':
+        os.remove(src)
+
+
+def _transfer_worker(
+        tasks, results, stop, mode, retries, verify, preserve=False):
+    """Transfer files from a task queue until a None task is received.
+
+    Args:
+        tasks (Queue): source/target pairs to transfer
+        results (Queue): queue to add source/target/error results to
+        stop (Event): stop once this is set
+        mode (str): transfer mode (copy/move)
+        retries (int): number of times to retry a failed file
+        verify (str): verify copied files (size/checksum)
+        preserve (bool): preserve mtimes/permissions of copied files
+    """
+    while not stop.is_set():
+        _task = tasks.get()
+        if _task is None:
+            return
+        _src, _trg = _task
+        _error = None
+        for _attempt in range(retries+1):
+            try:
+                _transfer_file(
+                    _src, _trg, mode=mode, verify=verify, preserve=preserve)
+            except (IOError, OSError) as _exc:
+                _error = _exc
+                if _attempt < retries and not stop.is_set():
+                    time.sleep(_RETRY_WAIT*(_attempt+1))
+            except Exception as _exc:  # pylint: disable=broad-except
+                _error = _exc
+                break
+            else:
+                _error = None
+                break
+        results.put((_src, _trg, _error))
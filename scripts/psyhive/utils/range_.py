@@ -1,8 +1,337 @@
 """Tools for managing ranges of values."""
 
+import bisect
+import collections
+import itertools
 import random
 import sys
 
+import six
+
+
+class FrameSet(collections.Sequence):
+    """Sorted set of frames stored as a list of runs of consecutive frames.
+
+    This behaves like a sorted list of ints, but a sequence's frames are
+    normally one or a few runs, so storing them as runs means that
+    membership/indexing is O(log runs), and finding the range or any
+    missing frames is O(runs).
+    """
+
+    def __init__(self, frames=None):
+        """Constructor.
+
+        Args:
+            frames (int list|FrameSet): frames to add
+        """
+        if isinstance(frames, FrameSet):
+            _runs = frames.runs
+        else:
+            _runs = []
+            for _frame in sorted(set(frames or [])):
+                if _runs and _runs[-1][1] == _frame-1:
+                    _runs[-1][1] = _frame
+                else:
+                    _runs.append([_frame, _frame])
+        self._set_runs(_runs)
+
+    @classmethod
+    def from_runs(cls, runs):
+        """Build a frame set from a list of runs.
+
+        Args:
+            runs (tuple list): list of start/end frames of each run -
+                these should be sorted and not overlap
+
+        Returns:
+            (FrameSet): frame set
+        """
+        _frames = cls()
+        _frames._set_runs(runs)
+        return _frames
+
+    @property
+    def start(self):
+        """Get first frame.
+
+        Returns:
+            (int|None): first frame (if any)
+        """
+        return self.runs[0][0] if self.runs else None
+
+    @property
+    def end(self):
+        """Get last frame.
+
+        Returns:
+            (int|None): last frame (if any)
+        """
+        return self.runs[-1][1] if self.runs else None
+
+    def get_missing(self):
+        """Get frames missing between the first and last frames.
+
+        Returns:
+            (FrameSet): missing frames
+        """
+        return FrameSet.from_runs([
+            (_prev[1]+1, _next[0]-1)
+            for _prev, _next in zip(self.runs, self.runs[1:])])
+
+    def has_gaps(self):
+        """Test whether there are any missing frames within the range.
+
+        Returns:
+            (bool): whether gaps
+        """
+        return len(self.runs) > 1
+
+    def intersection(self, frames):
+        """Get frames which are in this set and the given frames.
+
+        Args:
+            frames (int list|FrameSet): frames to intersect with
+
+        Returns:
+            (FrameSet): intersection
+        """
+        _other = FrameSet(frames).runs
+        _runs = []
+        _idx = _o_idx = 0
+        while _idx < len(self.runs) and _o_idx < len(_other):
+            _start = max(self.runs[_idx][0], _other[_o_idx][0])
+            _end = min(self.runs[_idx][1], _other[_o_idx][1])
+            if _start <= _end:
+                _runs.append((_start, _end))
+            if self.runs[_idx][1] < _other[_o_idx][1]:
+                _idx += 1
+            else:
+                _o_idx += 1
+        return FrameSet.from_runs(_runs)
+
+    def to_str(self, rng_sep="-", chunk_sep=","):
+        """Get this set as a readable string (see ints_to_str).
+
+        Args:
+            rng_sep (str): range separator
+            chunk_sep (str): chunk separator
+
+        Returns:
+            (str): frames string
+        """
+        if len(self.runs) == len(self):
+            return ints_to_str(list(self), rng_sep=rng_sep,
+                               chunk_sep=chunk_sep)
+        return chunk_sep.join([
+            str(_start) if _start == _end else
+            '{:d}{}{:d}'.format(_start, rng_sep, _end)
+            for _start, _end in self.runs])
+
+    def union(self, frames):
+        """Get frames which are in this set or the given frames.
+
+        Args:
+            frames (int list|FrameSet): frames to add
+
+        Returns:
+            (FrameSet): union
+        """
+        _runs = []
+        for _start, _end in sorted(self.runs + FrameSet(frames).runs):
+            if _runs and _start <= _runs[-1][1]+1:
+                _runs[-1][1] = max(_runs[-1][1], _end)
+            else:
+                _runs.append([_start, _end])
+        return FrameSet.from_runs(_runs)
+
+    def _set_runs(self, runs):
+        """Set runs data.
+
+        Args:
+            runs (tuple list): start/end frames of each run
+        """
+        self.runs = [tuple(_run) for _run in runs]
+        self._starts = [_start for _start, _ in self.runs]
+        self._offsets = []
+        _count = 0
+        for _start, _end in self.runs:
+            self._offsets.append(_count)
+            _count += _end - _start + 1
+        self._count = _count
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __contains__(self, frame):
+        try:
+            if frame != int(frame):  # Only whole frames are members
+                return False
+        except (TypeError, ValueError, OverflowError):
+            return False
+        _idx = bisect.bisect_right(self._starts, frame) - 1
+        return _idx >= 0 and frame <= self.runs[_idx][1]
+
+    def __eq__(self, other):
+        if isinstance(other, FrameSet):
+            return self.runs == other.runs
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and list(other) == list(self)
+        return NotImplemented
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return list(self)[idx]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        _run = bisect.bisect_right(self._offsets, idx) - 1
+        return self.runs[_run][0] + idx - self._offsets[_run]
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(
+            six.moves.range(_start, _end+1) for _start, _end in self.runs)
+
+    def __len__(self):
+        return self._count
+
+    def __ne__(self, other):
+        _eq = self.__eq__(other)
+        if _eq is NotImplemented:
+            return _eq
+        return not _eq
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __repr__(self):
+        return '<{}|{}>'.format(type(self).__name__, self.to_str())
+
+    __hash__ = None
+
+
+class MultiRange(collections.Sequence):
+    """Lazy list of ints made up of a list of ranges.
+
+    This is returned by str_to_ints in lazy mode - only the start, stop
+    and step of each range are stored, so long ranges can be iterated,
+    tested, sliced and split into chunks without building a list.
+    """
+
+    def __init__(self, ranges=None):
+        """Constructor.
+
+        Args:
+            ranges (tuple list): start/stop/step of each range (as
+                passed to range, ie. stop is not included)
+        """
+        self.ranges = []
+        self._offsets = []
+        _count = 0
+        for _start, _stop, _step in ranges or []:
+            assert _step > 0
+            _len = max(0, (_stop - _start + _step - 1) // _step)
+            if not _len:
+                continue
+            _stop = _start + _len*_step
+            self.ranges.append((_start, _stop, _step))
+            self._offsets.append(_count)
+            _count += _len
+        self._count = _count
+
+        self.min = self.max = None
+        if self.ranges:
+            self.min = min([_start for _start, _, _ in self.ranges])
+            self.max = max([_stop-_step for _, _stop, _step in self.ranges])
+
+    def chunks(self, size):
+        """Split this range into chunks of the given size.
+
+        eg. 1-10 split into chunks of 4 gives 1-4, 5-8, 9-10
+
+        Args:
+            size (int): number of ints in each chunk
+
+        Returns:
+            (MultiRange list): chunks
+        """
+        assert size > 0
+        return [self[_idx: _idx+size] for _idx in range(0, len(self), size)]
+
+    def __contains__(self, value):
+        for _start, _stop, _step in self.ranges:
+            if _start <= value < _stop and not (value - _start) % _step:
+                return True
+        return False
+
+    def __eq__(self, other):
+        if isinstance(other, MultiRange):
+            return list(self) == list(other)
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and list(other) == list(self)
+        return NotImplemented
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            _start, _stop, _step = idx.indices(len(self))
+            if _step != 1:
+                return [self[_idx] for _idx in range(_start, _stop, _step)]
+            return self._slice(_start, _stop)
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        _rng = bisect.bisect_right(self._offsets, idx) - 1
+        _start, _, _step = self.ranges[_rng]
+        return _start + (idx - self._offsets[_rng])*_step
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(
+            six.moves.range(*_rng) for _rng in self.ranges)
+
+    def __len__(self):
+        return self._count
+
+    def __ne__(self, other):
+        _eq = self.__eq__(other)
+        if _eq is NotImplemented:
+            return _eq
+        return not _eq
+
+    def __repr__(self):
+        _strs = []
+        for _start, _stop, _step in self.ranges:
+            _end = _stop - _step
+            if _start == _end:
+                _strs.append(str(_start))
+            else:
+                _strs.append('{:d}-{:d}{}'.format(
+                    _start, _end, 'x{:d}'.format(_step) if _step > 1 else ''))
+        return '<{}|{}>'.format(type(self).__name__, ','.join(_strs))
+
+    def _slice(self, start, stop):
+        """Get a contiguous slice of this range.
+
+        Args:
+            start (int): index of first value
+            stop (int): index after last value
+
+        Returns:
+            (MultiRange): slice
+        """
+        _ranges = []
+        for _offset, (_r_start, _r_stop, _step) in zip(
+                self._offsets, self.ranges):
+            _len = (_r_stop - _r_start) // _step
+            _first = max(start - _offset, 0)
+            _last = min(stop - _offset, _len)
+            if _first < _last:
+                _ranges.append((
+                    _r_start + _first*_step, _r_start + _last*_step, _step))
+        return MultiRange(_ranges)
+
+    __hash__ = None
+
 
 class ValueRange(object):
     """Represents a range of values described by a string.
@@ -96,6 +425,8 @@ def ints_to_str(values, rng_sep="-", chunk_sep=","):
     if not values:
         return ""
 
+    if isinstance(values, FrameSet):
+        return values.to_str(rng_sep=rng_sep, chunk_sep=chunk_sep)
     if isinstance(values, (set, tuple)):
         values = list(values)
 
@@ -235,7 +566,7 @@ def fr_enumerate(list_, last_=True):
     return zip(fr_range(len(_list), last_=last_), _list)
 
 
-def str_to_ints(string, chunk_sep=",", rng_sep="-", end=None):
+def str_to_ints(string, chunk_sep=",", rng_sep="-", end=None, lazy=False):
     """Convert a range string to a list of integers.
 
     For example:
@@ -248,15 +579,22 @@ def str_to_ints(string, chunk_sep=",", rng_sep="-", end=None):
         chunk_sep (str): chunk separator
         rng_sep (str): range separator
         end (int): force range end
+        lazy (bool): return a MultiRange object rather than building
+            the list of ints
+
+    Returns:
+        (int list|MultiRange): ints
     """
     if not string:
-        return []
+        return MultiRange() if lazy else []
 
     if string == '*':
         from psyhive import host
+        if lazy:
+            return MultiRange([(int(host.t_start()), int(host.t_end())+1, 1)])
         return host.t_frames()
 
-    _ints = []
+    _ranges = []
     for _rng in string.split(chunk_sep):
 
         # Handle inc
@@ -288,16 +626,22 @@ def str_to_ints(string, chunk_sep=",", rng_sep="-", end=None):
             else:
                 _rng_start = _tokens[0]
                 _rng_end = _tokens[-1]
-            _ints += range(_rng_start, _rng_end+1, _inc)
+            _ranges.append((_rng_start, _rng_end+1, _inc))
 
         # Handle lone num
         else:
-            _ints.append(int(_rng))
+            _val = int(_rng)
+            _ranges.append((_val, _val+1, 1))
 
+    if lazy:
+        return MultiRange(_ranges)
+    _ints = []
+    for _rng in _ranges:
+        _ints += range(*_rng)
     return _ints
 
 
-def str_to_frames(string):
+def str_to_frames(string, lazy=False):
     """Get a list of frames from a string.
 
     eg:
@@ -310,14 +654,15 @@ def str_to_frames(string):
 
     Args:
         string (str): string to read
+        lazy (bool): return a MultiRange object rather than building
+            the list of frames
 
     Returns:
-        (int list): list of frames
+        (int list|MultiRange): list of frames
     """
-    from psyhive import host
-    if not string or string == '*':
-        return host.t_frames()
-    return str_to_ints(string)
+    if not string:
+        string = '*'
+    return str_to_ints(string, lazy=lazy)
 
 
 def str_to_range(string):
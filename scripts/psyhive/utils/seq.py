@@ -3,15 +3,14 @@
 import collections
 import operator
 import os
-import shutil
 import time
 
 from .cache import store_result_on_obj
 from .misc import dprint, lprint, get_plural, bytes_to_str
-from .filter_ import passes_filter
 from .path import (
-    File, abs_path, find, test_path, Dir, nice_size, get_path, Path)
-from .range_ import ints_to_str
+    File, abs_path, find, ifind, test_path, Dir, nice_size, get_path,
+    transfer_files)
+from .range_ import ints_to_str, FrameSet
 
 
 class Seq(object):
@@ -44,24 +43,25 @@ class Seq(object):
         Args:
             frame (int): frame to add
         """
-        _frames = set(self.get_frames())
-        _frames.add(frame)
-        self.set_frames(sorted(_frames))
+        self.set_frames(self.get_frames().union([frame]))
 
-    def copy_to(self, seq, parent=None):
+    def copy_to(self, seq, parent=None, verify=None, manifest=None):
         """Copy this sequence to a new location.
 
         Args:
             seq (Seq): target location
             parent (QDialog): parent dialog for progress bar
+            verify (str): verify copied frames (size/checksum)
+            manifest (str): path to transfer manifest - if this exists,
+                the copy is resumed rather than replacing existing frames
         """
-        from psyhive import qt
-        seq.delete(wording='Replace')
+        if not (manifest and os.path.exists(manifest)):
+            seq.delete(wording='Replace')
         seq.test_dir()
-        for _frame in qt.progress_bar(
-                self.get_frames(), 'Copying {:d} frame{}',
-                parent=parent):
-            shutil.copy(self[_frame], seq[_frame])
+        transfer_files(
+            [(self[_frame], seq[_frame]) for _frame in self.get_frames()],
+            verify=verify, manifest=manifest, progress='Copying {:d} frame{}',
+            parent=parent)
 
     def contains(self, file_):
         """Test if the given file is contained in this seq.
@@ -92,7 +92,7 @@ class Seq(object):
 
         _frames = self.get_frames(force=True)
         if frames:
-            _frames = sorted(set(_frames).intersection(frames))
+            _frames = _frames.intersection(frames)
         if not _frames:
             return
         if not force:
@@ -129,7 +129,7 @@ class Seq(object):
         _frames = self.get_frames(force=force)
         if not _frames:
             return None
-        return _frames[0], _frames[-1]
+        return _frames.start, _frames.end
 
     def get_frame(self, file_):
         """Get frame number of the given member of this sequence.
@@ -167,10 +167,10 @@ class Seq(object):
             verbose (int): print process data
 
         Returns:
-            (int list): frame numbers
+            (FrameSet): frame numbers
         """
         if frames:
-            return frames
+            return FrameSet(frames)
         _frames = set()
         _head, _tail = self.path.split(self.frame_expr)
 
@@ -193,7 +193,7 @@ class Seq(object):
             _frame = int(_frame_str)
             _frames.add(_frame)
 
-        return sorted(_frames)
+        return FrameSet(_frames)
 
     def get_path(self, idx):
         """Get the path to a frame of the sequence.
@@ -230,8 +230,7 @@ class Seq(object):
         Returns:
             (bool): whether missing frames
         """
-        _start, _end = self.find_range()
-        return self.get_frames() != range(_start, _end+1)
+        return self.get_frames().has_gaps()
 
     def move_to(self, target):
         """Move this image sequence.
@@ -241,8 +240,10 @@ class Seq(object):
         """
         assert not target.exists(force=True)
         target.test_dir()
-        for _frame in self.get_frames(force=True):
-            shutil.move(self[_frame], target[_frame])
+        transfer_files(
+            [(self[_frame], target[_frame])
+             for _frame in self.get_frames(force=True)],
+            mode='move')
 
     def nice_size(self):
         """Get size of this image sequence in a readable form.
@@ -264,7 +265,7 @@ class Seq(object):
         """Set cached list of frames.
 
         Args:
-            frames (int list): list of frames to store
+            frames (int list|FrameSet): list of frames to store
         """
         self.get_frames(force=True, frames=frames)
 
@@ -480,63 +481,98 @@ def _seq_to_mov_ffmpeg(seq, mov, fps):
         raise RuntimeError("Failed to generate "+_mov.path)
 
 
-def find_seqs(dir_, class_=None, filter_=None, verbose=0):
+def find_seqs(dir_, class_=None, filter_=None, workers=None, verbose=0):
     """Find sequences in the given path and subdirs.
 
     Args:
         dir_ (str): path to dir to search
         class_ (class): override seq class
         filter_ (str): apply path filter
+        workers (int): list dirs in parallel using this number of threads
         verbose (int): print process data
 
     Returns:
         (Seq list): list of seqs
     """
-    _dir = Dir(abs_path(dir_))
-    _class = class_ or Seq
-
-    _this_seqs = collections.defaultdict(set)
-    _seqs = []
-    for _path in _dir.find(depth=1, class_=Path):
+    _files = ifind(
+        abs_path(dir_), type_='f', filter_=filter_, sort=False,
+        workers=workers)
+    _seqs, _ = group_frames(_files, class_=class_, verbose=verbose)
+    return _seqs
 
-        lprint(' - TESTING FILE', _path, verbose=verbose > 2)
 
-        if _path.is_file():
+def group_frames(paths, class_=None, verbose=0):
+    """Group the given file paths into sequences.
 
-            if filter_ and not passes_filter(_path.path, filter_):
-                continue
-
-            # Ignore files already matched in seq
-            _already_matched = False
-            for _seq in _this_seqs:
-                if _seq.contains(_path):
-                    _already_matched = True
-                    _frame = _seq.get_frame(_path)
-                    _this_seqs[_seq].add(_frame)
-                    lprint(' - EXISTING SEQ', _path, verbose=verbose > 2)
-                    break
-            if _already_matched:
-                continue
+    Each filename is parsed once into a basename, frame and extension,
+    and frames are grouped by their sequence path, so that each seq
+    object is only built once (with its frames already applied).
 
-            # Match seq
-            _seq = seq_from_frame(_path, catch=True, class_=_class)
-            if _seq:
-                lprint(' - CREATED SEQ', _seq, verbose=verbose)
-                _frame = _seq.get_frame(_path)
-                _this_seqs[_seq].add(_frame)
+    A file is a frame of a sequence if its path matches the seq with its
+    frame padding, or if its frame overflows a seq with smaller padding
+    (eg. blah.10000.jpg is a frame of blah.%04d.jpg).
 
-        elif _path.is_dir():
-            _seqs += find_seqs(
-                _path, class_=class_, verbose=verbose, filter_=filter_)
+    Args:
+        paths (str list): absolute paths to files
+        class_ (class): override seq class - any seq path which raises
+            ValueError on construction is ignored
+        verbose (int): print process data
 
-        else:
-            raise ValueError(_path)
+    Returns:
+        (tuple): seqs found (sorted by path), paths which were not
+            frames of any seq
+    """
+    _class = class_ or Seq
 
-    # Apply frames cache
-    for _seq, _frames in _this_seqs.items():
-        _seq.set_frames(sorted(_frames))
+    # Group frames by dir/basename/extn
+    _groups = collections.OrderedDict()
+    _others = []
+    for _path in paths:
+        _dir, _, _filename = _path.rpartition('/')
+        _tokens = _filename.split('.')
+        if len(_tokens) < 3 or not _tokens[-2].isdigit():
+            _others.append(_path)
+            continue
+        _key = _dir, '.'.join(_tokens[:-2]), _tokens[-1]
+        _groups.setdefault(_key, []).append((_tokens[-2], _path))
+
+    # Build seqs
+    _seqs = []
+    for (_dir, _base, _extn), _frame_strs in _groups.items():
+
+        # Build seq for each padding
+        _pad_seqs = {}
+        for _pad in sorted(set([len(_str) for _str, _ in _frame_strs])):
+            _seq_path = '{}/{}.%0{:d}d.{}'.format(_dir, _base, _pad, _extn)
+            try:
+                _pad_seqs[_pad] = _class(_seq_path)
+            except ValueError:
+                lprint(' - REJECTED SEQ', _seq_path, verbose=verbose > 1)
+                continue
+            lprint(' - CREATED SEQ', _pad_seqs[_pad], verbose=verbose)
+        _pads = sorted(_pad_seqs, reverse=True)
+
+        # Assign frames to seqs
+        _frames = collections.defaultdict(set)
+        for _frame_str, _path in _frame_strs:
+            _pad = len(_frame_str)
+            if _pad not in _pad_seqs:
+                _pad = None
+                if not _frame_str.startswith('0'):
+                    for _seq_pad in _pads:
+                        if _seq_pad < len(_frame_str):
+                            _pad = _seq_pad
+                            break
+            if _pad is None:
+                _others.append(_path)
+                continue
+            _frames[_pad].add(int(_frame_str))
+        for _pad, _pad_frames in _frames.items():
+            _seq = _pad_seqs[_pad]
+            _seq.set_frames(_pad_frames)
+            _seqs.append(_seq)
 
-    return sorted(_seqs+_this_seqs.keys(), key=operator.attrgetter('path'))
+    return sorted(_seqs, key=operator.attrgetter('path')), _others
 
 
 def seq_from_frame(file_, catch=False, class_=None):